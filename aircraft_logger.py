@@ -1,3 +1,4 @@
+import os
 import time
 import socket
 import logging
@@ -7,13 +8,23 @@ import json
 from datetime import datetime
 from airlogger.core import (
     create_socket, parse_message, log_aircraft, 
-    cleanup_old_logs, ensure_log_file, current_log_handle
+    cleanup_old_logs, ensure_log_file, current_log_handle, set_journal, close_log_outputs,
+    LINES_READ, LINES_PARSED, LINES_DROPPED
 )
+from airlogger import metrics
+from airlogger.latency import tracker as latency
+from airlogger.profiling import install_signal_handler
 from airlogger.db import init_db
+from airlogger.journal import IngestJournal
+from airlogger.segments import build_segments
+from airlogger.tracks import store_closed_tracks
+from airlogger.coverage import update_coverage
+from airlogger.metadata import metadata_cache, provider_stats, pending_refreshes
 from airlogger.config import (
-    HEARTBEAT_INTERVAL, HEARTBEAT_FILE, 
+    HEARTBEAT_INTERVAL, HEARTBEAT_FILE, METRICS_FILE, LATENCY_FILE,
     CONNECTION_RETRY_DELAY, MAX_RETRY_DELAY, 
-    SOCKET_TIMEOUT
+    SOCKET_TIMEOUT, JOURNAL_ENABLED, JOURNAL_DIR, JOURNAL_FLUSH_EVERY,
+    JOURNAL_FLUSH_INTERVAL, JOURNAL_APPLY_INTERVAL, JOURNAL_MAX_BYTES
 )
 
 # Logging setup
@@ -26,6 +37,7 @@ logger = logging.getLogger('aircraft_logger')
 
 running = True
 last_heartbeat = 0
+journal = None
 
 def signal_handler(sig, frame):
     global running
@@ -34,20 +46,60 @@ def signal_handler(sig, frame):
 
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
+install_signal_handler('logger')
 
 def write_heartbeat(line_count):
     try:
         with open(HEARTBEAT_FILE, 'w') as f:
             json.dump({
                 'timestamp': time.time(),
+                'pid': os.getpid(),
                 'iso': datetime.now().isoformat(),
-                'lines_processed': line_count
+                'lines_processed': line_count,
+                'metadata_cache': metadata_cache.stats(),
+                'metadata_providers': provider_stats(),
+                'journal_backlog_bytes': journal.backlog_bytes() if journal else 0
             }, f)
     except Exception as e:
         logger.debug(f"Heartbeat failed: {e}")
+    try:
+        metrics.write_textfile(METRICS_FILE, "logger")
+        latency.write(LATENCY_FILE)
+    except Exception as e:
+        logger.debug(f"Metrics snapshot write failed: {e}")
+
+def register_metrics():
+    """Gauges and counters read from existing state when the textfile is written."""
+    metrics.counter("airlogger_metadata_cache_hits_total", "Metadata cache hits").set_function(
+        lambda: metadata_cache.hits)
+    metrics.counter("airlogger_metadata_cache_misses_total", "Metadata cache misses").set_function(
+        lambda: metadata_cache.misses)
+    metrics.counter("airlogger_metadata_cache_stale_hits_total",
+                    "Metadata cache hits served stale while refreshing").set_function(lambda: metadata_cache.stale_hits)
+    metrics.gauge("airlogger_metadata_cache_entries", "Entries in the metadata cache").set_function(
+        lambda: len(metadata_cache))
+    metrics.gauge("airlogger_metadata_refresh_queue", "Background metadata refreshes queued or running").set_function(
+        pending_refreshes)
+    if journal:
+        metrics.gauge("airlogger_journal_backlog_bytes",
+                      "Journal bytes written but not yet applied to SQLite").set_function(journal.backlog_bytes)
+        metrics.gauge("airlogger_journal_unflushed_records",
+                      "Journal records appended but not yet fsync'ed").set_function(lambda: journal.unflushed)
+
+def record_lines(read, parsed):
+    """Add the main loop's local line counts to the metrics (kept off the per-line path)."""
+    LINES_READ.inc(read)
+    LINES_PARSED.inc(parsed)
+    LINES_DROPPED.inc(read - parsed)
+
+def compact_history():
+    """Fold new positions into segments, simplified tracks and coverage aggregates."""
+    build_segments()
+    store_closed_tracks()
+    update_coverage()
 
 def main():
-    global running, last_heartbeat
+    global running, last_heartbeat, journal
     logger.info("Starting Aircraft Logger Service...")
     
     try:
@@ -56,35 +108,51 @@ def main():
         logger.error(f"DB Init failed: {e}")
         return
 
+    if JOURNAL_ENABLED:
+        journal = IngestJournal(JOURNAL_DIR, JOURNAL_FLUSH_EVERY, JOURNAL_FLUSH_INTERVAL,
+                                JOURNAL_APPLY_INTERVAL, JOURNAL_MAX_BYTES, on_applied=compact_history)
+        journal.replay()
+        journal.start()
+        set_journal(journal)
+    register_metrics()
+
     retry_delay = CONNECTION_RETRY_DELAY
     
     while running:
         sock = None
         file_handle = None
+        line_count = lines_read = 0
         try:
             sock = create_socket()
             logger.info(f"Connected to dump1090. Listening...")
             retry_delay = CONNECTION_RETRY_DELAY
             
             file_handle = sock.makefile('r', encoding='utf-8', errors='ignore')
-            line_count = 0
             
             for line in file_handle:
                 if not running: break
+                lines_read += 1
                 
                 # Maintenance
                 now = time.time()
                 if now - last_heartbeat >= HEARTBEAT_INTERVAL:
                     logger.info(f"Heartbeat: Processed {line_count} lines. Still healthy.")
+                    record_lines(lines_read, line_count)
                     write_heartbeat(line_count)
                     cleanup_old_logs()
+                    if not journal:
+                        try:
+                            compact_history()
+                        except Exception as e:
+                            logger.error(f"History compaction failed: {e}")
                     last_heartbeat = now
-                    line_count = 0
+                    line_count = lines_read = 0
                 
-                # Process
+                # Process (received after maintenance, which must not count as parse time)
+                received = time.time()
                 parsed = parse_message(line)
                 if parsed:
-                    log_aircraft(parsed)
+                    log_aircraft(parsed, received)
                     line_count += 1
                     
         except (socket.timeout, ConnectionRefusedError, socket.error) as e:
@@ -95,10 +163,15 @@ def main():
             logger.error(f"Unexpected error: {e}", exc_info=True)
             time.sleep(retry_delay)
         finally:
+            record_lines(lines_read, line_count)
             if file_handle: file_handle.close()
             if sock: sock.close()
             time.sleep(1)
 
+    if journal:
+        set_journal(None)
+        journal.close()
+    close_log_outputs()
     logger.info("Logger service stopped.")
 
 if __name__ == "__main__":
@@ -0,0 +1,102 @@
+"""Admin endpoints for diagnostics, reachable from localhost only."""
+import os
+import json
+import time
+import signal
+import logging
+from flask import Blueprint, jsonify, request, abort, g, send_from_directory
+from airlogger import profiling, querystats
+from airlogger.config import HEARTBEAT_FILE, HEALTH_THRESHOLD, PROFILE_SECONDS, PROFILE_TRACEMALLOC
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
+logger = logging.getLogger(__name__)
+
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+LOGGER_SCRIPT = b'aircraft_logger.py'
+
+@admin_bp.before_request
+def _local_only():
+    if request.remote_addr not in LOCAL_ADDRESSES:
+        abort(403)
+
+@admin_bp.before_app_request
+def _start_request_profile():
+    g.request_profile = profiling.profile_request()
+    g.request_profile_start = time.perf_counter()
+
+@admin_bp.after_app_request
+def _finish_request_profile(response):
+    profile = g.pop('request_profile', None)
+    if profile is not None:
+        elapsed = time.perf_counter() - g.pop('request_profile_start')
+        try:
+            profiling.finish_request(profile, request.endpoint or 'unmatched', elapsed)
+        except Exception as e:
+            logger.error(f"Slow-request profile failed: {e}")
+    return response
+
+def _is_logger(pid):
+    """True if /proc shows pid running aircraft_logger.py (unverifiable counts as no)."""
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            args = f.read().split(b'\0')
+    except OSError:
+        return False
+    return any(os.path.basename(arg) == LOGGER_SCRIPT for arg in args)
+
+def _logger_pid():
+    """(pid, None) for a live logger, or (None, reason) when it must not be signalled."""
+    try:
+        with open(HEARTBEAT_FILE) as f:
+            hb = json.load(f)
+        pid, age = int(hb['pid']), time.time() - float(hb['timestamp'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, 'logger pid unknown (no heartbeat yet)'
+    # SIGUSR1 kills a process without a handler, so never signal a pid that may have been reused
+    if age > HEALTH_THRESHOLD:
+        return None, f'logger heartbeat is {age:.0f}s old; is the logger running?'
+    if not _is_logger(pid):
+        return None, f'pid {pid} is not the aircraft logger'
+    return pid, None
+
+@admin_bp.route('/profile', methods=['POST'])
+def start_profile():
+    """Profile this dashboard process, or signal the logger to profile itself (target=logger)."""
+    target = request.args.get('target', 'dashboard')
+    if target == 'logger':
+        if not hasattr(signal, 'SIGUSR1'):
+            return jsonify({'error': 'SIGUSR1 is not available on this platform'}), 501
+        pid, reason = _logger_pid()
+        if pid is None:
+            return jsonify({'error': reason}), 503
+        try:
+            os.kill(pid, signal.SIGUSR1)
+        except OSError as e:
+            return jsonify({'error': str(e)}), 404
+        return jsonify({'target': 'logger', 'pid': pid, 'reports': profiling.PROFILE_DIR}), 202
+    if target != 'dashboard':
+        return jsonify({'error': 'target must be dashboard or logger'}), 400
+
+    seconds = min(max(request.args.get('seconds', default=PROFILE_SECONDS, type=float), 1), 600)
+    memory = request.args.get('memory', default=str(PROFILE_TRACEMALLOC)).lower() in ('1', 'true', 'yes')
+    if not profiling.start_profile('dashboard', seconds, memory):
+        return jsonify({'error': 'a profile is already running'}), 409
+    return jsonify({'target': 'dashboard', 'pid': os.getpid(), 'seconds': seconds,
+                    'memory': memory, 'reports': profiling.PROFILE_DIR}), 202
+
+@admin_bp.route('/profiles')
+def list_profiles():
+    return jsonify(profiling.list_reports())
+
+@admin_bp.route('/profiles/<path:name>')
+def get_profile(name):
+    return send_from_directory(profiling.PROFILE_DIR, name, mimetype='text/plain')
+
+@admin_bp.route('/query-stats')
+def query_stats():
+    """SQL timings per statement shape: every process's stats file, with this process's live stats."""
+    snapshots = querystats.load_all()
+    shapes = querystats.merge(snapshots.values())
+    processes = [{'pid': pid, 'process': s['process'], 'updated': s['updated']} for pid, s in snapshots.items()]
+    ordered = sorted(shapes.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+    return jsonify({'processes': processes, 'shapes': [dict(s, statement=shape) for shape, s in ordered]})
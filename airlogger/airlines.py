@@ -0,0 +1,126 @@
+"""Airline designator tables shared by the logger, dashboard and email report.
+
+The built-in tables are plain dicts created once at import. User overrides from
+``OPERATORS_FILE`` (``{"PREFIX": "Operator name"}``) are layered on top and
+reloaded only when the file's mtime changes.
+"""
+import os
+import json
+import time
+import logging
+from typing import Dict
+
+from airlogger.config import OPERATORS_FILE
+
+logger = logging.getLogger(__name__)
+
+# ICAO airline designator (callsign prefix) -> operator name
+ICAO_NAMES: Dict[str, str] = {
+    "AAL": "American Airlines", "AAR": "Asiana Airlines", "ABX": "ABX Air",
+    "AFR": "Air France", "ANA": "All Nippon Airways", "ANZ": "Air New Zealand",
+    "ASN": "Korean Air", "AVA": "Avianca", "AZA": "ITA Airways",
+    "BAW": "British Airways", "BEE": "Flybe", "BOX": "Polar Air Cargo",
+    "CAL": "China Airlines", "CCA": "Air China", "CES": "China Eastern Airlines",
+    "CFE": "BA CityFlyer", "CFG": "Condor", "CKK": "China Cargo Airline",
+    "CLX": "Cargolux", "CPA": "Cathay Pacific", "CPE": "Cope",
+    "CSN": "China Southern Airlines", "DLH": "Lufthansa", "DLX": "Delta Air Lines",
+    "ETD": "Etihad", "EVA": "EVA Air", "EXS": "Jet2.com",
+    "EZY": "easyJet", "FDX": "FedEx", "FIN": "Finnair", "GAW": "Gandalf Airways",
+    "GLG": "AeroLease", "GLO": "Gol",
+    "GTI": "Atlas Air", "GWI": "Germanwings", "HKG": "Hong Kong Airlines",
+    "HSR": "Air Saint Pierre", "HYA": "Hainan Airlines", "HZT": "Air Horizont",
+    "IBE": "Iberia", "JAL": "Japan Airlines", "JBU": "JetBlue", "JEA": "Northeaster",
+    "JKK": "Binter Canarias", "JST": "Jetstar", "JSY": "Jalways", "KAL": "Korean Air", "KLM": "KLM",
+    "LAN": "LATAM", "LGL": "Luxair", "LPC": "LATAM Paraguay", "LPE": "LATAM Express",
+    "LPL": "LATAM Perú", "LRC": "Lufthansa CityLine", "LXB": "Luxair",
+    "NCA": "Nippon Cargo Airlines", "OCN": "Air Charter Services", "OHY": "Onur Air",
+    "PAC": "Polar Air Cargo", "QFA": "Qantas",
+    "QTR": "Qatar Airways", "RYR": "Ryanair", "SAS": "Scandinavian Airlines",
+    "SHT": "British Airways", "SIA": "Singapore Airlines", "SQA": "SF Airlines",
+    "STN": "Ryanair", "SWA": "Southwest", "SXS": "SunExpress", "TAM": "LATAM",
+    "TNT": "FedEx", "TUI": "TUI Airways", "UAE": "Emirates", "UAL": "United",
+    "UPS": "UPS", "VIR": "Virgin Atlantic", "VOZ": "Virgin Australia",
+    "WZZ": "Wizz Air", "XJC": "Hong Kong Express",
+}
+
+# ICAO airline designator -> IATA code (used for FlightRadar24 flight links)
+ICAO_TO_IATA: Dict[str, str] = {
+    "QFA": "QF", "JST": "JQ", "VOZ": "VA", "ANZ": "NZ", "BAW": "BA", "DLH": "LH", "UAE": "EK",
+    "AAL": "AA", "DAL": "DL", "UAL": "UA", "SWA": "WN", "AFR": "AF", "KLM": "KL",
+    "RYR": "FR", "EZY": "U2", "THY": "TK", "QTR": "QR", "ETD": "EY", "CXA": "MF", "CPA": "CX",
+    "ANA": "NH", "JAL": "JL", "KAL": "KE", "SIA": "SQ", "AIC": "AI", "IBE": "IB", "TAP": "TP",
+    "FIN": "AY", "SAS": "SK", "SWR": "LX", "AUA": "OS", "BEL": "SN", "LOT": "LO", "CSA": "OK",
+    "AZA": "AZ", "VLG": "VY", "WZZ": "W6", "NAX": "DY", "TUI": "BY", "TOM": "BY", "EXS": "LS",
+    "BEE": "BE", "LOG": "LM", "EWG": "EW", "ASL": "AS", "HAL": "HA", "JBU": "B6", "NKS": "NK",
+    "FFT": "F9", "VIV": "VB", "VOI": "Y4", "AMX": "AM", "GLO": "G3", "TAM": "LA", "LAN": "LA",
+    "ARG": "AR", "AVA": "AV", "CMP": "CM", "VGC": "VH", "TGW": "TR", "SVR": "U6", "AFL": "SU",
+    "SBI": "S7", "PBD": "DP", "AUI": "PS", "MAU": "MK", "SAA": "SA", "ETH": "ET", "RAM": "AT",
+    "EGY": "MS", "MSR": "MS", "MEA": "ME", "RJA": "RJ", "GFA": "GF", "KAC": "KU",
+    "OMA": "WY", "FDB": "FZ", "MNA": "XY",
+}
+
+# IATA code -> ICAO designator, for IATA-style callsigns (VA123); first mapping wins
+IATA_TO_ICAO: Dict[str, str] = {}
+for _icao, _iata in ICAO_TO_IATA.items():
+    IATA_TO_ICAO.setdefault(_iata, _icao)
+
+# Overrides are stat()ed at most this often (seconds)
+OVERRIDE_CHECK_INTERVAL = 30
+
+_overrides: Dict[str, str] = {}
+_overrides_mtime = None
+_last_override_check = 0.0
+
+
+def load_overrides(force: bool = False) -> Dict[str, str]:
+    """Return user operator overrides, re-reading the file only if its mtime changed."""
+    global _overrides, _overrides_mtime, _last_override_check
+    now = time.time()
+    if not force and now - _last_override_check < OVERRIDE_CHECK_INTERVAL:
+        return _overrides
+    _last_override_check = now
+
+    try:
+        mtime = os.stat(OPERATORS_FILE).st_mtime
+    except OSError:
+        _overrides, _overrides_mtime = {}, None
+        return _overrides
+
+    if force or mtime != _overrides_mtime:
+        try:
+            with open(OPERATORS_FILE, "r") as f:
+                data = json.load(f)
+            _overrides = {str(k).upper(): str(v) for k, v in data.items()} if isinstance(data, dict) else {}
+        except Exception as e:
+            logger.warning(f"Could not load operator overrides from {OPERATORS_FILE}: {e}")
+            _overrides = {}
+        _overrides_mtime = mtime
+    return _overrides
+
+
+def operator_name(prefix: str) -> str:
+    """Operator name for an airline designator, user overrides first."""
+    if not prefix:
+        return ""
+    prefix = prefix.upper()
+    return load_overrides().get(prefix) or ICAO_NAMES.get(prefix, "")
+
+
+def operator_from_callsign(callsign: str) -> str:
+    """Operator name from a callsign's ICAO designator, or its IATA code (VA123) as a fallback."""
+    if not callsign or callsign == "N/A":
+        return ""
+    c = callsign.strip().upper()
+    name = operator_name(c[:3])
+    if not name and len(c) > 2 and c[2].isdigit() and c[:2] in IATA_TO_ICAO:
+        name = operator_name(IATA_TO_ICAO[c[:2]])
+    return name
+
+
+def iata_flight_number(callsign: str) -> str:
+    """Convert an ICAO callsign (QFA123) to an IATA-style flight number (QF123)."""
+    if not callsign:
+        return ""
+    c = callsign.upper().strip()
+    iata = ICAO_TO_IATA.get(c[:3])
+    return iata + c[3:] if iata else c
@@ -1,89 +1,428 @@
+import math
 import time
 import os
 import json
-import math
+import calendar
 import logging
 from datetime import datetime, timedelta
-from flask import Blueprint, jsonify, request, Response
-from airlogger.db import get_db_connection
-from airlogger.config import STATION_LAT, STATION_LON, HEARTBEAT_FILE, HEALTH_THRESHOLD, LIVE_DATA_MINUTES
-from airlogger.utils import convert_to_local
+from flask import Blueprint, jsonify, request, Response, g
+from airlogger import feed, geo, metrics, latency
+from airlogger.db import get_read_connection, has_rtree, rtree_time
+from airlogger.config import (
+    STATION_LAT, STATION_LON, HEARTBEAT_FILE, HEALTH_THRESHOLD, LIVE_DATA_MINUTES,
+    COVERAGE_CELL_DEG, BEARING_BIN_DEG, METRICS_FILE,
+)
+from airlogger.utils import format_local_many, local_day_utc_bounds, local_day_epoch_bounds
+from airlogger.tracks import segment_coords, simplify, tolerance_for_zoom, level_for_zoom
 
 api_bp = Blueprint('api', __name__)
 logger = logging.getLogger(__name__)
 
+REQUEST_SECONDS = metrics.histogram("airlogger_http_request_duration_seconds",
+                                    "Dashboard request latency by endpoint", ("endpoint", "method"))
+REQUESTS = metrics.counter("airlogger_http_requests_total",
+                           "Dashboard requests by endpoint and status", ("endpoint", "method", "status"))
+
+@api_bp.before_app_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@api_bp.after_app_request
+def _record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_SECONDS.labels(endpoint, request.method).observe(time.perf_counter() - start)
+        REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+        try:
+            metrics.write_worker_file('dashboard')
+        except OSError as e:
+            logger.debug(f"Worker metrics write failed: {e}")
+    return response
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculate Haversine distance in nautical miles with type safety."""
     try:
         if lat1 is None or lon1 is None or lat2 is None or lon2 is None: return None
         l1, n1, l2, n2 = float(lat1), float(lon1), float(lat2), float(lon2)
         if l2 == 0 or n2 == 0: return None
-        R = 3440.065
-        phi1, phi2 = math.radians(l1), math.radians(l2)
-        dphi = math.radians(l2 - l1)
-        dlambda = math.radians(n2 - n1)
-        a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-        return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1-a))
+        return geo.haversine_nm(l1, n1, l2, n2)
     except (ValueError, TypeError):
         return None
 
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _station_distances(rows):
+    """Distances (nm, 1 dp) from the station for rows with lat/lon, None where unknown."""
+    rows = list(rows)
+    lats = [_as_float(r['lat']) for r in rows]
+    lons = [_as_float(r['lon']) for r in rows]
+    distances = geo.distances_nm(STATION_LAT, STATION_LON, lats, lons)
+    return [None if la == 0 or lo == 0 or math.isnan(d) else round(float(d), 1)
+            for la, lo, d in zip(lats, lons, distances)]
+
+def _live_columns(rows, distances, local_times):
+    """Live rows as feed columns with numbers parsed once (missing values as in the JSON feed)."""
+    return {
+        'hex': [r['hex'].upper() for r in rows],
+        'callsign': [r['callsign'] or "" for r in rows],
+        'reg': [r['registration'] or "" for r in rows],
+        'model': [r['model'] or "" for r in rows],
+        'operator': [r['operator'] or "" for r in rows],
+        'time': [t or r['timestamp_utc'] for r, t in zip(rows, local_times)],
+        'lat': [feed.number(r['lat']) for r in rows],
+        'lon': [feed.number(r['lon']) for r in rows],
+        'alt': [feed.number(r['altitude'], 0.0) for r in rows],
+        'speed': [feed.number(r['speed'], 0.0) for r in rows],
+        'track': [feed.number(r['track'], 0.0) for r in rows],
+        'distance': [math.nan if d is None else d for d in distances],
+    }
+
 @api_bp.route('/api/live_flights')
 def live_flights():
-    """Fetch live flights directly from the database (cross-process safe)."""
+    """Fetch live flights directly from the database (cross-process safe).
+
+    Served as JSON keyed by hex, or in a compact columnar/packed format when the
+    Accept header asks for one (see airlogger.feed).
+    """
     minutes = request.args.get('minutes', default=LIVE_DATA_MINUTES, type=int)
-    threshold = (datetime.utcnow() - timedelta(minutes=minutes)).strftime('%Y-%m-%d %H:%M:%S')
+    threshold = int(time.time()) - minutes * 60
+    fmt = feed.choose_format(request.accept_mimetypes)
     
-    flights_by_hex = {}
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            # Get latest position for each aircraft seen in the last X minutes
-            cursor.execute('''
-                SELECT * FROM flights 
-                WHERE timestamp_utc > ? 
-                ORDER BY timestamp_utc DESC
-            ''', (threshold,))
-            
-            for row in cursor.fetchall():
-                hex_code = row['hex'].upper()
-                if hex_code not in flights_by_hex:
-                    dist = calculate_distance(STATION_LAT, STATION_LON, row['lat'], row['lon'])
-                    local_time = convert_to_local(row['timestamp_utc'])
-                    
-                    flights_by_hex[hex_code] = [{
-                        'hex': hex_code,
-                        'callsign': row['callsign'] or "",
-                        'alt': row['altitude'] or 0,
-                        'speed': row['speed'] or 0,
-                        'track': row['track'] or 0,
-                        'lat': row['lat'],
-                        'lon': row['lon'],
-                        'reg': row['registration'] or "",
-                        'model': row['model'] or "",
-                        'operator': row['operator'] or "",
-                        'time': local_time.strftime('%Y-%m-%d %H:%M:%S') if local_time else row['timestamp_utc'],
-                        'distance': round(dist, 1) if dist is not None else None
-                    }]
+        with get_read_connection() as conn:
+            # Latest position for each aircraft seen in the last X minutes
+            rows = conn.execute('''
+                SELECT * FROM flights WHERE id IN (
+                    SELECT max(id) FROM flights WHERE ts > ? GROUP BY upper(hex)
+                )
+                ORDER BY ts DESC
+            ''', (threshold,)).fetchall()
+        latency.record_exposure(rows)
+        distances = _station_distances(rows)
+        local_times = format_local_many([row['ts'] for row in rows])
+
+        if fmt != 'application/json':
+            columns = _live_columns(rows, distances, local_times)
+            body = feed.encode_packed(columns) if fmt == feed.PACKED_MIME else feed.encode_columns(columns)
+            response = Response(body, mimetype=fmt)
+            response.headers['Vary'] = 'Accept'
+            return response
+
+        flights_by_hex = {}
+        for row, dist, local_time in zip(rows, distances, local_times):
+            hex_code = row['hex'].upper()
+            flights_by_hex[hex_code] = [{
+                'hex': hex_code,
+                'callsign': row['callsign'] or "",
+                'alt': row['altitude'] or 0,
+                'speed': row['speed'] or 0,
+                'track': row['track'] or 0,
+                'lat': row['lat'],
+                'lon': row['lon'],
+                'reg': row['registration'] or "",
+                'model': row['model'] or "",
+                'operator': row['operator'] or "",
+                'time': local_time or row['timestamp_utc'],
+                'distance': dist
+            }]
     except Exception as e:
         logger.error(f"Error fetching live flights: {e}")
         return jsonify({"error": str(e)}), 500
         
-    return jsonify(flights_by_hex)
+    response = jsonify(flights_by_hex)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def _parse_utc(value, end_of_day=False):
+    """Parse 'YYYY-MM-DD[ HH:MM[:SS]]' (UTC); a bare date as an end bound means the whole day."""
+    dt = datetime.fromisoformat(value.strip().replace('Z', ''))
+    if end_of_day and len(value.strip()) == 10:
+        dt += timedelta(days=1) - timedelta(seconds=1)
+    return dt
+
+@api_bp.route('/api/area')
+def area():
+    """Aircraft seen inside a bounding box and time range (R*Tree indexed).
+
+    bbox is 'minLon,minLat,maxLon,maxLat' (Leaflet's toBBoxString order); from/to
+    are UTC and default to the last 24 hours.
+    """
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in request.args['bbox'].split(','))
+        to_dt = _parse_utc(request.args['to'], end_of_day=True) if request.args.get('to') else datetime.utcnow()
+        from_dt = _parse_utc(request.args['from']) if request.args.get('from') else to_dt - timedelta(days=1)
+    except (KeyError, ValueError):
+        return jsonify({"error": "expected bbox=minLon,minLat,maxLon,maxLat and optional from/to (YYYY-MM-DD[ HH:MM:SS])"}), 400
+    if min_lon > max_lon or min_lat > max_lat or from_dt > to_dt:
+        return jsonify({"error": "empty bbox or time range"}), 400
+
+    ts_from, ts_to = from_dt.strftime('%Y-%m-%d %H:%M:%S'), to_dt.strftime('%Y-%m-%d %H:%M:%S')
+    params = {'min_lat': min_lat, 'max_lat': max_lat, 'min_lon': min_lon, 'max_lon': max_lon,
+              'ts_from': ts_from, 'ts_to': ts_to}
+    # Exact refinement on the real values; the index only narrows candidates
+    refine = '''
+        f.timestamp_utc BETWEEN :ts_from AND :ts_to
+        AND CAST(f.lat AS REAL) BETWEEN :min_lat AND :max_lat
+        AND CAST(f.lon AS REAL) BETWEEN :min_lon AND :max_lon
+        AND f.lat <> '' AND f.lon <> ''
+    '''
+    select = '''
+        SELECT f.hex, max(f.callsign) AS callsign, max(f.registration) AS registration,
+               max(f.model) AS model, max(f.operator) AS operator,
+               min(f.timestamp_utc) AS first_seen, max(f.timestamp_utc) AS last_seen, count(*) AS points,
+               min(CAST(f.lat AS REAL)) AS min_lat, max(CAST(f.lat AS REAL)) AS max_lat,
+               min(CAST(f.lon AS REAL)) AS min_lon, max(CAST(f.lon AS REAL)) AS max_lon
+    '''
+    try:
+        with get_read_connection() as conn:
+            if has_rtree(conn):
+                # One minute of slack on the float32 time axis
+                params['t_from'] = rtree_time(calendar.timegm(from_dt.timetuple())) - 1
+                params['t_to'] = rtree_time(calendar.timegm(to_dt.timetuple())) + 1
+                rows = conn.execute(select + '''
+                    FROM flights_rtree r JOIN flights f ON f.id = r.id
+                    WHERE r.max_lat >= :min_lat AND r.min_lat <= :max_lat
+                      AND r.max_lon >= :min_lon AND r.min_lon <= :max_lon
+                      AND r.max_t >= :t_from AND r.min_t <= :t_to
+                      AND ''' + refine + '''
+                    GROUP BY f.hex ORDER BY last_seen DESC
+                ''', params).fetchall()
+            else:
+                rows = conn.execute(select + '''
+                    FROM flights f WHERE ''' + refine + '''
+                    GROUP BY f.hex ORDER BY last_seen DESC
+                ''', params).fetchall()
+            # Segments whose bounding box overlaps the area during the time range
+            segments = conn.execute('''
+                SELECT id, hex, callsign, start_utc, end_utc, point_count,
+                       min_lat, max_lat, min_lon, max_lon, max_altitude, max_speed
+                FROM flight_segments
+                WHERE start_utc <= :ts_to AND end_utc >= :ts_from
+                  AND max_lat >= :min_lat AND min_lat <= :max_lat
+                  AND max_lon >= :min_lon AND min_lon <= :max_lon
+                ORDER BY end_utc DESC
+            ''', params).fetchall()
+    except Exception as e:
+        logger.error(f"Error running area query: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({
+        'bbox': [min_lon, min_lat, max_lon, max_lat],
+        'from': ts_from,
+        'to': ts_to,
+        'aircraft': [{
+            'hex': r['hex'],
+            'callsign': r['callsign'] or "",
+            'reg': r['registration'] or "",
+            'model': r['model'] or "",
+            'operator': r['operator'] or "",
+            'first_seen': r['first_seen'],
+            'last_seen': r['last_seen'],
+            'points': r['points'],
+            'bbox': [r['min_lon'], r['min_lat'], r['max_lon'], r['max_lat']],
+        } for r in rows],
+        'segments': [{
+            'id': sg['id'],
+            'hex': sg['hex'],
+            'callsign': sg['callsign'] or "",
+            'start': sg['start_utc'],
+            'end': sg['end_utc'],
+            'points': sg['point_count'],
+            'max_alt': sg['max_altitude'],
+            'max_speed': sg['max_speed'],
+            'bbox': [sg['min_lon'], sg['min_lat'], sg['max_lon'], sg['max_lat']],
+        } for sg in segments],
+    })
+
+@api_bp.route('/api/track/<hex_code>')
+def track(hex_code):
+    """Simplified track of an aircraft, one entry per flight segment.
+
+    `date` is a local date (default: the last 24 hours), `segment` restricts the
+    result to one segment, and `zoom` picks the level of detail (15+ is raw).
+    """
+    hex_code = hex_code.upper()
+    zoom = request.args.get('zoom', default=10, type=int)
+    segment_id = request.args.get('segment', type=int)
+    date = request.args.get('date')
+    try:
+        if date:
+            ts_from, ts_to = local_day_utc_bounds(date)
+        else:
+            ts_to = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+            ts_from = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+
+    try:
+        with get_read_connection() as conn:
+            if segment_id is not None:
+                segments = conn.execute('''
+                    SELECT id, callsign, start_utc, end_utc, point_count FROM flight_segments
+                    WHERE id = ? AND hex = ?
+                ''', (segment_id, hex_code)).fetchall()
+            else:
+                segments = conn.execute('''
+                    SELECT id, callsign, start_utc, end_utc, point_count FROM flight_segments
+                    WHERE hex = ? AND end_utc >= ? AND start_utc <= ?
+                    ORDER BY start_utc
+                ''', (hex_code, ts_from, ts_to)).fetchall()
+            result = [{
+                'id': sg['id'],
+                'callsign': sg['callsign'] or "",
+                'start': sg['start_utc'],
+                'end': sg['end_utc'],
+                'points': sg['point_count'],
+                'coords': segment_coords(conn, sg['id'], sg['point_count'], zoom),
+            } for sg in segments]
+    except Exception as e:
+        logger.error(f"Error loading track for {hex_code}: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify({'hex': hex_code, 'zoom': zoom, 'segments': result})
+
+def _coverage_since():
+    days = max(1, min(request.args.get('days', default=90, type=int), 3650))
+    return days, (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+
+@api_bp.route('/api/coverage')
+def coverage():
+    """Position counts per grid cell over the last `days` days.
+
+    Cells are [lat_idx, lon_idx, count]; a cell spans lat_idx*cell_deg to
+    (lat_idx+1)*cell_deg (likewise for lon).
+    """
+    days, since = _coverage_since()
+    try:
+        with get_read_connection(analytical=True) as conn:
+            cells = conn.execute('''
+                SELECT lat_idx, lon_idx, sum(count) FROM coverage_cells
+                WHERE day >= ? GROUP BY lat_idx, lon_idx
+            ''', (since,)).fetchall()
+    except Exception as e:
+        logger.error(f"Error loading coverage: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        'days': days,
+        'cell_deg': COVERAGE_CELL_DEG,
+        'max': max((c[2] for c in cells), default=0),
+        'cells': [list(c) for c in cells],
+    })
+
+@api_bp.route('/api/coverage/range')
+def coverage_range():
+    """Furthest position (nm) per bearing sector from the station over the last `days` days."""
+    days, since = _coverage_since()
+    bins = int(round(360 / BEARING_BIN_DEG))
+    max_nm = [None] * bins
+    try:
+        with get_read_connection(analytical=True) as conn:
+            for bearing_bin, dist in conn.execute('''
+                SELECT bearing_bin, max(max_nm) FROM range_by_bearing
+                WHERE day >= ? GROUP BY bearing_bin
+            ''', (since,)):
+                if 0 <= bearing_bin < bins:
+                    max_nm[bearing_bin] = dist
+    except Exception as e:
+        logger.error(f"Error loading range by bearing: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        'days': days,
+        'station': [STATION_LAT, STATION_LON],
+        'bin_deg': BEARING_BIN_DEG,
+        'max_nm': max_nm,
+    })
+
+# History point clustering: grid cells of this many screen pixels, capped per response
+HISTORY_CELL_PX = 12
+HISTORY_MAX_POINTS = 20000
+
+@api_bp.route('/api/history_points')
+def history_points():
+    """Positions for a local day, clustered into a screen-sized grid for the map zoom.
+
+    `bbox=minLon,minLat,maxLon,maxLat` limits the result to the visible map. Each
+    point is [lat, lon, count, hex, segment]; hex and segment are only set when a
+    cell holds a single aircraft segment.
+    """
+    date = request.args.get('date', '')
+    zoom = max(0, min(request.args.get('zoom', default=8, type=int), 20))
+    try:
+        day_start, day_end = local_day_epoch_bounds(date)
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    # 0/0 is a receiver placeholder, not a position
+    clauses = ["f.ts >= :start", "f.ts < :end", "f.lat <> ''", "f.lon <> ''",
+               "NOT (CAST(f.lat AS REAL) = 0 AND CAST(f.lon AS REAL) = 0)"]
+    params = {'start': day_start, 'end': day_end}
+    bbox = None
+    if request.args.get('bbox'):
+        try:
+            bbox = min_lon, min_lat, max_lon, max_lat = tuple(float(v) for v in request.args['bbox'].split(','))
+        except ValueError:
+            return jsonify({"error": "bbox must be minLon,minLat,maxLon,maxLat"}), 400
+        clauses += ["CAST(f.lat AS REAL) BETWEEN :min_lat AND :max_lat",
+                    "CAST(f.lon AS REAL) BETWEEN :min_lon AND :max_lon"]
+        params.update(min_lat=min_lat, max_lat=max_lat, min_lon=min_lon, max_lon=max_lon)
+
+    # Degrees per cell: 256 px tiles span 360 degrees of longitude at zoom 0
+    params['cell'] = cell_deg = 360.0 / (256 * 2 ** zoom) * HISTORY_CELL_PX
+    params['limit'] = HISTORY_MAX_POINTS + 1
+    try:
+        with get_read_connection(analytical=True) as conn:
+            source = "flights f"
+            if bbox and has_rtree(conn):
+                # The R*Tree narrows candidates to the box; the clauses above refine exactly
+                source = "flights_rtree r JOIN flights f ON f.id = r.id"
+                clauses += ["r.max_lat >= :min_lat", "r.min_lat <= :max_lat",
+                            "r.max_lon >= :min_lon", "r.min_lon <= :max_lon",
+                            "r.max_t >= :t_from", "r.min_t <= :t_to"]
+                # One minute of slack on the float32 time axis
+                params.update(t_from=rtree_time(day_start) - 1, t_to=rtree_time(day_end) + 1)
+            rows = conn.execute(f'''
+                SELECT avg(CAST(f.lat AS REAL)), avg(CAST(f.lon AS REAL)), count(*),
+                       min(upper(f.hex)), max(upper(f.hex)), min(f.segment_id), max(f.segment_id)
+                FROM {source} WHERE {' AND '.join(clauses)}
+                GROUP BY CAST((CAST(f.lat AS REAL) + 90) / :cell AS INTEGER),
+                         CAST((CAST(f.lon AS REAL) + 180) / :cell AS INTEGER)
+                ORDER BY count(*) DESC
+                LIMIT :limit
+            ''', params).fetchall()
+    except Exception as e:
+        logger.error(f"Error loading history points: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    points = []
+    for lat, lon, count, hex_lo, hex_hi, seg_lo, seg_hi in rows[:HISTORY_MAX_POINTS]:
+        single = hex_lo == hex_hi and seg_lo == seg_hi
+        points.append([round(lat, 5), round(lon, 5), count,
+                       hex_lo if single else None, seg_lo if single else None])
+    return jsonify({
+        'date': date,
+        'zoom': zoom,
+        'cell_deg': cell_deg,
+        'truncated': len(rows) > HISTORY_MAX_POINTS,
+        'points': points,
+    })
 
 @api_bp.route('/api/export_kml/<hex_code>/<date>')
 def export_kml(hex_code, date):
     """Export flight path as KML for Google Earth."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT lat, lon, altitude, callsign, timestamp_utc 
-            FROM flights 
-            WHERE hex = ? AND date(timestamp_utc) = ? 
-            ORDER BY timestamp_utc ASC
-        ''', (hex_code, date))
-        rows = cursor.fetchall()
-        conn.close()
+        with get_read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT lat, lon, altitude, callsign, timestamp_utc 
+                FROM flights 
+                WHERE hex = ? AND date(timestamp_utc) = ? 
+                ORDER BY timestamp_utc ASC
+            ''', (hex_code, date))
+            rows = cursor.fetchall()
 
         if not rows: return "No data found", 404
 
@@ -97,10 +436,20 @@ def export_kml(hex_code, date):
             '      <name>Path</name>',
             '      <LineString><altitudeMode>absolute</altitudeMode><coordinates>'
         ]
-        for r in rows:
-            if r['lat'] and r['lon']:
-                alt_m = (int(float(str(r['altitude']).replace(',',''))) if r['altitude'] else 0) * 0.3048
-                kml.append(f"{r['lon']},{r['lat']},{alt_m}")
+        zoom = request.args.get('zoom', type=int)
+        if zoom is not None and level_for_zoom(zoom) is not None:
+            # Optional level of detail for lighter exports
+            points = [(float(r['lat']), float(r['lon']), float(str(r['altitude'] or 0).replace(',', '')))
+                      for r in rows if r['lat'] and r['lon']]
+            if points:
+                mid_lat = sum(p[0] for p in points) / len(points)
+                for lat, lon, alt in simplify(points, tolerance_for_zoom(zoom, mid_lat)):
+                    kml.append(f"{lon},{lat},{int(alt) * 0.3048}")
+        else:
+            for r in rows:
+                if r['lat'] and r['lon']:
+                    alt_m = (int(float(str(r['altitude']).replace(',',''))) if r['altitude'] else 0) * 0.3048
+                    kml.append(f"{r['lon']},{r['lat']},{alt_m}")
         kml.append('</coordinates></LineString></Placemark></Document></kml>')
         
         return Response("\n".join(kml), mimetype="application/vnd.google-earth.kml+xml",
@@ -120,3 +469,15 @@ def health():
         return jsonify({'healthy': healthy, 'age_seconds': int(age)}), 200 if healthy else 503
     except:
         return jsonify({'healthy': False}), 500
+
+@api_bp.route('/api/latency')
+def ingest_latency():
+    """Rolling ingest stage percentiles: the logger's latest snapshot plus exposure from every worker."""
+    return jsonify(latency.read_snapshots(live=latency.tracker.snapshot()))
+
+@api_bp.route('/metrics')
+def prometheus_metrics():
+    """Dashboard metrics (every worker's) plus the logger's textfile, in Prometheus text format."""
+    extra = metrics.read_textfile(METRICS_FILE) + metrics.read_worker_files('dashboard')
+    body = metrics.render('dashboard', extra, worker=metrics.worker_label())
+    return Response(body, content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,323 @@
+"""Columnar daily archive (alternative to the per-row CSV log).
+
+Each UTC day is a directory ``ARCHIVE_DIR/YYYY-MM-DD/`` with one file per
+column. Numeric columns are raw little-endian arrays (``ts`` int64 epoch
+seconds, ``altitude``/``speed``/``track`` float32, ``lat``/``lon`` float64, NaN
+for missing). String columns are dictionary encoded: ``<col>.bin`` holds uint32
+codes and ``<col>.dict`` the distinct values, one per line.
+
+Rows are buffered and appended in chunks during the day. At rollover the day is
+sealed by writing ``meta.json``. Readers memory-map the column files.
+"""
+import os
+import sys
+import json
+import mmap
+import time
+import array
+import calendar
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from airlogger.config import ARCHIVE_DIR
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; memoryviews are returned instead
+    np = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+NAN = float("nan")
+
+# Column name -> array typecode; "S" marks a dictionary-encoded string column
+COLUMNS = (
+    ("ts", "q"),
+    ("hex", "S"),
+    ("callsign", "S"),
+    ("altitude", "f"),
+    ("speed", "f"),
+    ("track", "f"),
+    ("lat", "d"),
+    ("lon", "d"),
+    ("registration", "S"),
+    ("model", "S"),
+    ("operator", "S"),
+)
+CODE_TYPE = "I"
+_SWAP = sys.byteorder != "little"
+
+
+def _day_dir(day: str, root: str) -> str:
+    return os.path.join(root, day)
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else NAN
+    except ValueError:
+        return NAN
+
+
+def _to_epoch(timestamp_utc: str) -> int:
+    return calendar.timegm(time.strptime(timestamp_utc[:19], "%Y-%m-%d %H:%M:%S"))
+
+
+class DailyArchiveWriter:
+    """Buffered appender for the columnar archive. Not thread-safe (logger thread only)."""
+
+    def __init__(self, root: str = ARCHIVE_DIR, chunk_rows: int = 1024, flush_interval: float = 60.0):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.flush_interval = flush_interval
+        self.day: Optional[str] = None
+        self._buffers: Dict[str, array.array] = {}
+        self._dicts: Dict[str, Dict[str, int]] = {}
+        self._new_values: Dict[str, List[str]] = {}
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        os.makedirs(root, exist_ok=True)
+        self.seal_stale_days()
+
+    def append(self, row) -> None:
+        """Append a flights row (timestamp_utc, hex, callsign, altitude, speed, track, lat, lon, reg, model, operator)."""
+        day = row[0][:10]
+        if day != self.day:
+            self._open_day(day)
+
+        ts = _to_epoch(row[0])
+        values = (ts,) + tuple(row[1:])
+        for (name, typecode), value in zip(COLUMNS, values):
+            if typecode == "S":
+                self._buffers[name].append(self._code(name, value))
+            elif typecode == "q":
+                self._buffers[name].append(value)
+            else:
+                self._buffers[name].append(_to_float(value))
+        self._buffered += 1
+
+        if self._buffered >= self.chunk_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def _code(self, name: str, value) -> int:
+        value = (value or "").replace("\n", " ")
+        codes = self._dicts[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._new_values[name].append(value)
+        return code
+
+    def flush(self) -> None:
+        """Append buffered rows to the column files."""
+        self._last_flush = time.monotonic()
+        if not self._buffered:
+            return
+        path = _day_dir(self.day, self.root)
+        # Dictionaries first, so codes on disk never reference missing values
+        for name, values in self._new_values.items():
+            if values:
+                with open(os.path.join(path, f"{name}.dict"), "a", encoding="utf-8") as f:
+                    f.write("".join(v + "\n" for v in values))
+                values.clear()
+        for name, buf in self._buffers.items():
+            if _SWAP:
+                buf.byteswap()
+            with open(os.path.join(path, f"{name}.bin"), "ab") as f:
+                buf.tofile(f)
+            del buf[:]
+        self._buffered = 0
+
+    def seal(self) -> None:
+        """Flush and mark the current day complete."""
+        if self.day is None:
+            return
+        self.flush()
+        seal_day(self.day, self.root)
+        self.day = None
+
+    def close(self) -> None:
+        """Flush without sealing (the day may continue after a restart)."""
+        if self.day is not None:
+            self.flush()
+
+    def seal_stale_days(self) -> None:
+        """Seal days left open by a previous run (anything before today)."""
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        for day in list_days(self.root, sealed_only=False):
+            if day < today and not os.path.exists(os.path.join(_day_dir(day, self.root), "meta.json")):
+                seal_day(day, self.root)
+
+    def _open_day(self, day: str) -> None:
+        if self.day is not None:
+            self.seal()
+        path = _day_dir(day, self.root)
+        os.makedirs(path, exist_ok=True)
+        rows = _consistent_rows(path)
+        self._buffers = {}
+        self._dicts = {}
+        self._new_values = {}
+        for name, typecode in COLUMNS:
+            self._buffers[name] = array.array(CODE_TYPE if typecode == "S" else typecode)
+            col = os.path.join(path, f"{name}.bin")
+            # Drop a partially written trailing chunk left by a crash
+            if os.path.exists(col) and os.path.getsize(col) > rows * self._buffers[name].itemsize:
+                with open(col, "r+b") as f:
+                    f.truncate(rows * self._buffers[name].itemsize)
+            if typecode == "S":
+                _repair_dict(os.path.join(path, f"{name}.dict"))
+                values = _read_dict(os.path.join(path, f"{name}.dict"))
+                self._dicts[name] = {v: i for i, v in enumerate(values)}
+                self._new_values[name] = []
+        self._buffered = 0
+        self.day = day
+
+
+def _repair_dict(path: str) -> None:
+    """Truncate a torn last value (a crash mid-append) so the next append starts a new line.
+
+    Dictionaries are written before the column files, so no code on disk refers
+    to the torn value.
+    """
+    try:
+        with open(path, "r+b") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+def _read_dict(path: str) -> List[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().split("\n")[:-1]
+    except FileNotFoundError:
+        return []
+
+
+def _consistent_rows(path: str) -> int:
+    """Rows present in every column file (columns can be uneven after a crash)."""
+    counts = []
+    for name, typecode in COLUMNS:
+        itemsize = array.array(CODE_TYPE if typecode == "S" else typecode).itemsize
+        try:
+            counts.append(os.path.getsize(os.path.join(path, f"{name}.bin")) // itemsize)
+        except OSError:
+            counts.append(0)
+    return min(counts)
+
+
+def seal_day(day: str, root: str = ARCHIVE_DIR) -> dict:
+    """Write meta.json for a day directory."""
+    path = _day_dir(day, root)
+    meta = {
+        "version": FORMAT_VERSION,
+        "date": day,
+        "rows": _consistent_rows(path),
+        "byteorder": "little",
+        "columns": {name: ("dict:" + CODE_TYPE if t == "S" else t) for name, t in COLUMNS},
+        "sealed_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+    return meta
+
+
+def list_days(root: str = ARCHIVE_DIR, sealed_only: bool = True) -> List[str]:
+    """Archived days (YYYY-MM-DD), oldest first."""
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    days = []
+    for name in sorted(names):
+        if len(name) == 10 and os.path.isdir(os.path.join(root, name)):
+            if not sealed_only or os.path.exists(os.path.join(root, name, "meta.json")):
+                days.append(name)
+    return days
+
+
+class ArchiveDay:
+    """Memory-mapped, read-only view of one archived day."""
+
+    def __init__(self, day: str, root: str = ARCHIVE_DIR):
+        self.day = day
+        self.path = _day_dir(day, root)
+        if not os.path.isdir(self.path):
+            raise FileNotFoundError(f"No archive for {day}")
+        meta_path = os.path.join(self.path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                self.meta = json.load(f)
+            self.rows = self.meta["rows"]
+        else:
+            self.meta = None
+            self.rows = _consistent_rows(self.path)
+        self._maps = []
+        self._columns = {}
+        self._dicts = {}
+
+    def column(self, name: str):
+        """Raw column values: numpy array if available, else a memoryview (codes for string columns)."""
+        if name not in self._columns:
+            typecode = dict(COLUMNS)[name]
+            typecode = CODE_TYPE if typecode == "S" else typecode
+            self._columns[name] = self._map(name, typecode)
+        return self._columns[name]
+
+    def strings(self, name: str) -> List[str]:
+        """Decoded values of a dictionary-encoded string column."""
+        values = self.dictionary(name)
+        return [values[c] for c in self.column(name)]
+
+    def dictionary(self, name: str) -> List[str]:
+        if name not in self._dicts:
+            self._dicts[name] = _read_dict(os.path.join(self.path, f"{name}.dict"))
+        return self._dicts[name]
+
+    def iter_rows(self):
+        """Yield rows as dicts (convenient, but slower than column access)."""
+        cols = {name: (self.strings(name) if t == "S" else self.column(name)) for name, t in COLUMNS}
+        for i in range(self.rows):
+            yield {name: cols[name][i] for name, _ in COLUMNS}
+
+    def _map(self, name: str, typecode: str):
+        itemsize = array.array(typecode).itemsize
+        size = self.rows * itemsize
+        if size == 0:
+            return np.empty(0, dtype=typecode) if np is not None else memoryview(array.array(typecode))
+        with open(os.path.join(self.path, f"{name}.bin"), "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mm)
+        if np is not None:
+            return np.frombuffer(mm, dtype=np.dtype(typecode).newbyteorder("<"), count=self.rows)
+        if _SWAP:
+            data = array.array(typecode, mm[:size])
+            data.byteswap()
+            return memoryview(data)
+        return memoryview(mm)[:size].cast(typecode)
+
+    def close(self) -> None:
+        self._columns.clear()
+        for mm in self._maps:
+            try:
+                mm.close()
+            except BufferError:
+                pass  # a caller still holds a view; the map is released with it
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def load_day(day: str, root: str = ARCHIVE_DIR) -> ArchiveDay:
+    """Open an archived day for reading."""
+    return ArchiveDay(day, root)
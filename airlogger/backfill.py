@@ -0,0 +1,151 @@
+"""Backfill missing registration/model/operator on historical flight rows.
+
+Hexes with incomplete rows are resolved in batches, first from the in-memory
+metadata cache, then from what other rows in the database already know about
+the hex (the offline registry), and only then from the network. Progress is
+checkpointed to a state file so an interrupted run resumes where it stopped.
+"""
+import os
+import json
+import time
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from airlogger.config import LOG_DIR
+from airlogger.db import get_db_connection
+from airlogger.metadata import fetch_metadata, merge_results, metadata_cache
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = os.path.join(LOG_DIR, "backfill_state.json")
+
+_MISSING = ("(COALESCE(registration, '') = '' OR COALESCE(model, '') = '' "
+            "OR COALESCE(operator, '') = '')")
+
+
+def find_incomplete_hexes(conn, since: str, after: str = "") -> List[str]:
+    """Return hexes (sorted) that have rows since `since` with blank metadata."""
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT DISTINCT hex FROM flights
+        WHERE timestamp_utc >= ? AND hex > ? AND {_MISSING}
+        ORDER BY hex
+    ''', (since, after))
+    return [row[0] for row in cursor.fetchall() if row[0]]
+
+
+def known_metadata(conn, hexes: List[str]) -> Dict[str, Tuple[str, str, str, str]]:
+    """Best values already stored for each hex (longest non-empty value per field)."""
+    known: Dict[str, List[str]] = {}
+    if not hexes:
+        return {}
+    placeholders = ",".join("?" for _ in hexes)
+    cursor = conn.cursor()
+    cursor.execute(f'''
+        SELECT DISTINCT hex, registration, model, operator, callsign FROM flights
+        WHERE hex IN ({placeholders})
+    ''', hexes)
+    for row in cursor.fetchall():
+        best = known.setdefault(row[0], ["", "", "", ""])
+        for i, value in enumerate(row[1:]):
+            value = (value or "").strip()
+            if len(value) > len(best[i]):
+                best[i] = value
+    return {h: tuple(v) for h, v in known.items()}
+
+
+def _complete(result: Optional[Tuple[str, ...]]) -> bool:
+    return bool(result) and all(result[:3])
+
+
+def resolve_batch(conn, hexes: List[str], offline: bool = False,
+                  lookup_interval: float = 0.0) -> Dict[str, Tuple[str, str, str, str]]:
+    """Resolve metadata for hexes via cache, offline registry, then network."""
+    known = known_metadata(conn, hexes)
+    resolved = {}
+    for hex_code in hexes:
+        result = merge_results([metadata_cache.peek(hex_code.lower()), known.get(hex_code)])
+        if not _complete(result) and not offline:
+            remote = fetch_metadata(hex_code)
+            result = merge_results([result, remote if any(remote) else None])
+            if lookup_interval:
+                time.sleep(lookup_interval)
+        if result and any(result[:3]):
+            resolved[hex_code] = result
+    return resolved
+
+
+def write_back(conn, resolved: Dict[str, Tuple[str, str, str, str]], since: str) -> int:
+    """Fill blank fields for the resolved hexes with one batched UPDATE."""
+    params = [(reg, model, operator, hex_code, since)
+              for hex_code, (reg, model, operator, _callsign) in resolved.items()]
+    if not params:
+        return 0
+    cursor = conn.cursor()
+    cursor.executemany(f'''
+        UPDATE flights SET
+            registration = CASE WHEN COALESCE(registration, '') = '' THEN ? ELSE registration END,
+            model = CASE WHEN COALESCE(model, '') = '' THEN ? ELSE model END,
+            operator = CASE WHEN COALESCE(operator, '') = '' THEN ? ELSE operator END
+        WHERE hex = ? AND timestamp_utc >= ? AND {_MISSING}
+    ''', params)
+    conn.commit()
+    return cursor.rowcount
+
+
+def load_state(since: str, state_file: str = STATE_FILE) -> dict:
+    """Load the checkpoint for `since`, or a fresh one."""
+    try:
+        with open(state_file, "r") as f:
+            state = json.load(f)
+        if state.get("since") == since and not state.get("done"):
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"since": since, "last_hex": "", "hexes": 0, "resolved": 0, "rows_updated": 0}
+
+
+def save_state(state: dict, state_file: str = STATE_FILE) -> None:
+    tmp = state_file + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, state_file)
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def backfill_metadata(since: str, batch_size: int = 50, pause: float = 1.0,
+                      lookups_per_minute: float = 60, offline: bool = False,
+                      restart: bool = False, state_file: str = STATE_FILE) -> dict:
+    """Run (or resume) a backfill for rows with timestamp_utc >= `since`."""
+    state = {"since": since, "last_hex": "", "hexes": 0, "resolved": 0, "rows_updated": 0}
+    if not restart:
+        state = load_state(since, state_file)
+    lookup_interval = 60.0 / lookups_per_minute if lookups_per_minute > 0 else 0.0
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+
+    with get_db_connection() as conn:
+        hexes = find_incomplete_hexes(conn, since, state["last_hex"])
+        logger.info(f"Backfill since {since}: {len(hexes)} hexes with missing metadata"
+                    + (f" (resuming after {state['last_hex']})" if state["last_hex"] else ""))
+
+        for batch in _chunks(hexes, batch_size):
+            resolved = resolve_batch(conn, batch, offline, lookup_interval)
+            updated = write_back(conn, resolved, since)
+
+            state["last_hex"] = batch[-1]
+            state["hexes"] += len(batch)
+            state["resolved"] += len(resolved)
+            state["rows_updated"] += max(updated, 0)
+            save_state(state, state_file)
+            logger.info(f"  {state['hexes']} hexes checked, {state['resolved']} resolved, "
+                        f"{state['rows_updated']} rows updated")
+            if pause:
+                time.sleep(pause)
+
+    state["done"] = True
+    save_state(state, state_file)
+    return state
@@ -0,0 +1,207 @@
+"""Bounded in-memory caches used by the metadata lookup path."""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class NegativeCache:
+    """Remember failed lookups with per-key exponential backoff.
+
+    Each key keeps its own attempt count, so its retry interval only depends on
+    how often *that* key has failed. Expiry is driven by a min-heap ordered by
+    the time an entry may be forgotten, giving O(log n) inserts and purges, and
+    the number of tracked keys never exceeds ``max_entries``.
+    """
+
+    def __init__(self, max_entries: int = 10000, base_delay: float = 60.0,
+                 max_delay: float = 3600.0, clock=time.time):
+        self.max_entries = max_entries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        # key -> [retry_at, forget_at, attempts]
+        self._entries: Dict[str, List[float]] = {}
+        # (forget_at, key); superseded items are skipped lazily on pop
+        self._heap: List[Tuple[float, str]] = []
+        # The metadata refresh worker and the ingest thread share one instance
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def attempts(self, key: str) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            return int(entry[2]) if entry else 0
+
+    def retry_at(self, key: str) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def should_retry(self, key: str) -> bool:
+        """Return True if the key has never failed or its backoff has elapsed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is None or self._clock() >= entry[0]
+
+    def record_failure(self, key: str) -> float:
+        """Register a failed lookup and return the delay until the next retry."""
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(key)
+            attempts = entry[2] + 1 if entry else 1
+            delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+            # Keep the attempt count around for one full max interval after the
+            # retry becomes due, so a hex that keeps failing keeps backing off.
+            forget_at = now + delay + self.max_delay
+            self._entries[key] = [now + delay, forget_at, attempts]
+            heapq.heappush(self._heap, (forget_at, key))
+
+            self._purge(now)
+            while len(self._entries) > self.max_entries:
+                self._pop_oldest()
+            if len(self._heap) > 2 * self.max_entries:
+                self._compact()
+            return delay
+
+    def forget(self, key: str) -> None:
+        """Drop a key, e.g. after a successful lookup."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Remove entries whose forget time has passed. Returns the count removed."""
+        with self._lock:
+            return self._purge(self._clock() if now is None else now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+
+    # The helpers below expect the caller to hold self._lock
+
+    def _purge(self, now: float) -> int:
+        removed = 0
+        while self._heap and self._heap[0][0] <= now:
+            if self._pop_oldest():
+                removed += 1
+        return removed
+
+    def _pop_oldest(self) -> bool:
+        """Pop the heap head, deleting its entry if the heap item is current."""
+        forget_at, key = heapq.heappop(self._heap)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] == forget_at:
+            del self._entries[key]
+            return True
+        return False
+
+    def _compact(self) -> None:
+        """Rebuild the heap without superseded items."""
+        self._heap = [(entry[1], key) for key, entry in self._entries.items()]
+        heapq.heapify(self._heap)
+
+
+class _Entry:
+    """Compact cache record; ``result`` is returned as-is on every hit."""
+    __slots__ = ("result", "fetched_at")
+
+    def __init__(self, result: tuple, fetched_at: float):
+        self.result = result
+        self.fetched_at = fetched_at
+
+
+class MetadataCache:
+    """Size-bounded LRU with stale-while-revalidate semantics.
+
+    Entries younger than ``ttl`` are fresh. Older entries are still returned
+    (up to ``max_stale`` seconds past the TTL) and ``on_stale(key)`` is called so
+    the owner can refresh them in the background. A hit returns the stored
+    result tuple and only touches counters and the LRU order.
+    """
+
+    def __init__(self, max_entries: int = 20000, ttl: float = 86400,
+                 max_stale: float = 0, on_stale=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.on_stale = on_stale
+        self._clock = clock
+        self._data: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Return the cached result for key, or None on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            age = self._clock() - entry.fetched_at
+            if age < self.ttl:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry.result
+            if age >= self.ttl + self.max_stale:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.stale_hits += 1
+        if self.on_stale is not None:
+            self.on_stale(key)
+        return entry.result
+
+    def put(self, key: str, result: tuple) -> None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._data[key] = _Entry(result, self._clock())
+                while len(self._data) > self.max_entries:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            else:
+                entry.result = result
+                entry.fetched_at = self._clock()
+                self._data.move_to_end(key)
+
+    def peek(self, key: str) -> Optional[tuple]:
+        """Return the stored result without touching counters, LRU order or freshness."""
+        entry = self._data.get(key)
+        return entry.result if entry is not None else None
+
+    def pop(self, key: str, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry.result if entry is not None else default
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.stale_hits = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+        }
@@ -18,13 +18,63 @@ TIMEZONE = os.getenv("AIRLOGGER_TZ", os.getenv("TZ", ""))
 METADATA_URL = os.getenv(
     "AIRLOGGER_METADATA_URL", "https://api.adsb.lol/v2/icao/{hex}"
 )
+# Provider chain (comma separated, in priority order): adsb_lol, opensky
+METADATA_PROVIDERS = os.getenv("AIRLOGGER_METADATA_PROVIDERS", "adsb_lol,opensky")
+OPENSKY_METADATA_URL = os.getenv(
+    "AIRLOGGER_OPENSKY_METADATA_URL", "https://opensky-network.org/api/metadata/aircraft/icao/{hex}"
+)
+METADATA_TIMEOUT = float(os.getenv("AIRLOGGER_METADATA_TIMEOUT", "3"))
+# Hedge to the next provider when the current one is slower than its p90
+METADATA_HEDGE = os.getenv("AIRLOGGER_METADATA_HEDGE", "true").lower() in ("1", "true", "yes")
+HEDGE_MIN_SAMPLES = int(os.getenv("AIRLOGGER_HEDGE_MIN_SAMPLES", "20"))
+PROVIDER_ERROR_THRESHOLD = float(os.getenv("AIRLOGGER_PROVIDER_ERROR_THRESHOLD", "0.5"))
 CACHE_TTL = int(os.getenv("AIRLOGGER_CACHE_TTL", "86400"))
+# Max metadata entries kept in memory, and how long past CACHE_TTL a stale
+# entry may still be served while it is refreshed in the background (0 disables)
+CACHE_MAX_ENTRIES = int(os.getenv("AIRLOGGER_CACHE_MAX_ENTRIES", "20000"))
+CACHE_MAX_STALE = int(os.getenv("AIRLOGGER_CACHE_MAX_STALE", str(7 * 86400)))
 MAX_RETRIES = int(os.getenv("AIRLOGGER_MAX_RETRIES", "3"))
 BACKOFF_BASE = float(os.getenv("AIRLOGGER_BACKOFF_BASE", "0.5"))
+# Negative cache for failed lookups: max tracked hexes and per-hex retry backoff (seconds)
+FAILED_CACHE_SIZE = int(os.getenv("AIRLOGGER_FAILED_CACHE_SIZE", "10000"))
+FAILED_RETRY_BASE = float(os.getenv("AIRLOGGER_FAILED_RETRY_BASE", "60"))
+FAILED_RETRY_MAX = float(os.getenv("AIRLOGGER_FAILED_RETRY_MAX", "3600"))
 # Station Location (for distance tracking)
 STATION_LAT = float(os.getenv("AIRLOGGER_STATION_LAT", "0.0"))
 STATION_LON = float(os.getenv("AIRLOGGER_STATION_LON", "0.0"))
 OPERATORS_FILE = os.path.expanduser("~/.opensky_operators.json")
+# Coverage aggregates (run `manage.py rebuild-coverage` after changing the grid)
+COVERAGE_CELL_DEG = float(os.getenv("AIRLOGGER_COVERAGE_CELL_DEG", "0.05"))
+BEARING_BIN_DEG = float(os.getenv("AIRLOGGER_BEARING_BIN_DEG", "5"))
+# Positions further than this from the station are treated as bad decodes
+MAX_RANGE_NM = float(os.getenv("AIRLOGGER_MAX_RANGE_NM", "400"))
+
+# SQLite tuning for dashboard readers
+DB_READ_POOL_SIZE = int(os.getenv("AIRLOGGER_DB_READ_POOL_SIZE", "8"))
+DB_MMAP_SIZE = int(os.getenv("AIRLOGGER_DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("AIRLOGGER_DB_CACHE_SIZE_KB", "8192"))
+DB_BUSY_TIMEOUT = float(os.getenv("AIRLOGGER_DB_BUSY_TIMEOUT", "5"))
+
+# Optional read replica for heavy dashboard/email queries (interval 0 = disabled)
+REPLICA_INTERVAL = int(os.getenv("AIRLOGGER_REPLICA_INTERVAL", "0"))
+REPLICA_PATH = os.getenv("AIRLOGGER_REPLICA_PATH", "")
+# Fall back to the main database if the snapshot is older than this (seconds)
+REPLICA_MAX_AGE = int(os.getenv("AIRLOGGER_REPLICA_MAX_AGE", str(max(300, 5 * REPLICA_INTERVAL))))
+
+# Daily log archive: "csv" (one row per line) or "columnar" (typed column files)
+ARCHIVE_FORMAT = os.getenv("AIRLOGGER_ARCHIVE", "csv").lower()
+ARCHIVE_DIR = os.getenv("AIRLOGGER_ARCHIVE_DIR", os.path.join(LOG_DIR, "archive"))
+
+# Crash-safe ingest journal (rows are journaled, then applied to SQLite in batches)
+JOURNAL_ENABLED = os.getenv("AIRLOGGER_JOURNAL", "true").lower() in ("1", "true", "yes")
+JOURNAL_DIR = os.getenv("AIRLOGGER_JOURNAL_DIR", os.path.join(LOG_DIR, "journal"))
+JOURNAL_FLUSH_EVERY = int(os.getenv("AIRLOGGER_JOURNAL_FLUSH_EVERY", "64"))
+JOURNAL_FLUSH_INTERVAL = float(os.getenv("AIRLOGGER_JOURNAL_FLUSH_INTERVAL", "1.0"))
+JOURNAL_APPLY_INTERVAL = float(os.getenv("AIRLOGGER_JOURNAL_APPLY_INTERVAL", "1.0"))
+JOURNAL_MAX_BYTES = int(os.getenv("AIRLOGGER_JOURNAL_MAX_BYTES", str(8 * 1024 * 1024)))
+
+# A sighting is split into a new flight segment after this many seconds without positions
+SEGMENT_GAP = int(os.getenv("AIRLOGGER_SEGMENT_GAP", str(20 * 60)))
 
 # Connection / Socket
 DUMP1090_HOST = os.getenv("AIRLOGGER_DUMP1090_HOST", "localhost")
@@ -38,11 +88,39 @@ LOG_THROTTLE_SECONDS = int(os.getenv("AIRLOGGER_LOG_THROTTLE", "30"))
 HEARTBEAT_INTERVAL = int(os.getenv("AIRLOGGER_HEARTBEAT_INTERVAL", "30"))
 HEARTBEAT_FILE = os.path.join(LOG_DIR, "heartbeat.json")
 HEALTH_THRESHOLD = int(os.getenv("AIRLOGGER_HEALTH_THRESHOLD", "600"))  # seconds
+# Prometheus textfile the logger rewrites on every heartbeat; merged into the dashboard's /metrics
+METRICS_FILE = os.getenv("AIRLOGGER_METRICS_FILE", os.path.join(LOG_DIR, "metrics_logger.prom"))
+# Ingest latency tracing: rolling window per stage, slow-stage thresholds ("stage=ms,...")
+LATENCY_FILE = os.getenv("AIRLOGGER_LATENCY_FILE", os.path.join(LOG_DIR, "latency.json"))
+LATENCY_DASHBOARD_FILE = os.path.join(os.path.dirname(LATENCY_FILE), "latency_dashboard.json")
+LATENCY_WINDOW = int(os.getenv("AIRLOGGER_LATENCY_WINDOW", "2048"))
+LATENCY_SLOW_MS = os.getenv("AIRLOGGER_LATENCY_SLOW_MS",
+                            "parse=50,metadata=2000,commit=5000,ingest=8000,exposure=15000")
+LATENCY_LOG_INTERVAL = int(os.getenv("AIRLOGGER_LATENCY_LOG_INTERVAL", "60"))  # seconds between slow-stage logs
+# On-demand profiling (SIGUSR1 or POST /admin/profile); reports go to PROFILE_DIR
+PROFILE_DIR = os.getenv("AIRLOGGER_PROFILE_DIR", os.path.join(LOG_DIR, "profiles"))
+PROFILE_SECONDS = int(os.getenv("AIRLOGGER_PROFILE_SECONDS", "30"))
+PROFILE_INTERVAL_MS = float(os.getenv("AIRLOGGER_PROFILE_INTERVAL_MS", "5"))
+PROFILE_TRACEMALLOC = os.getenv("AIRLOGGER_PROFILE_TRACEMALLOC", "true").lower() in ("1", "true", "yes")
+PROFILE_KEEP = int(os.getenv("AIRLOGGER_PROFILE_KEEP", "50"))  # newest report files kept
+# Dashboard requests slower than this are cProfiled and reported (0 = off)
+PROFILE_SLOW_REQUEST_MS = int(os.getenv("AIRLOGGER_PROFILE_SLOW_MS", "0"))
+# SQL statement timing: per-shape stats written per process to SQL_STATS_DIR (default:
+# query_stats/ next to the database), slow statements logged with their EXPLAIN QUERY PLAN
+SQL_TIMING = os.getenv("AIRLOGGER_SQL_TIMING", "true").lower() in ("1", "true", "yes")
+SQL_SLOW_MS = int(os.getenv("AIRLOGGER_SQL_SLOW_MS", "250"))
+SQL_STATS_DIR = os.getenv("AIRLOGGER_SQL_STATS_DIR", "")
+SQL_STATS_INTERVAL = int(os.getenv("AIRLOGGER_SQL_STATS_INTERVAL", "30"))  # seconds between stats file writes
 
 # Dashboard
 DASHBOARD_HOST = os.getenv("AIRLOGGER_DASHBOARD_HOST", "0.0.0.0")
 DASHBOARD_PORT = int(os.getenv("AIRLOGGER_DASHBOARD_PORT", "5000"))
 LIVE_DATA_MINUTES = int(os.getenv("AIRLOGGER_LIVE_MINUTES", "15"))
+# Production server (manage.py serve): backend is auto|gunicorn|waitress|werkzeug
+DASHBOARD_SERVER = os.getenv("AIRLOGGER_DASHBOARD_SERVER", "auto")
+DASHBOARD_WORKERS = int(os.getenv("AIRLOGGER_DASHBOARD_WORKERS", "2"))
+DASHBOARD_THREADS = int(os.getenv("AIRLOGGER_DASHBOARD_THREADS", "4"))
+DASHBOARD_TIMEOUT = int(os.getenv("AIRLOGGER_DASHBOARD_TIMEOUT", "60"))
 VERSION = "1.3.8"
 
 # SMTP / email settings
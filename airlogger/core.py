@@ -7,21 +7,40 @@ import gzip
 import shutil
 from datetime import datetime, timedelta
 from collections import defaultdict
-from airlogger.db import init_db, insert_flight
+from airlogger.db import init_db, insert_flight, update_live_registry
 from airlogger.metadata import fetch_metadata
 from airlogger.config import (
     LOG_DIR, LOG_THROTTLE_SECONDS, SOCKET_TIMEOUT, 
     CONNECTION_RETRY_DELAY, MAX_RETRY_DELAY, HEARTBEAT_INTERVAL,
-    HEARTBEAT_FILE, DUMP1090_HOST, DUMP1090_PORT
+    HEARTBEAT_FILE, DUMP1090_HOST, DUMP1090_PORT, ARCHIVE_FORMAT, ARCHIVE_DIR
 )
+from airlogger.archive import DailyArchiveWriter, list_days
+from airlogger import metrics
+from airlogger.latency import tracker as latency
 
 logger = logging.getLogger(__name__)
 
+LINES_READ = metrics.counter("airlogger_lines_read_total", "SBS lines read from dump1090")
+LINES_PARSED = metrics.counter("airlogger_lines_parsed_total", "SBS lines that parsed into an aircraft message")
+LINES_DROPPED = metrics.counter("airlogger_lines_dropped_total", "SBS lines skipped by the parser")
+ROWS_LOGGED = metrics.counter("airlogger_rows_logged_total",
+                              "Aircraft rows accepted after throttling and de-duplication")
+
 # Global state for the logger
 last_logged_times = defaultdict(lambda: 0)
 last_logged_data = {}
 current_log_handle = None
+current_log_writer = None
 current_log_date = None
+# Columnar archive writer (AIRLOGGER_ARCHIVE=columnar), created on first use
+archive_writer = None
+# Ingest journal; when set, rows are journaled and applied to SQLite in batches
+_journal = None
+
+def set_journal(journal):
+    """Route inserts through an IngestJournal (None writes to SQLite directly)."""
+    global _journal
+    _journal = journal
 
 def get_today_log_path():
     filename = f"aircraft_log_{datetime.utcnow().date()}.csv"
@@ -29,7 +48,7 @@ def get_today_log_path():
 
 def ensure_log_file():
     """Ensure log file exists and is open, reopening if date changed"""
-    global current_log_handle, current_log_date
+    global current_log_handle, current_log_writer, current_log_date
     
     today = datetime.utcnow().date()
     path = get_today_log_path()
@@ -48,10 +67,27 @@ def ensure_log_file():
                 writer.writerow(['Time UTC', 'Hex', 'Callsign', 'Altitude', 'Speed', 'Latitude', 'Longitude', 'Registration', 'Model', 'Operator'])
         
         current_log_handle = open(path, 'a', newline='', buffering=1)
+        current_log_writer = csv.writer(current_log_handle)
         current_log_date = today
     
     return current_log_handle
 
+def get_archive_writer():
+    """Return the columnar archive writer, creating it on first use."""
+    global archive_writer
+    if archive_writer is None:
+        archive_writer = DailyArchiveWriter(ARCHIVE_DIR)
+    return archive_writer
+
+def close_log_outputs():
+    """Flush the archive writer and close the CSV log (call on shutdown)."""
+    global current_log_handle
+    if archive_writer is not None:
+        archive_writer.close()
+    if current_log_handle:
+        current_log_handle.close()
+        current_log_handle = None
+
 def parse_message(message):
     """Parse BaseStation port 30003 format messages."""
     try:
@@ -75,8 +111,12 @@ def parse_message(message):
         logger.debug(f"Failed to parse message: {e}")
         return None
 
-def log_aircraft(data):
-    """Process and log aircraft data to SQLite and CSV."""
+def log_aircraft(data, received=None):
+    """Process and log aircraft data to SQLite and CSV.
+
+    ``received`` is the wall-clock time the line was read; when given, the
+    accepted message's stage latencies are traced (see airlogger.latency).
+    """
     hex_code = data[0]
     now = time.time()
 
@@ -84,6 +124,7 @@ def log_aircraft(data):
         return
 
     reg, model, operator, meta_callsign = fetch_metadata(hex_code)
+    resolved = time.time()
     parsed_callsign = (data[1] or '').strip()
     callsign = parsed_callsign if parsed_callsign else meta_callsign
 
@@ -99,11 +140,25 @@ def log_aircraft(data):
     timestamp = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
     
     try:
-        insert_flight(timestamp, hex_code, callsign, altitude, speed, track, lat, lon, reg, model, operator)
+        row = (timestamp, hex_code, callsign, altitude, speed, track, lat, lon, reg, model, operator)
+        if _journal is not None:
+            _journal.append(row)
+            update_live_registry(*row)
+            if received is not None:
+                latency.queued(hex_code, received, resolved)
+        else:
+            insert_flight(*row)
+            if received is not None:
+                latency.committed(hex_code, received, resolved)
+        if received is not None:
+            latency.accepted(hex_code, received, now, resolved)
         
-        log_handle = ensure_log_file()
-        writer = csv.writer(log_handle)
-        writer.writerow([timestamp, hex_code, callsign, altitude, speed, lat, lon, reg, model, operator])
+        if ARCHIVE_FORMAT == 'columnar':
+            get_archive_writer().append(row)
+        else:
+            ensure_log_file()
+            current_log_writer.writerow([timestamp, hex_code, callsign, altitude, speed, lat, lon, reg, model, operator])
+        ROWS_LOGGED.inc()
         logger.debug(f"Logged aircraft: {hex_code}")
     except Exception as e:
         logger.error(f"Failed to log aircraft {hex_code}: {e}")
@@ -141,6 +196,15 @@ def cleanup_old_logs(retention_days=30):
         except Exception as e:
             logger.error(f"Error processing log file {filename}: {e}")
 
+    # Columnar archive days are already compact; only enforce retention
+    for day in list_days(ARCHIVE_DIR, sealed_only=False):
+        try:
+            if datetime.strptime(day, '%Y-%m-%d').date() < cutoff_date:
+                shutil.rmtree(os.path.join(ARCHIVE_DIR, day))
+                logger.info(f"Deleted old archive day: {day}")
+        except Exception as e:
+            logger.error(f"Error processing archive day {day}: {e}")
+
 def create_socket():
     """Create a socket connection to dump1090."""
     sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
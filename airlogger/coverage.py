@@ -0,0 +1,102 @@
+"""Incrementally maintained reception coverage aggregates.
+
+``coverage_cells`` counts positions per day in a lat/lon grid of
+``COVERAGE_CELL_DEG`` degrees, and ``range_by_bearing`` keeps the furthest
+position per day in each ``BEARING_BIN_DEG`` sector around the station. Both
+are updated from new ``flights`` rows (tracked by id in ``coverage_state``),
+so coverage maps over many days are read from a few thousand aggregate rows.
+"""
+import math
+import logging
+from collections import Counter
+
+from airlogger import geo
+from airlogger.db import get_write_connection
+from airlogger.config import STATION_LAT, STATION_LON, COVERAGE_CELL_DEG, BEARING_BIN_DEG, MAX_RANGE_NM
+
+logger = logging.getLogger(__name__)
+
+
+def station_configured() -> bool:
+    return not (STATION_LAT == 0 and STATION_LON == 0)
+
+
+def _plausible(lat: float, lon: float) -> bool:
+    return -90 <= lat <= 90 and -180 <= lon <= 180 and not (lat == 0 and lon == 0)
+
+
+def _filter_positions(days, lats, lons):
+    """Drop missing, (0, 0) and out-of-range positions; NaN fails every comparison."""
+    if geo.np is None:
+        keep = [i for i, (la, lo) in enumerate(zip(lats, lons)) if _plausible(la, lo)]
+        return [days[i] for i in keep], [lats[i] for i in keep], [lons[i] for i in keep]
+    with geo.np.errstate(invalid='ignore'):
+        mask = (abs(lats) <= 90) & (abs(lons) <= 180) & ~((lats == 0) & (lons == 0))
+    keep = geo.np.flatnonzero(mask)
+    return [days[i] for i in keep], lats[keep], lons[keep]
+
+
+def _floor_div(values, step: float) -> list:
+    if geo.np is None:
+        return [math.floor(v / step) for v in values]
+    return geo.np.floor(values / step).astype(int).tolist()
+
+
+def _aggregate(days, lats, lons, cell_deg: float, bin_deg: float):
+    """Per-(day, cell) counts and per-(day, bearing bin) max range for one batch of positions."""
+    cells = Counter()
+    ranges = {}
+    days, lats, lons = _filter_positions(days, lats, lons)
+    if not days:
+        return cells, ranges
+    cells.update(zip(days, _floor_div(lats, cell_deg), _floor_div(lons, cell_deg)))
+    if station_configured():
+        dists = geo.distances_nm(STATION_LAT, STATION_LON, lats, lons)
+        bins = _floor_div(geo.bearings_deg(STATION_LAT, STATION_LON, lats, lons), bin_deg)
+        for day, dist, b in zip(days, list(dists), bins):
+            if dist > MAX_RANGE_NM:
+                continue  # implausible decode
+            if dist > ranges.get((day, b), -1.0):
+                ranges[(day, b)] = float(dist)
+    return cells, ranges
+
+
+def update_coverage(batch_size: int = 20000) -> int:
+    """Fold unprocessed flights into the coverage aggregates. Returns rows processed."""
+    processed = 0
+    with get_write_connection() as conn:
+        while True:
+            row = conn.execute("SELECT last_flight_id FROM coverage_state WHERE id = 1").fetchone()
+            last_id = row[0] if row else 0
+            rows = conn.execute('''
+                SELECT id, substr(timestamp_utc, 1, 10),
+                       CAST(NULLIF(lat, '') AS REAL), CAST(NULLIF(lon, '') AS REAL)
+                FROM flights WHERE id > ? ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            lats, lons = geo.float_columns(rows, 2, 3)
+            cells, ranges = _aggregate([r[1] or "" for r in rows], lats, lons, COVERAGE_CELL_DEG, BEARING_BIN_DEG)
+            conn.executemany('''
+                INSERT INTO coverage_cells (day, lat_idx, lon_idx, count) VALUES (?, ?, ?, ?)
+                ON CONFLICT (day, lat_idx, lon_idx) DO UPDATE SET count = count + excluded.count
+            ''', [(day, la, lo, n) for (day, la, lo), n in cells.items()])
+            conn.executemany('''
+                INSERT INTO range_by_bearing (day, bearing_bin, max_nm) VALUES (?, ?, ?)
+                ON CONFLICT (day, bearing_bin) DO UPDATE SET max_nm = max(max_nm, excluded.max_nm)
+            ''', [(day, b, round(d, 2)) for (day, b), d in ranges.items()])
+            conn.execute("INSERT OR REPLACE INTO coverage_state (id, last_flight_id) VALUES (1, ?)", (rows[-1][0],))
+            conn.commit()
+            processed += len(rows)
+            if len(rows) < batch_size:
+                break
+    return processed
+
+
+def reset_coverage() -> None:
+    """Clear the aggregates so the next update rebuilds them from all flights."""
+    with get_write_connection() as conn:
+        conn.execute("DELETE FROM coverage_cells")
+        conn.execute("DELETE FROM range_by_bearing")
+        conn.execute("DELETE FROM coverage_state")
+        conn.commit()
@@ -1,17 +1,64 @@
 import sqlite3
 import os
 import logging
+import threading
 import time
-from datetime import datetime, timedelta
+from urllib.request import pathname2url
 from contextlib import contextmanager
+from airlogger import metrics
+from airlogger.querystats import TimedConnection
+from airlogger.utils import utc_epoch
+from airlogger.config import (
+    DB_READ_POOL_SIZE, DB_MMAP_SIZE, DB_CACHE_SIZE_KB, DB_BUSY_TIMEOUT,
+    REPLICA_PATH, REPLICA_INTERVAL, REPLICA_MAX_AGE, SQL_TIMING,
+)
 
 logger = logging.getLogger(__name__)
 DB_PATH = os.path.expanduser('~/aircraft-logger/logs/aircraft.db')
+# Connections time every statement (airlogger.querystats) unless AIRLOGGER_SQL_TIMING=false
+CONNECTION_FACTORY = TimedConnection if SQL_TIMING else sqlite3.Connection
+
+ROWS_WRITTEN = metrics.counter("airlogger_db_rows_written_total",
+                               "Flight rows committed to SQLite", ("source",))
+COMMIT_SECONDS = metrics.histogram("airlogger_db_commit_seconds",
+                                   "Time to insert and commit one batch of flight rows", ("source",))
 
 # In-memory shared registry for live dashboard performance
 _live_registry = {}
 _last_registry_cleanup = 0
 
+# Idle read-only connections, keyed by (pid, path, inode) so forked workers never
+# share one and connections to a replaced replica file are not reused
+_read_pool = {}
+_read_pool_lock = threading.Lock()
+# Writer connection per thread (the logger writes from a single thread)
+_writer = threading.local()
+
+# R*Tree time axis is minutes since 2020-01-01 UTC: rtree coordinates are
+# float32, which keeps this within a minute for decades (queries refine exactly)
+RTREE_EPOCH = 1577836800
+_RTREE_POINT = f'''
+    CAST({{p}}lat AS REAL), CAST({{p}}lat AS REAL), CAST({{p}}lon AS REAL), CAST({{p}}lon AS REAL),
+    (strftime('%s', {{p}}timestamp_utc) - {RTREE_EPOCH}) / 60.0,
+    (strftime('%s', {{p}}timestamp_utc) - {RTREE_EPOCH}) / 60.0
+'''
+_RTREE_HAS_POSITION = "{p}lat <> '' AND {p}lon <> '' AND strftime('%s', {p}timestamp_utc) IS NOT NULL"
+RTREE_TRIGGERS_SQL = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS flights_rtree_ai AFTER INSERT ON flights
+    WHEN {_RTREE_HAS_POSITION.format(p='NEW.')}
+    BEGIN
+        INSERT INTO flights_rtree VALUES (NEW.id, {_RTREE_POINT.format(p='NEW.')});
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS flights_rtree_ad AFTER DELETE ON flights
+    BEGIN
+        DELETE FROM flights_rtree WHERE id = OLD.id;
+    END
+    ''',
+)
+
 def init_db():
     """Initialize the SQLite database and create tables if they don't exist."""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
@@ -27,6 +74,15 @@ def init_db():
                 logger.info("Auto-migrating database: adding 'track' column...")
                 cursor.execute("ALTER TABLE flights ADD COLUMN track TEXT")
                 conn.commit()
+            if 'segment_id' not in columns:
+                logger.info("Auto-migrating database: adding 'segment_id' column...")
+                cursor.execute("ALTER TABLE flights ADD COLUMN segment_id INTEGER")
+                conn.commit()
+            if 'ts' not in columns:
+                logger.info("Auto-migrating database: adding epoch 'ts' column (one-off backfill)...")
+                cursor.execute("ALTER TABLE flights ADD COLUMN ts INTEGER")
+                cursor.execute("UPDATE flights SET ts = CAST(strftime('%s', timestamp_utc) AS INTEGER)")
+                conn.commit()
 
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS flights (
@@ -41,23 +97,247 @@ def init_db():
                 lon TEXT,
                 registration TEXT,
                 model TEXT,
-                operator TEXT
+                operator TEXT,
+                segment_id INTEGER,
+                ts INTEGER
             )
         ''')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_timestamp_utc ON flights(timestamp_utc)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_hex ON flights(hex)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_ts ON flights(ts)')
+        # Writers set ts through INSERT_FLIGHT_SQL; this covers any other INSERT
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS flights_ts_ai AFTER INSERT ON flights
+            WHEN NEW.ts IS NULL
+            BEGIN
+                UPDATE flights SET ts = CAST(strftime('%s', NEW.timestamp_utc) AS INTEGER) WHERE id = NEW.id;
+            END
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_segment_id ON flights(segment_id)')
+        # Continuous sightings of one aircraft (see airlogger.segments)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS flight_segments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                hex TEXT NOT NULL,
+                callsign TEXT,
+                start_utc TEXT NOT NULL,
+                end_utc TEXT NOT NULL,
+                point_count INTEGER NOT NULL DEFAULT 0,
+                min_lat REAL,
+                max_lat REAL,
+                min_lon REAL,
+                max_lon REAL,
+                max_altitude REAL,
+                max_speed REAL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_segments_hex_end ON flight_segments(hex, end_utc)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_segments_start ON flight_segments(start_utc)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_segments_end ON flight_segments(end_utc)')
+        # Simplified segment tracks per zoom level (see airlogger.tracks)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS segment_tracks (
+                segment_id INTEGER NOT NULL,
+                level INTEGER NOT NULL,
+                source_points INTEGER NOT NULL,
+                coords TEXT NOT NULL,
+                PRIMARY KEY (segment_id, level)
+            )
+        ''')
+        # Reception coverage aggregates (see airlogger.coverage)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS coverage_cells (
+                day TEXT NOT NULL,
+                lat_idx INTEGER NOT NULL,
+                lon_idx INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (day, lat_idx, lon_idx)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS range_by_bearing (
+                day TEXT NOT NULL,
+                bearing_bin INTEGER NOT NULL,
+                max_nm REAL NOT NULL,
+                PRIMARY KEY (day, bearing_bin)
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS coverage_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_flight_id INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS segment_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                last_flight_id INTEGER NOT NULL
+            )
+        ''')
+        # Segments ending before closed_until have stored tracks (see airlogger.tracks)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS track_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                closed_until TEXT NOT NULL
+            )
+        ''')
+        # Applied position of the ingest journal, committed together with the rows
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_journal_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL
+            )
+        ''')
         conn.commit()
+        _init_rtree(conn)
+        # WAL lets dashboard readers run alongside the logger without blocking it
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+def _init_rtree(conn):
+    """Create the flights_rtree spatial index (and backfill it the first time)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='flights_rtree'").fetchone()
+    if not exists:
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE flights_rtree USING rtree(
+                    id, min_lat, max_lat, min_lon, max_lon, min_t, max_t
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.info(f"SQLite R*Tree unavailable, area queries will scan by time instead: {e}")
+            return
+        logger.info("Building spatial index for existing flights...")
+        backfill_rtree(conn)
+    create_rtree_triggers(conn)
+    conn.commit()
+
+def create_rtree_triggers(conn):
+    for sql in RTREE_TRIGGERS_SQL:
+        conn.execute(sql)
+
+def backfill_rtree(conn, after_id=0):
+    """Index flights with id > after_id (used on creation and after bulk imports)."""
+    conn.execute(f'''
+        INSERT OR REPLACE INTO flights_rtree
+        SELECT id, {_RTREE_POINT.format(p='')} FROM flights
+        WHERE id > ? AND {_RTREE_HAS_POSITION.format(p='')}
+    ''', (after_id,))
+
+def has_rtree(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='flights_rtree'").fetchone() is not None
+
+def rtree_time(epoch_seconds):
+    """Convert a Unix timestamp to the R*Tree time axis (minutes since 2020)."""
+    return (epoch_seconds - RTREE_EPOCH) / 60.0
 
 @contextmanager
 def get_db_connection():
     """Provide a transactional scope around a series of operations."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, factory=CONNECTION_FACTORY)
     conn.row_factory = sqlite3.Row
     try:
         yield conn
     finally:
         conn.close()
 
+def _finish_timing(conn):
+    """Record a statement whose cursor was dropped before its rows were all read."""
+    if isinstance(conn, TimedConnection):
+        conn.finish_pending()
+
+def _open_read_connection(path):
+    """Open a read-only connection tuned for dashboard queries."""
+    uri = f"file:{pathname2url(os.path.abspath(path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=DB_BUSY_TIMEOUT,
+                           factory=CONNECTION_FACTORY)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size={DB_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{DB_CACHE_SIZE_KB}")
+    conn.execute("PRAGMA query_only=ON")
+    return conn
+
+def replica_path():
+    """Path of the analytical read replica (next to the main database by default)."""
+    return REPLICA_PATH or os.path.splitext(DB_PATH)[0] + "_replica.db"
+
+def _read_target(analytical):
+    """Return (path, inode) to read from; inode is only tracked for the replica."""
+    if analytical and REPLICA_INTERVAL > 0:
+        path = replica_path()
+        try:
+            st = os.stat(path)
+            if time.time() - st.st_mtime <= REPLICA_MAX_AGE:
+                return path, st.st_ino
+        except OSError:
+            pass
+    return DB_PATH, None
+
+@contextmanager
+def get_read_connection(analytical=False):
+    """Check out a pooled read-only connection for the duration of the block.
+
+    Connections are opened with ``mode=ro`` and ``query_only``, so dashboard
+    reads can never take the write lock the logger needs. Each connection is
+    used by one thread at a time and returned to the pool afterwards.
+
+    With ``analytical=True`` the read goes to the snapshot replica when replica
+    mode is enabled and the snapshot is fresh; otherwise to the main database.
+    """
+    path, inode = _read_target(analytical)
+    key = (os.getpid(), path, inode)
+    with _read_pool_lock:
+        idle = _read_pool.get(key)
+        if idle is None:
+            # The replica was swapped for a new snapshot: drop connections to the old file
+            for old_key in [k for k in _read_pool if k[:2] == key[:2]]:
+                for old in _read_pool.pop(old_key):
+                    old.close()
+            idle = _read_pool[key] = []
+        conn = idle.pop() if idle else None
+    if conn is None:
+        conn = _open_read_connection(path)
+
+    try:
+        yield conn
+    except sqlite3.DatabaseError:
+        conn.close()
+        conn = None
+        raise
+    finally:
+        if conn is not None:
+            _finish_timing(conn)
+            if conn.in_transaction:
+                conn.rollback()
+            with _read_pool_lock:
+                idle = _read_pool.get(key)
+                if idle is not None and len(idle) < DB_READ_POOL_SIZE:
+                    idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+@contextmanager
+def get_write_connection():
+    """Yield this thread's long-lived writer connection (separate from readers)."""
+    conn = getattr(_writer, "conn", None)
+    if conn is None or getattr(_writer, "key", None) != (os.getpid(), DB_PATH):
+        conn = sqlite3.connect(DB_PATH, timeout=DB_BUSY_TIMEOUT, factory=CONNECTION_FACTORY)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _writer.conn = conn
+        _writer.key = (os.getpid(), DB_PATH)
+    try:
+        yield conn
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        _finish_timing(conn)
+
 def get_live_registry(minutes=15):
     """Return the current live aircraft registry, cleaned of old entries."""
     global _live_registry, _last_registry_cleanup
@@ -65,26 +345,21 @@ def get_live_registry(minutes=15):
     now = time.time()
     # Periodic cleanup every minute
     if now - _last_registry_cleanup > 60:
-        threshold = datetime.utcnow() - timedelta(minutes=minutes)
-        new_registry = {}
-        for h, f in _live_registry.items():
-            try:
-                # Handle both formats (with/without microseconds)
-                fmt = '%Y-%m-%d %H:%M:%S.%f' if '.' in f['time_utc'] else '%Y-%m-%d %H:%M:%S'
-                if datetime.strptime(f['time_utc'], fmt) > threshold:
-                    new_registry[h] = f
-            except:
-                continue
-        _live_registry = new_registry
+        threshold = now - minutes * 60
+        _live_registry = {h: f for h, f in _live_registry.items() if (f['ts'] or 0) > threshold}
         _last_registry_cleanup = now
         
     return _live_registry
 
-def insert_flight(timestamp_utc, hex_code, callsign, altitude, speed, track, lat, lon, registration, model, operator):
-    """Insert a flight record into the database and update live registry."""
-    global _live_registry
-    
-    # Update in-memory registry for the live dashboard
+# Parameters are the 11 row fields; ts (epoch seconds) is derived from timestamp_utc
+INSERT_FLIGHT_SQL = '''
+    INSERT INTO flights (
+        timestamp_utc, hex, callsign, altitude, speed, track, lat, lon, registration, model, operator, ts
+    ) VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, CAST(strftime('%s', ?1) AS INTEGER))
+'''
+
+def update_live_registry(timestamp_utc, hex_code, callsign, altitude, speed, track, lat, lon, registration, model, operator):
+    """Record the latest position of an aircraft for the live dashboard."""
     _live_registry[hex_code] = {
         'hex': hex_code,
         'callsign': callsign,
@@ -96,14 +371,21 @@ def insert_flight(timestamp_utc, hex_code, callsign, altitude, speed, track, lat
         'reg': registration,
         'model': model,
         'operator': operator,
-        'time_utc': timestamp_utc
+        'time_utc': timestamp_utc,
+        'ts': utc_epoch(timestamp_utc)
     }
-    
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO flights (
-                timestamp_utc, hex, callsign, altitude, speed, track, lat, lon, registration, model, operator
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (timestamp_utc, hex_code, callsign, altitude, speed, track, lat, lon, registration, model, operator))
+
+def insert_flights(rows):
+    """Insert a batch of flight rows in a single transaction."""
+    start = time.perf_counter()
+    with get_write_connection() as conn:
+        conn.executemany(INSERT_FLIGHT_SQL, rows)
         conn.commit()
+    COMMIT_SECONDS.labels("direct").observe(time.perf_counter() - start)
+    ROWS_WRITTEN.labels("direct").inc(len(rows))
+
+def insert_flight(timestamp_utc, hex_code, callsign, altitude, speed, track, lat, lon, registration, model, operator):
+    """Insert a flight record into the database and update live registry."""
+    row = (timestamp_utc, hex_code, callsign, altitude, speed, track, lat, lon, registration, model, operator)
+    update_live_registry(*row)
+    insert_flights([row])
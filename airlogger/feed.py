@@ -0,0 +1,94 @@
+"""Compact encodings of the live feed (`/api/live_flights`).
+
+The feed is built as columns (one list per field, numbers already parsed) and
+served in the format the client asks for in its Accept header:
+
+* ``application/json`` - the original per-aircraft objects keyed by hex.
+* ``COLUMNS_MIME`` - ``{"count": n, "hex": [...], "lat": [...], ...}`` with numbers as numbers.
+* ``PACKED_MIME`` - a little-endian binary layout decoded straight into typed arrays::
+
+      0   4s   magic b"ALF1"
+      4   u32  aircraft count n
+      8   u32  byte length of the string block
+      12  u32  reserved (0)
+      16  f64[n] lat, f64[n] lon
+          f32[n] alt, speed, track, distance (NaN = unknown)
+          UTF-8 JSON {"hex": [...], "callsign": [...], ...} (STRING_FIELDS)
+"""
+import sys
+import json
+import math
+import array
+import struct
+
+COLUMNS_MIME = "application/vnd.airlogger.columns+json"
+PACKED_MIME = "application/vnd.airlogger.packed"
+
+MAGIC = b"ALF1"
+HEADER = struct.Struct("<4sIII")
+FLOAT64_FIELDS = ("lat", "lon")
+FLOAT32_FIELDS = ("alt", "speed", "track", "distance")
+STRING_FIELDS = ("hex", "callsign", "reg", "model", "operator", "time")
+FIELDS = STRING_FIELDS + FLOAT64_FIELDS + FLOAT32_FIELDS
+
+
+def number(value, default=math.nan) -> float:
+    """Float from a stored text column (commas allowed), or default."""
+    if value is None or value == "":
+        return default
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return default
+
+
+def choose_format(accept_mimetypes) -> str:
+    """Best supported mimetype for a request's Accept header (JSON unless asked otherwise)."""
+    # Ties go to the first candidate, so */* (curl, browsers, fetch()) keeps getting JSON
+    best = accept_mimetypes.best_match(["application/json", PACKED_MIME, COLUMNS_MIME])
+    return best or "application/json"
+
+
+def encode_columns(columns: dict) -> bytes:
+    out = {"count": len(columns["hex"])}
+    for field in FIELDS:
+        values = columns[field]
+        if field in FLOAT64_FIELDS or field in FLOAT32_FIELDS:
+            values = [None if v is None or math.isnan(v) else v for v in values]
+        out[field] = values
+    return json.dumps(out, separators=(",", ":")).encode()
+
+
+def _pack(typecode: str, values) -> bytes:
+    data = array.array(typecode, (math.nan if v is None else v for v in values))
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data.tobytes()
+
+
+def encode_packed(columns: dict) -> bytes:
+    n = len(columns["hex"])
+    strings = json.dumps({f: columns[f] for f in STRING_FIELDS}, separators=(",", ":")).encode()
+    parts = [HEADER.pack(MAGIC, n, len(strings), 0)]
+    parts += [_pack("d", columns[f]) for f in FLOAT64_FIELDS]
+    parts += [_pack("f", columns[f]) for f in FLOAT32_FIELDS]
+    parts.append(strings)
+    return b"".join(parts)
+
+
+def decode_packed(payload: bytes) -> dict:
+    """Columns back from encode_packed (used by tests and the benchmark)."""
+    magic, n, string_len, _ = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("not a packed live feed")
+    columns, offset = {}, HEADER.size
+    for fields, typecode in ((FLOAT64_FIELDS, "d"), (FLOAT32_FIELDS, "f")):
+        for field in fields:
+            data = array.array(typecode)
+            data.frombytes(payload[offset:offset + n * data.itemsize])
+            if sys.byteorder != "little":
+                data.byteswap()
+            columns[field] = data
+            offset += n * data.itemsize
+    columns.update(json.loads(payload[offset:offset + string_len]))
+    return columns
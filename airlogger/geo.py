@@ -0,0 +1,111 @@
+"""Great-circle helpers shared by the API, coverage aggregates and reports.
+
+The scalar functions work on single positions. The array functions take NumPy
+arrays (or anything array-like) and broadcast, so a day of positions fetched
+column-wise with :func:`float_columns` is processed in a few vectorised calls.
+Without NumPy the array functions fall back to lists computed point by point.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; array helpers return lists instead
+    np = None
+
+EARTH_RADIUS_NM = 3440.065
+
+
+def haversine_nm(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in nautical miles."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def bearing_deg(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial bearing from point 1 to point 2 in degrees (0-360, clockwise from north)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    x = math.sin(dlambda) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return (math.degrees(math.atan2(x, y)) + 360.0) % 360.0
+
+
+def destination(lat: float, lon: float, track_deg: float, distance_nm: float):
+    """Position reached from (lat, lon) after distance_nm along an initial track."""
+    phi1, lam1 = math.radians(lat), math.radians(lon)
+    theta, d = math.radians(track_deg), distance_nm / EARTH_RADIUS_NM
+    phi2 = math.asin(math.sin(phi1) * math.cos(d) + math.cos(phi1) * math.sin(d) * math.cos(theta))
+    lam2 = lam1 + math.atan2(math.sin(theta) * math.sin(d) * math.cos(phi1),
+                             math.cos(d) - math.sin(phi1) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lam2) + 540.0) % 360.0 - 180.0
+
+
+def float_columns(rows, *indexes):
+    """Float arrays for the given column indexes of fetched rows (NULL becomes NaN).
+
+    Select text columns as ``CAST(NULLIF(col, '') AS REAL)`` so they arrive as numbers.
+    """
+    if np is None:
+        return [[math.nan if r[i] is None else float(r[i]) for r in rows] for i in indexes]
+    return [np.array([r[i] for r in rows], dtype=float) for i in indexes]
+
+
+def _broadcast(*values):
+    lengths = {len(v) for v in values if isinstance(v, (list, tuple))}
+    n = lengths.pop() if lengths else 1
+    return [list(v) if isinstance(v, (list, tuple)) else [v] * n for v in values]
+
+
+def distances_nm(lat1, lon1, lat2, lon2):
+    """Vectorised haversine distance in nautical miles."""
+    if np is None:
+        return [haversine_nm(*p) for p in zip(*_broadcast(lat1, lon1, lat2, lon2))]
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = (np.sin((phi2 - phi1) / 2) ** 2
+         + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(np.subtract(lon2, lon1)) / 2) ** 2)
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bearings_deg(lat1, lon1, lat2, lon2):
+    """Vectorised initial bearing in degrees (0-360)."""
+    if np is None:
+        return [bearing_deg(*p) for p in zip(*_broadcast(lat1, lon1, lat2, lon2))]
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlambda = np.radians(np.subtract(lon2, lon1))
+    x = np.sin(dlambda) * np.cos(phi2)
+    y = np.cos(phi1) * np.sin(phi2) - np.sin(phi1) * np.cos(phi2) * np.cos(dlambda)
+    return np.mod(np.degrees(np.arctan2(x, y)) + 360.0, 360.0)
+
+
+def dead_reckon(lat, lon, track_deg, speed_kt, seconds):
+    """Vectorised positions after flying `seconds` at `speed_kt` along `track_deg`; returns (lats, lons)."""
+    if np is None:
+        points = [destination(la, lo, t, s * dt / 3600.0)
+                  for la, lo, t, s, dt in zip(*_broadcast(lat, lon, track_deg, speed_kt, seconds))]
+        return [p[0] for p in points], [p[1] for p in points]
+    phi1, lam1 = np.radians(lat), np.radians(lon)
+    theta = np.radians(track_deg)
+    d = np.multiply(speed_kt, seconds) / 3600.0 / EARTH_RADIUS_NM
+    phi2 = np.arcsin(np.sin(phi1) * np.cos(d) + np.cos(phi1) * np.sin(d) * np.cos(theta))
+    lam2 = lam1 + np.arctan2(np.sin(theta) * np.sin(d) * np.cos(phi1),
+                             np.cos(d) - np.sin(phi1) * np.sin(phi2))
+    return np.degrees(phi2), np.mod(np.degrees(lam2) + 540.0, 360.0) - 180.0
+
+
+def bounding_box(lats, lons):
+    """(min_lat, min_lon, max_lat, max_lon) ignoring NaN, or None when there are no positions."""
+    if np is None:
+        points = [(la, lo) for la, lo in zip(lats, lons) if not (math.isnan(la) or math.isnan(lo))]
+        if not points:
+            return None
+        la, lo = zip(*points)
+        return min(la), min(lo), max(la), max(lo)
+    lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+    valid = ~(np.isnan(lats) | np.isnan(lons))
+    if not valid.any():
+        return None
+    lats, lons = lats[valid], lons[valid]
+    return float(lats.min()), float(lons.min()), float(lats.max()), float(lons.max())
@@ -0,0 +1,347 @@
+"""Crash-safe append-only ingest journal.
+
+The logger appends every accepted position to a binary journal before it
+touches SQLite. Records are length-prefixed and checksummed
+(``<u32 length><u32 crc32><payload>``), and the file is fsync'ed once per batch.
+A background applier copies new records into the ``flights`` table and stores
+its position (segment, offset) in the same transaction, so each record is
+applied exactly once even across crashes or ``database is locked`` errors.
+
+Journal files are segments named ``ingest-NNNNNN.journal``; once a segment is
+fully applied and larger than ``max_bytes`` the writer rolls over to a new one
+and the old file is deleted.
+
+A corrupt record in the middle of a segment does not stop the applier: the
+reader resynchronises on the next record whose length and CRC check out, and
+the unreadable bytes are copied to ``quarantine/`` before the segment can be
+truncated or deleted. Invalid bytes with no valid record after them are a torn
+(or still being written) tail and are left for the next read.
+"""
+import os
+import re
+import time
+import zlib
+import struct
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from airlogger import metrics
+from airlogger.db import get_write_connection, INSERT_FLIGHT_SQL, COMMIT_SECONDS, ROWS_WRITTEN
+from airlogger.latency import tracker as latency
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<II")
+FIELD_SEP = "\x1f"
+SEGMENT_RE = re.compile(r"^ingest-(\d{6})\.journal$")
+# Largest payload treated as a record when resynchronising after corruption
+MAX_RECORD = 64 * 1024
+
+CORRUPT_RECORDS = metrics.counter("airlogger_journal_corrupt_records_total",
+                                  "Corrupt journal byte ranges skipped and quarantined")
+
+
+def encode_record(row) -> bytes:
+    """Encode a flights row (tuple of strings) as one journal record."""
+    payload = FIELD_SEP.join((str(v) if v is not None else "").replace(FIELD_SEP, " ")
+                             for v in row).encode("utf-8")
+    return HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_record(payload: bytes) -> Tuple[str, ...]:
+    return tuple(payload.decode("utf-8").split(FIELD_SEP))
+
+
+def _record_at(data: bytes, pos: int):
+    """(row, end) for a valid record starting at pos, or None."""
+    if pos + HEADER.size > len(data):
+        return None
+    length, crc = HEADER.unpack_from(data, pos)
+    end = pos + HEADER.size + length
+    # Rows are never empty, so zero-filled space is not mistaken for records
+    if not 0 < length <= MAX_RECORD or end > len(data):
+        return None
+    payload = data[pos + HEADER.size:end]
+    if zlib.crc32(payload) != crc:
+        return None
+    try:
+        return decode_record(payload), end
+    except UnicodeDecodeError:
+        return None
+
+
+def _resync(data: bytes, pos: int) -> Optional[int]:
+    """Offset of the next valid record at or after pos, or None."""
+    for candidate in range(pos, len(data) - HEADER.size + 1):
+        if _record_at(data, candidate) is not None:
+            return candidate
+    return None
+
+
+def read_records(path: str, offset: int = 0, skipped: Optional[list] = None) -> Tuple[List[Tuple[str, ...]], int]:
+    """Read valid records from offset. Returns (rows, end_offset).
+
+    Corrupt bytes followed by a valid record are skipped and reported as
+    ``(offset, bytes)`` in ``skipped``. Reading stops at invalid bytes with no
+    valid record after them (a torn or unfinished write); ``end_offset`` is then
+    the end of the last valid record.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+
+    rows = []
+    pos = 0
+    while pos < len(data):
+        record = _record_at(data, pos)
+        if record is None:
+            resume = _resync(data, pos + 1)
+            if resume is None:
+                break
+            if skipped is None:
+                logger.warning(f"Skipped {resume - pos} corrupt journal bytes in {path} at offset {offset + pos}")
+            else:
+                skipped.append((offset + pos, data[pos:resume]))
+            pos = resume
+            continue
+        row, pos = record
+        rows.append(row)
+    return rows, offset + pos
+
+
+class IngestJournal:
+    """Append-only journal with a background applier into SQLite."""
+
+    def __init__(self, directory: str, flush_every: int = 64, flush_interval: float = 1.0,
+                 apply_interval: float = 1.0, max_bytes: int = 8 * 1024 * 1024, on_applied=None):
+        self.directory = directory
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.apply_interval = apply_interval
+        self.max_bytes = max_bytes
+        # Called from the applier thread after new rows were committed
+        self.on_applied = on_applied
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()        # writer file handle and segment number
+        self._apply_lock = threading.Lock()  # one applier at a time
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        state_segment, _ = self._load_state()
+        segments = self._segments()
+        self._segment = max(segments + [state_segment, 1])
+        self._repair_tail(self._segment_path(self._segment))
+        self._fh = open(self._segment_path(self._segment), "ab")
+
+    # --- writer ---------------------------------------------------------------
+
+    def append(self, row) -> None:
+        """Append a row; the batch is fsync'ed every `flush_every` rows or `flush_interval` s."""
+        record = encode_record(row)
+        with self._lock:
+            self._fh.write(record)
+            self._pending += 1
+            if (self._pending >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    @property
+    def unflushed(self) -> int:
+        """Records appended since the last fsync."""
+        return self._pending
+
+    def _flush_locked(self) -> None:
+        if self._pending:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self._pending = 0
+        self._last_flush = time.monotonic()
+
+    # --- applier --------------------------------------------------------------
+
+    def apply_pending(self) -> int:
+        """Copy all durable, unapplied records into SQLite. Returns rows applied."""
+        self.flush()
+        applied = 0
+        with self._apply_lock:
+            segment, offset = self._load_state()
+            while True:
+                path = self._segment_path(segment)
+                skipped = []
+                rows, end = read_records(path, offset, skipped)
+                # Saved before the state moves past them, so nothing is lost on a crash
+                for bad_offset, data in skipped:
+                    self._quarantine(segment, bad_offset, data)
+                if end > offset:
+                    self._commit(rows, segment, end)
+                    applied += len(rows)
+                    offset = end
+                with self._lock:
+                    current = self._segment
+                if segment >= current:
+                    break
+                # The writer has moved on, so this segment is complete and any
+                # bytes left after its last valid record can never be read
+                tail = self._read_from(path, end)
+                if tail:
+                    self._quarantine(segment, end, tail)
+                self._commit([], segment + 1, 0)
+                self._remove(path)
+                segment, offset = segment + 1, 0
+
+            if offset >= self.max_bytes:
+                self._rotate(segment, offset)
+        return applied
+
+    def _commit(self, rows, segment: int, offset: int) -> None:
+        start = time.perf_counter()
+        with get_write_connection() as conn:
+            if rows:
+                conn.executemany(INSERT_FLIGHT_SQL, rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_journal_state (id, segment, offset) VALUES (1, ?, ?)",
+                (segment, offset))
+            conn.commit()
+        if rows:
+            COMMIT_SECONDS.labels("journal").observe(time.perf_counter() - start)
+            ROWS_WRITTEN.labels("journal").inc(len(rows))
+            latency.applied(len(rows))
+
+    def _rotate(self, segment: int, offset: int) -> None:
+        """Start a new segment if everything in the current one has been applied."""
+        with self._lock:
+            if self._segment != segment or self._pending:
+                return
+            if os.path.getsize(self._segment_path(segment)) != offset:
+                return
+            self._fh.close()
+            self._segment = segment + 1
+            self._fh = open(self._segment_path(self._segment), "ab")
+
+    def replay(self) -> int:
+        """Apply anything left over from a previous run (call on startup)."""
+        state_segment, _ = self._load_state()
+        for segment in self._segments():
+            if segment < state_segment:
+                self._remove(self._segment_path(segment))
+        applied = self.apply_pending()
+        if applied:
+            logger.info(f"Replayed {applied} journaled rows into the database")
+        return applied
+
+    def start(self) -> None:
+        """Start the background applier thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-applier", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.apply_interval):
+            try:
+                applied = self.apply_pending()
+            except Exception as e:
+                # Records stay in the journal and are retried on the next tick
+                logger.warning(f"Journal apply failed, will retry: {e}")
+                continue
+            if applied and self.on_applied is not None:
+                try:
+                    self.on_applied()
+                except Exception as e:
+                    logger.error(f"Post-apply hook failed: {e}")
+
+    def close(self) -> None:
+        """Stop the applier, flush and apply what is left."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        try:
+            self.apply_pending()
+        except Exception as e:
+            logger.error(f"Final journal apply failed; rows will be replayed on next start: {e}")
+        with self._lock:
+            self._flush_locked()
+            self._fh.close()
+
+    def backlog_bytes(self) -> int:
+        """Bytes written to the journal but not yet applied."""
+        segment, offset = self._load_state()
+        total = 0
+        for s in self._segments():
+            if s >= segment:
+                size = os.path.getsize(self._segment_path(s))
+                total += size - offset if s == segment else size
+        return max(total, 0)
+
+    # --- helpers --------------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"ingest-{segment:06d}.journal")
+
+    def _segments(self) -> List[int]:
+        return sorted(int(m.group(1)) for m in map(SEGMENT_RE.match, os.listdir(self.directory)) if m)
+
+    def _load_state(self) -> Tuple[int, int]:
+        with get_write_connection() as conn:
+            row = conn.execute("SELECT segment, offset FROM ingest_journal_state WHERE id = 1").fetchone()
+        return (row[0], row[1]) if row else (1, 0)
+
+    def _repair_tail(self, path: str) -> None:
+        """Truncate a torn record at the end of the segment we are about to append to.
+
+        Only bytes after the last valid record go; corrupt records earlier in
+        the file are skipped (and quarantined) by the applier.
+        """
+        if not os.path.exists(path):
+            return
+        _, good_end = read_records(path, 0, [])
+        tail = self._read_from(path, good_end)
+        if tail:
+            segment = int(SEGMENT_RE.match(os.path.basename(path)).group(1))
+            self._quarantine(segment, good_end, tail)
+            logger.warning(f"Truncating {len(tail)} bytes of torn journal data in {path}")
+            with open(path, "r+b") as f:
+                f.truncate(good_end)
+
+    def _quarantine(self, segment: int, offset: int, data: bytes) -> None:
+        """Copy unreadable journal bytes to quarantine/ (once per segment and offset)."""
+        directory = os.path.join(self.directory, "quarantine")
+        path = os.path.join(directory, f"ingest-{segment:06d}-{offset}.bad")
+        if os.path.exists(path):
+            return
+        os.makedirs(directory, exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        CORRUPT_RECORDS.inc()
+        logger.error(f"Skipped {len(data)} corrupt journal bytes in segment {segment} at offset {offset}; "
+                     f"saved to {path}")
+
+    @staticmethod
+    def _read_from(path: str, offset: int) -> bytes:
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,279 @@
+"""End-to-end ingest latency tracing with rolling per-stage percentiles.
+
+Stages, in seconds, for each message the logger accepts:
+
+* ``parse`` - socket read to parsed message
+* ``metadata`` - parsed to metadata resolved
+* ``commit`` - metadata resolved to committed in SQLite (with the journal: the applier's batch)
+* ``ingest`` - socket read to committed, end to end
+* ``exposure`` - row timestamp to the first ``/api/live_flights`` response containing it
+  (dashboard process; whole-second resolution, since rows carry an epoch second)
+
+The logger writes its snapshot to LATENCY_FILE on the heartbeat and the dashboard
+writes exposure to LATENCY_DASHBOARD_FILE, so ``manage.py stats`` can read both.
+Under gunicorn each worker tracks its own exposure (a row's first response from
+that worker) in ``latency_dashboard-<pid>.json``; readers merge the live
+workers' files, taking the worst worker's percentiles.
+Slow stages are logged at most once per LATENCY_LOG_INTERVAL with a suppressed count.
+"""
+import os
+import re
+import json
+import time
+import logging
+import tempfile
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+from airlogger import metrics
+from airlogger.config import (
+    LATENCY_FILE, LATENCY_DASHBOARD_FILE, LATENCY_WINDOW, LATENCY_SLOW_MS,
+    LATENCY_LOG_INTERVAL, HEARTBEAT_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("parse", "metadata", "commit", "ingest", "exposure")
+PERCENTILES = ("p50_ms", "p90_ms", "p99_ms", "max_ms")
+
+STAGE_SECONDS = metrics.histogram(
+    "airlogger_ingest_stage_seconds", "Ingest pipeline latency by stage", ("stage",),
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+
+def parse_thresholds(spec: str) -> Dict[str, float]:
+    """'stage=ms,...' -> {stage: seconds}."""
+    out = {}
+    for part in spec.split(","):
+        stage, _, ms = part.partition("=")
+        if stage.strip() and ms.strip():
+            out[stage.strip()] = float(ms) / 1000.0
+    return out
+
+
+class StageStats:
+    """Rolling window of one stage's latencies."""
+
+    def __init__(self, window: int):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        samples = sorted(self.samples)
+
+        def pct(p):
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 1)
+
+        return {"count": self.count, "p50_ms": pct(0.5), "p90_ms": pct(0.9),
+                "p99_ms": pct(0.99), "max_ms": round(samples[-1] * 1000, 1) if samples else None}
+
+
+class LatencyTracker:
+    """Per-stage windows plus rows waiting for the journal applier to commit them."""
+
+    def __init__(self, window: int = LATENCY_WINDOW, thresholds: Optional[Dict[str, float]] = None,
+                 log_interval: float = LATENCY_LOG_INTERVAL):
+        self.window = window
+        self.thresholds = parse_thresholds(LATENCY_SLOW_MS) if thresholds is None else thresholds
+        self.log_interval = log_interval
+        self.stages = {stage: StageStats(window) for stage in STAGES}
+        self._lock = threading.Lock()
+        self._queued = deque()  # (hex, received, resolved) appended to the journal, oldest first
+        self._last_slow_log = 0.0
+        self._suppressed = 0
+
+    def record(self, stage: str, seconds: float, hex_code: str = "") -> None:
+        seconds = max(seconds, 0.0)
+        with self._lock:
+            self.stages[stage].add(seconds)
+        STAGE_SECONDS.labels(stage).observe(seconds)
+        threshold = self.thresholds.get(stage)
+        if threshold is not None and seconds >= threshold:
+            self._slow(stage, seconds, hex_code)
+
+    def _slow(self, stage: str, seconds: float, hex_code: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_slow_log < self.log_interval:
+                self._suppressed += 1
+                return
+            suppressed, self._suppressed = self._suppressed, 0
+            self._last_slow_log = now
+        more = f" ({suppressed} more slow events since the last report)" if suppressed else ""
+        logger.warning(f"Slow ingest stage: {stage} took {seconds * 1000:.0f} ms for {hex_code or '?'}{more}")
+
+    # --- logger pipeline ------------------------------------------------------
+
+    def accepted(self, hex_code: str, received: float, parsed: float, resolved: float) -> None:
+        """A message passed throttling and has its metadata."""
+        self.record("parse", parsed - received, hex_code)
+        self.record("metadata", resolved - parsed, hex_code)
+
+    def committed(self, hex_code: str, received: float, resolved: float, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self.record("commit", now - resolved, hex_code)
+        self.record("ingest", now - received, hex_code)
+
+    def queued(self, hex_code: str, received: float, resolved: float) -> None:
+        """The row went to the journal; ``applied`` completes it."""
+        with self._lock:
+            self._queued.append((hex_code, received, resolved))
+
+    def applied(self, count: int) -> None:
+        """The journal applier committed the next ``count`` rows (replayed rows are not queued)."""
+        now = time.time()
+        with self._lock:
+            done = [self._queued.popleft() for _ in range(min(count, len(self._queued)))]
+        for hex_code, received, resolved in done:
+            self.committed(hex_code, received, resolved, now)
+
+    # --- snapshots ------------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = {name: stats.snapshot() for name, stats in self.stages.items() if stats.count}
+            queued = len(self._queued)
+        return {"updated": time.time(), "window": self.window, "queued": queued, "stages": stages}
+
+    def write(self, path: str) -> None:
+        """Atomically replace ``path`` with the current snapshot."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".latency-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+tracker = LatencyTracker()
+
+# Dashboard side: highest flight id already served, and when exposure was last persisted
+_exposed_id = None
+_last_exposure_write = 0.0
+_exposure_lock = threading.Lock()
+
+
+def record_exposure(rows, now: Optional[float] = None) -> None:
+    """Record exposure latency for rows not served before (the first call only sets the mark)."""
+    global _exposed_id, _last_exposure_write
+    now = time.time() if now is None else now
+    ids = [row['id'] for row in rows]
+    with _exposure_lock:
+        mark = _exposed_id
+        if ids:
+            _exposed_id = max(ids) if mark is None else max(mark, max(ids))
+    if mark is not None:
+        for row in rows:
+            if row['id'] > mark and row['ts']:
+                tracker.record("exposure", now - row['ts'], row['hex'])
+    # Persist for manage.py stats once there is something to report
+    with _exposure_lock:
+        write = tracker.stages["exposure"].count and now - _last_exposure_write >= HEARTBEAT_INTERVAL
+        if write:
+            _last_exposure_write = now
+    if write:
+        try:
+            tracker.write(_exposure_path())
+        except OSError as e:
+            logger.debug(f"Latency snapshot write failed: {e}")
+
+
+def load(path: str) -> Optional[dict]:
+    """A snapshot written by ``LatencyTracker.write``, or None."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _exposure_path() -> str:
+    """This process's dashboard snapshot file (one per gunicorn worker)."""
+    label = metrics.worker_label()
+    if not label:
+        return LATENCY_DASHBOARD_FILE
+    root, ext = os.path.splitext(LATENCY_DASHBOARD_FILE)
+    return f"{root}-{label}{ext}"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def _worker_files() -> Dict[int, str]:
+    """{pid: path} of live workers' snapshot files; files of exited workers are removed."""
+    directory = os.path.dirname(LATENCY_DASHBOARD_FILE) or "."
+    root, ext = os.path.splitext(os.path.basename(LATENCY_DASHBOARD_FILE))
+    pattern = re.compile(re.escape(root) + r"-(\d+)" + re.escape(ext) + "$")
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return {}
+    out = {}
+    for name in names:
+        match = pattern.match(name)
+        if not match:
+            continue
+        path = os.path.join(directory, name)
+        if _alive(int(match[1])):
+            out[int(match[1])] = path
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return out
+
+
+def merge(snapshots) -> Optional[dict]:
+    """Combine per-worker snapshots: counts add up, percentiles are the worst worker's."""
+    snapshots = [snap for snap in snapshots if snap]
+    if len(snapshots) <= 1:
+        return snapshots[0] if snapshots else None
+    stages = {}
+    for snap in snapshots:
+        for name, row in snap["stages"].items():
+            merged = stages.setdefault(name, {"count": 0, **dict.fromkeys(PERCENTILES)})
+            merged["count"] += row["count"]
+            for key in PERCENTILES:
+                if row[key] is not None:
+                    merged[key] = row[key] if merged[key] is None else max(merged[key], row[key])
+    return {"updated": max(snap["updated"] for snap in snapshots), "window": snapshots[0]["window"],
+            "queued": sum(snap.get("queued", 0) for snap in snapshots), "workers": len(snapshots),
+            "stages": stages}
+
+
+def read_snapshots(live: Optional[dict] = None) -> Dict[str, Optional[dict]]:
+    """Latest logger snapshot and the dashboard's, merged across gunicorn workers.
+
+    ``live`` is the calling dashboard process's own snapshot and takes the place
+    of its file.
+    """
+    workers = _worker_files()
+    if live is not None:
+        dashboard = [load(path) for pid, path in workers.items() if pid != os.getpid()] + [live]
+    elif workers:
+        dashboard = [load(path) for path in workers.values()]
+    else:
+        dashboard = [load(LATENCY_DASHBOARD_FILE)]
+    return {"logger": load(LATENCY_FILE), "dashboard": merge(dashboard)}
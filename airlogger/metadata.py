@@ -1,122 +1,342 @@
 """Optimized metadata fetching with aggressive CPU usage reductions."""
-import os
 import time
-import json
 import logging
-from typing import Tuple, Dict
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Tuple, Dict, Optional
 import requests
 
-logger = logging.getLogger(__name__)
+from airlogger.config import (
+    METADATA_URL, CACHE_TTL,
+    FAILED_CACHE_SIZE, FAILED_RETRY_BASE, FAILED_RETRY_MAX,
+    CACHE_MAX_ENTRIES, CACHE_MAX_STALE,
+    METADATA_PROVIDERS, OPENSKY_METADATA_URL, METADATA_TIMEOUT, METADATA_HEDGE,
+    HEDGE_MIN_SAMPLES, PROVIDER_ERROR_THRESHOLD,
+)
+from airlogger.cache import MetadataCache, NegativeCache
+from airlogger import airlines, metrics
 
-from airlogger.config import METADATA_URL, CACHE_TTL, MAX_RETRIES, BACKOFF_BASE, OPERATORS_FILE
+logger = logging.getLogger(__name__)
 
 # Optimized caching system
-metadata_cache = {}  # hex -> {registration, model, operator, callsign, timestamp}
-failed_cache = {}     # hex -> timestamp (to avoid retrying failed lookups immediately)
-_cached_custom_operators = None
-_last_operators_load = 0
+# hex -> (registration, model, operator, callsign); LRU-bounded, stale-while-revalidate
+metadata_cache = MetadataCache(CACHE_MAX_ENTRIES, CACHE_TTL, CACHE_MAX_STALE,
+                               on_stale=lambda h: _refresh_in_background(h))
+# hex -> per-hex backoff state (to avoid retrying failed lookups immediately)
+failed_cache = NegativeCache(FAILED_CACHE_SIZE, FAILED_RETRY_BASE, FAILED_RETRY_MAX)
 
 # Shared requests session for connection reuse
 _session = requests.Session()
 
+# Single background worker refreshing stale cache entries
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metadata-refresh")
+_refreshing = set()
+
 def load_custom_operators() -> Dict[str, str]:
-    """Load additional operators from the JSON file with aggressive caching."""
-    global _cached_custom_operators, _last_operators_load
-    now = time.time()
-    
-    # Only reload file at most once every 10 minutes to save CPU
-    if _cached_custom_operators is not None and (now - _last_operators_load) < 600:
-        return _cached_custom_operators
+    """Load additional operators from the JSON file (reloaded when its mtime changes)."""
+    return airlines.load_overrides()
 
-    if os.path.exists(OPERATORS_FILE):
-        try:
-            with open(OPERATORS_FILE, "r") as f:
-                _cached_custom_operators = json.load(f)
-                _last_operators_load = now
-                return _cached_custom_operators
-        except Exception:
-            pass
-    
-    # Negative caching for missing file
-    if _cached_custom_operators is None:
-        _cached_custom_operators = {}
-    _last_operators_load = now
-    return _cached_custom_operators
-
-# Optimized airline prefixes - only most common ones to reduce CPU
-AIRLINE_PREFIXES = {
-    "BAW": "British Airways", "SHT": "British Airways",
-    "EZY": "easyJet", "BEE": "Flybe", "RYR": "Ryanair", "STN": "Ryanair",
-    "WZZ": "Wizz Air", "DLH": "Lufthansa", "AFR": "Air France", "KLM": "KLM",
-    "AAL": "American Airlines", "UAL": "United", "SWA": "Southwest", "JBU": "JetBlue",
-    "QFA": "Qantas", "ANZ": "Air New Zealand", "NZ": "Air New Zealand",
-    "VA": "Virgin Australia", "VOZ": "Virgin Australia", "VIR": "Virgin Atlantic",
-    "UAE": "Emirates", "QTR": "Qatar Airways", "ETD": "Etihad",
-    "JAL": "Japan Airlines", "ANA": "All Nippon Airways", "KAL": "Korean Air",
-    "TAM": "LATAM", "LAN": "LATAM", "GLO": "Gol", "IBE": "Iberia",
-    "JST": "Jetstar", "TUI": "TUI Airways", "SAS": "Scandinavian Airlines",
-    "FDX": "FedEx", "UPS": "UPS", "TNT": "FedEx", "CLX": "Cargolux",
-}
+# Kept for compatibility; the shared table lives in airlogger.airlines
+AIRLINE_PREFIXES = airlines.ICAO_NAMES
 
 def get_operator_from_callsign(callsign: str, country: str = "") -> str:
     """Ultra-fast operator lookup with minimal CPU usage."""
-    if not callsign or callsign == "N/A":
-        return ""
+    return airlines.operator_from_callsign(callsign)
 
-    prefix = callsign[:3].upper() if len(callsign) >= 3 else callsign.upper()
-    if not prefix:
-        return ""
-    
-    # Fast lookup in optimized prefix list
-    return AIRLINE_PREFIXES.get(prefix, "")
+# --- Metadata providers -----------------------------------------------------
+
+def _field(value) -> str:
+    return (value or "").strip() if isinstance(value, str) else ""
+
+def merge_results(results) -> Optional[Tuple[str, str, str, str]]:
+    """Merge provider results field by field; earlier results win per field."""
+    merged = ["", "", "", ""]
+    found = False
+    for result in results:
+        if not result:
+            continue
+        found = True
+        for i, value in enumerate(result):
+            if value and not merged[i]:
+                merged[i] = value
+    return tuple(merged) if found else None
+
+UPSTREAM_SECONDS = metrics.histogram("airlogger_metadata_upstream_seconds",
+                                     "Metadata provider request latency", ("provider",))
+UPSTREAM_ERRORS = metrics.counter("airlogger_metadata_upstream_errors_total",
+                                  "Metadata provider requests that failed or returned nothing", ("provider",))
+
+class ProviderStats:
+    """Rolling latency window and error counters for one provider."""
+
+    def __init__(self, window: int = 200):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)  # True = error
+        self.requests = 0
+        self.errors = 0
+        self.hedged = 0
+
+    def record(self, latency: float, error: bool) -> None:
+        self.requests += 1
+        self.outcomes.append(error)
+        if error:
+            self.errors += 1
+        else:
+            self.latencies.append(latency)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        samples = sorted(self.latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def snapshot(self) -> Dict[str, float]:
+        p50 = self.percentile(0.5)
+        p90 = self.percentile(0.9)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedged": self.hedged,
+            "error_rate": round(self.error_rate(), 3),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p90_ms": round(p90 * 1000, 1) if p90 is not None else None,
+        }
+
+class MetadataProvider:
+    """A single HTTP metadata source. Subclasses implement ``parse``."""
+
+    name = ""
+
+    def __init__(self, url_template: str, timeout: float = METADATA_TIMEOUT):
+        self.url_template = url_template
+        self.timeout = timeout
+        self.stats = ProviderStats()
+
+    def fetch(self, hex_code: str) -> Optional[Tuple[str, str, str, str]]:
+        """Fetch and parse metadata, recording latency and errors."""
+        start = time.perf_counter()
+        try:
+            response = _session.get(self.url_template.format(hex=hex_code), timeout=self.timeout)
+            result = self.parse(response.json()) if response.status_code == 200 else None
+        except Exception as e:
+            logger.debug(f"{self.name} lookup failed for {hex_code}: {e}")
+            result = None
+        elapsed = time.perf_counter() - start
+        self.stats.record(elapsed, result is None)
+        UPSTREAM_SECONDS.labels(self.name).observe(elapsed)
+        if result is None:
+            UPSTREAM_ERRORS.labels(self.name).inc()
+        return result
+
+    def parse(self, data) -> Optional[Tuple[str, str, str, str]]:
+        raise NotImplementedError
+
+class AdsbLolProvider(MetadataProvider):
+    name = "adsb_lol"
+
+    def parse(self, data):
+        if not data or not data.get("ac"):
+            return None
+        ac = data["ac"][0]
+        return _field(ac.get("r")), _field(ac.get("t")), "", _field(ac.get("flight"))
+
+class OpenSkyProvider(MetadataProvider):
+    name = "opensky"
+
+    def parse(self, data):
+        if not isinstance(data, dict):
+            return None
+        result = (
+            _field(data.get("registration")),
+            _field(data.get("model")) or _field(data.get("manufacturerName")),
+            _field(data.get("operator")) or _field(data.get("owner")),
+            _field(data.get("operatorCallsign")),
+        )
+        return result if any(result) else None
+
+PROVIDER_TYPES = {
+    AdsbLolProvider.name: (AdsbLolProvider, METADATA_URL),
+    OpenSkyProvider.name: (OpenSkyProvider, OPENSKY_METADATA_URL),
+}
+
+class ProviderChain:
+    """Resolve metadata across providers with fallback and hedged requests.
+
+    The first healthy provider is queried; if it hasn't answered within its own
+    p90 latency, the next provider is queried in parallel and the first usable
+    answer wins. A failed or empty answer falls through to the next provider.
+    Answers are merged field by field in provider order, and hedged answers
+    that arrive after the caller returned are handed to ``on_late``.
+    """
+
+    def __init__(self, providers, hedge: bool = True, default_hedge_delay: float = 1.0,
+                 min_hedge_delay: float = 0.05, on_late=None):
+        self.providers = list(providers)
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.on_late = on_late
+        self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * len(self.providers)),
+                                            thread_name_prefix="metadata-provider")
+
+    def ordered(self):
+        """Providers in configured order, with unhealthy ones demoted."""
+        return sorted(self.providers, key=lambda p: p.stats.error_rate() > PROVIDER_ERROR_THRESHOLD)
+
+    def hedge_delay(self, provider: MetadataProvider) -> float:
+        p90 = provider.stats.percentile(0.9)
+        if p90 is None:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, p90)
+
+    def resolve(self, hex_code: str) -> Optional[Tuple[str, str, str, str]]:
+        providers = self.ordered()
+        if not providers:
+            return None
+        pending = {}
+        answers = {}
+        next_idx = 0
+
+        def launch():
+            nonlocal next_idx
+            provider = providers[next_idx]
+            next_idx += 1
+            pending[self._executor.submit(provider.fetch, hex_code)] = provider
+            return provider
+
+        current = launch()
+        while pending:
+            timeout = None
+            if self.hedge and next_idx < len(providers):
+                timeout = self.hedge_delay(current)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # Slower than its p90: hedge with the next provider
+                current.stats.hedged += 1
+                current = launch()
+                continue
+            for future in done:
+                provider = pending.pop(future)
+                answers[provider.name] = future.result()
+            if any(answers.values()):
+                break
+            if not pending and next_idx < len(providers):
+                current = launch()
+
+        merged = merge_results(answers.get(p.name) for p in providers)
+        if pending and self.on_late is not None:
+            for future in pending:
+                future.add_done_callback(lambda f: self._deliver_late(hex_code, f))
+        return merged
+
+    def _deliver_late(self, hex_code: str, future) -> None:
+        try:
+            result = future.result()
+            if result:
+                self.on_late(hex_code, result)
+        except Exception as e:
+            logger.debug(f"Late metadata merge failed for {hex_code}: {e}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {p.name: p.stats.snapshot() for p in self.providers}
+
+def build_provider_chain(names, **kwargs) -> ProviderChain:
+    """Create a chain from provider names, e.g. ``["adsb_lol", "opensky"]``."""
+    providers = []
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if name not in PROVIDER_TYPES:
+            logger.warning(f"Unknown metadata provider '{name}' ignored")
+            continue
+        cls, url = PROVIDER_TYPES[name]
+        providers.append(cls(url))
+    return ProviderChain(providers, **kwargs)
+
+_chain = build_provider_chain(METADATA_PROVIDERS.split(","), hedge=METADATA_HEDGE,
+                              on_late=lambda h, r: _merge_late_result(h, r))
+
+def provider_stats() -> Dict[str, Dict[str, float]]:
+    """Per-provider latency/error statistics."""
+    return _chain.stats()
 
 def clear_cache() -> None:
     """Clear all caches."""
     metadata_cache.clear()
     failed_cache.clear()
 
-def _get_cached_result(hex_code: str) -> Tuple[str, str, str, str]:
-    """Get result from memory cache with TTL check."""
-    cached = metadata_cache.get(hex_code)
-    if cached and time.time() - cached["timestamp"] < CACHE_TTL:
-        return (
-            cached.get("registration", ""),
-            cached.get("model", ""),
-            cached.get("operator", ""),
-            cached.get("callsign", ""),
-        )
-    return None, None, None, None
-
 def _should_retry_lookup(hex_code: str) -> bool:
     """Determine if we should retry a failed lookup."""
-    failed_time = failed_cache.get(hex_code)
-    if not failed_time:
-        return True
-    
-    # Exponential backoff: wait longer between failed retries
-    retry_interval = min(3600, 60 * (2 ** (len(failed_cache) % 5)))  # Max 1 hour
-    return time.time() - failed_time > retry_interval
+    return failed_cache.should_retry(hex_code)
 
 def _cache_result(hex_code: str, reg: str, model: str, operator: str, callsign: str):
     """Cache successful lookup result."""
-    metadata_cache[hex_code] = {
-        "registration": reg,
-        "model": model,
-        "operator": operator,
-        "callsign": callsign,
-        "timestamp": time.time(),
-    }
+    failed_cache.forget(hex_code)
+    metadata_cache.put(hex_code, (reg, model, operator, callsign))
 
 def _cache_failure(hex_code: str):
-    """Cache failed lookup to avoid immediate retries."""
-    failed_cache[hex_code] = time.time()
-    
-    # Keep failed cache size manageable
-    if len(failed_cache) > 1000:
-        # Remove oldest entries
-        oldest_keys = sorted(failed_cache.items(), key=lambda x: x[1])[:500]
-        for key, _ in oldest_keys:
-            del failed_cache[key]
+    """Cache failed lookup to avoid immediate retries (per-hex exponential backoff)."""
+    failed_cache.record_failure(hex_code)
+
+def _lookup_remote(hex_code: str) -> Optional[Tuple[str, str, str, str]]:
+    """Query the provider chain. Returns None when nothing usable came back."""
+    result = _chain.resolve(hex_code)
+    if result is None:
+        return None
+    reg, model, operator, callsign = result
+    if not operator and callsign:
+        # Derive operator from callsign (fast local operation)
+        operator = get_operator_from_callsign(callsign)
+    return reg, model, operator, callsign
+
+def _merge_late_result(hex_code: str, result: Tuple[str, str, str, str]) -> None:
+    """Fill blanks in a cached entry from a hedged response that arrived late."""
+    cached = metadata_cache.peek(hex_code)
+    if cached is not None:
+        merged = merge_results([cached, result])
+        if merged != cached:
+            metadata_cache.put(hex_code, merged)
+
+def _resolve(hex_code: str) -> Optional[Tuple[str, str, str, str]]:
+    """Look up a hex remotely and update the positive/negative caches."""
+    try:
+        result = _lookup_remote(hex_code)
+    except Exception as e:
+        logger.debug(f"Metadata lookup failed for {hex_code}: {e}")
+        result = None
+
+    if result is None:
+        _cache_failure(hex_code)
+        return None
+    _cache_result(hex_code, *result)
+    return result
+
+def pending_refreshes() -> int:
+    """Background refreshes queued or in flight."""
+    return len(_refreshing)
+
+def _refresh_in_background(hex_code: str) -> None:
+    """Stale-while-revalidate hook: refresh an expired entry off the hot path."""
+    if hex_code in _refreshing or not _should_retry_lookup(hex_code):
+        return
+    _refreshing.add(hex_code)
+    try:
+        _refresh_executor.submit(_run_refresh, hex_code)
+    except RuntimeError:
+        # Executor shut down (interpreter exit)
+        _refreshing.discard(hex_code)
+
+def _run_refresh(hex_code: str) -> None:
+    try:
+        _resolve(hex_code)
+    finally:
+        _refreshing.discard(hex_code)
 
 def fetch_metadata_optimized(hex_code: str) -> Tuple[str, str, str, str]:
     """Ultra-optimized metadata fetching with minimal CPU usage."""
@@ -125,9 +345,9 @@ def fetch_metadata_optimized(hex_code: str) -> Tuple[str, str, str, str]:
 
     hex_code = hex_code.strip().lower()
     
-    # Fast path: check memory cache
-    cached_result = _get_cached_result(hex_code)
-    if cached_result[0] is not None:
+    # Fast path: memory cache (stale entries are served while a refresh runs)
+    cached_result = metadata_cache.get(hex_code)
+    if cached_result is not None:
         return cached_result
     
     # Skip if recently failed
@@ -135,35 +355,9 @@ def fetch_metadata_optimized(hex_code: str) -> Tuple[str, str, str, str]:
         return "", "", "", ""
     
     # Single API call to adsb.lol (most reliable and fastest)
-    try:
-        url = METADATA_URL.format(hex=hex_code)
-        # Use shared session for connection reuse
-        response = _session.get(url, timeout=3)  # Reduced timeout for faster failure
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data and "ac" in data and data["ac"] and len(data["ac"]) > 0:
-                ac = data["ac"][0]
-                
-                reg = (ac.get("r") or "").strip()
-                model = (ac.get("t") or "").strip()
-                callsign = (ac.get("flight") or "").strip()
-                
-                # Derive operator from callsign (fast local operation)
-                operator = get_operator_from_callsign(callsign) if callsign else ""
-                
-                # Cache the successful result
-                _cache_result(hex_code, reg, model, operator, callsign)
-                
-                return reg, model, operator, callsign
-        
-        # Cache the failure
-        _cache_failure(hex_code)
-        
-    except Exception as e:
-        logger.debug(f"Metadata lookup failed for {hex_code}: {e}")
-        _cache_failure(hex_code)
-    
+    result = _resolve(hex_code)
+    if result is not None:
+        return result
     return "", "", "", ""
 
 # Keep legacy function name for compatibility
@@ -0,0 +1,354 @@
+"""Prometheus-style metrics: counters, gauges and histograms with labels.
+
+Metrics are registered once per process (``counter``/``gauge``/``histogram``
+return the existing metric when called again) and updating one is a lock and
+an addition, so instrumentation stays on in production. A series only appears
+in the output once it has been touched, which keeps the logger's and the
+dashboard's registries from exporting each other's metrics as zeros.
+
+The logger writes its registry to a textfile (METRICS_FILE) on the heartbeat;
+the dashboard's ``/metrics`` merges that file into its own output so one scrape
+covers both processes, told apart by the ``process`` label.
+
+When the dashboard runs as several gunicorn workers each has its own registry,
+so ``enable_worker_files`` (called by the server before forking) makes every
+worker write ``metrics_<process>-<pid>.prom`` and label its series with
+``worker="<pid>"``. Whichever worker answers a scrape merges its siblings'
+files, so every worker's counters appear in every scrape and never jump
+between workers. Files of workers that have exited are removed.
+"""
+import os
+import re
+import math
+import time
+import bisect
+import tempfile
+import threading
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        self._function = None
+
+    def _new_value(self):
+        return _Value()
+
+    def labels(self, *values):
+        """Series for one combination of label values (look it up once on hot paths)."""
+        key = tuple(str(v) for v in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                series = self._series.setdefault(key, self._new_value())
+        return series
+
+    def set_function(self, fn) -> None:
+        """Read an unlabelled metric's value from ``fn()`` at render time."""
+        self._function = fn
+
+    def samples(self):
+        """(name suffix, label pairs, value) for every series."""
+        if self._function is not None:
+            try:
+                return [("", (), float(self._function()))]
+            except Exception:
+                return []
+        return [("", tuple(zip(self.labelnames, key)), series.value)
+                for key, series in list(self._series.items())]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def samples(self):
+        out = []
+        for key, series in list(self._series.items()):
+            labels = tuple(zip(self.labelnames, key))
+            with series.lock:
+                counts, total = list(series.counts), series.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                out.append(("_bucket", labels + (("le", le),), cumulative))
+            out.append(("_count", labels, cumulative))
+            out.append(("_sum", labels, total))
+        return out
+
+
+def _register(cls, name, documentation, labelnames, **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, documentation, labelnames, **kwargs)
+        elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered differently")
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames=()) -> Counter:
+    return _register(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames=()) -> Gauge:
+    return _register(Gauge, name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+# --- exposition -----------------------------------------------------------------
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _families(process: str, worker: str = ""):
+    """{name: [help, type, sample lines]} for this process's touched metrics."""
+    out = {}
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    common = ((("process", process),) if process else ()) + ((("worker", worker),) if worker else ())
+    for metric in metrics:
+        lines = []
+        for suffix, labels, value in metric.samples():
+            pairs = common + labels
+            rendered = ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs)
+            rendered = f"{{{rendered}}}" if rendered else ""
+            lines.append(f"{metric.name}{suffix}{rendered} {_format_value(value)}")
+        if lines:
+            out[metric.name] = [metric.documentation, metric.type, lines]
+    return out
+
+
+def parse_families(text: str):
+    """Families from rendered exposition text, in the same shape as ``_families``."""
+    out, current = {}, None
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, _, documentation = line[7:].partition(" ")
+            current = out.setdefault(name, [documentation, "untyped", []])
+        elif line.startswith("# TYPE "):
+            name, _, kind = line[7:].partition(" ")
+            current = out.setdefault(name, ["", kind, []])
+            current[1] = kind
+        elif line and not line.startswith("#") and current is not None:
+            current[2].append(line)
+    return out
+
+
+def render(process: str = "", extra: str = "", worker: str = "") -> str:
+    """This process's metrics in Prometheus text format, merged with ``extra``."""
+    families = _families(process, worker)
+    for name, (documentation, kind, lines) in parse_families(extra).items():
+        if name in families:
+            families[name][2].extend(lines)
+        else:
+            families[name] = [documentation, kind, lines]
+    out = []
+    for name, (documentation, kind, lines) in families.items():
+        out.append(f"# HELP {name} {documentation.replace(chr(10), ' ')}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(lines)
+    return "\n".join(out) + "\n" if out else ""
+
+
+WRITTEN = gauge("airlogger_metrics_written_timestamp_seconds",
+                "Unix time the process last wrote its metrics textfile")
+
+
+def write_textfile(path: str, process: str, worker: str = "") -> None:
+    """Atomically replace ``path`` with this process's metrics."""
+    WRITTEN.set(time.time())
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(render(process, worker=worker))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def read_textfile(path: str) -> str:
+    """Contents of another process's metrics textfile, or '' if there is none."""
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+# --- several worker processes behind one endpoint --------------------------------
+
+_WORKER_FILE = re.compile(r"^metrics_(?P<process>\w+)-(?P<pid>\d+)\.prom$")
+_worker_dir = None
+_worker_interval = 5.0
+_worker_written = 0.0
+
+
+def enable_worker_files(directory: str, interval: float = 5.0) -> None:
+    """Share metrics between forked workers through per-pid textfiles in ``directory``."""
+    global _worker_dir, _worker_interval
+    _worker_dir, _worker_interval = directory, interval
+
+
+def worker_label() -> str:
+    """This worker's ``worker`` label value, or '' when worker files are off."""
+    return str(os.getpid()) if _worker_dir else ""
+
+
+def write_worker_file(process: str, force: bool = False) -> None:
+    """Write this worker's textfile, at most once per interval unless ``force``."""
+    global _worker_written
+    if not _worker_dir:
+        return
+    now = time.monotonic()
+    if not force and now - _worker_written < _worker_interval:
+        return
+    _worker_written = now
+    pid = os.getpid()
+    write_textfile(os.path.join(_worker_dir, f"metrics_{process}-{pid}.prom"), process, str(pid))
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def read_worker_files(process: str) -> str:
+    """Textfiles of this process's sibling workers; files of exited workers are removed."""
+    if not _worker_dir:
+        return ""
+    try:
+        names = os.listdir(_worker_dir)
+    except OSError:
+        return ""
+    out = []
+    for name in names:
+        match = _WORKER_FILE.match(name)
+        if not match or match["process"] != process or int(match["pid"]) == os.getpid():
+            continue
+        path = os.path.join(_worker_dir, name)
+        if not _alive(int(match["pid"])):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        out.append(read_textfile(path))
+    return "".join(out)
@@ -0,0 +1,200 @@
+"""On-demand profiling for the logger and the dashboard.
+
+Nothing runs until a profile is requested, so there is no overhead otherwise:
+
+* ``start_profile`` samples every thread's stack (``sys._current_frames``) for
+  N seconds from a background thread and, optionally, traces allocations with
+  tracemalloc. Reports go to PROFILE_DIR: a ``.collapsed`` stack file (for
+  flamegraph.pl / speedscope), a ``.txt`` summary, and ``-memory.txt``.
+* ``install_signal_handler`` starts a profile on SIGUSR1 (``kill -USR1 <pid>``).
+* ``profile_request``/``finish_request`` cProfile dashboard requests when
+  PROFILE_SLOW_REQUEST_MS is set, keeping a report for the slow ones.
+"""
+import io
+import os
+import sys
+import time
+import pstats
+import signal
+import logging
+import cProfile
+import threading
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+from airlogger.config import (
+    PROFILE_DIR, PROFILE_SECONDS, PROFILE_INTERVAL_MS, PROFILE_TRACEMALLOC, PROFILE_KEEP,
+    PROFILE_SLOW_REQUEST_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+_active = threading.Lock()  # one sampling profile per process at a time
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float) -> Counter:
+    """Count (thread, outermost ... innermost frame) stacks of all other threads."""
+    me = threading.get_ident()
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            stacks[tuple(reversed(stack))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def summarize(stacks: Counter, top: int = 25) -> str:
+    """Top functions by self and inclusive samples."""
+    total = sum(stacks.values()) or 1
+    own, inclusive = Counter(), Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        for label in set(stack[1:]):
+            inclusive[label] += count
+    lines = [f"{total} samples"]
+    for title, counts in (("Self", own), ("Inclusive", inclusive)):
+        lines += ["", f"{title:<10}{'samples':>9}{'%':>7}  function"]
+        for label, count in counts.most_common(top):
+            lines.append(f"{'':<10}{count:>9}{100.0 * count / total:>7.1f}  {label}")
+    return "\n".join(lines) + "\n"
+
+
+def _report_path(name: str, suffix: str) -> str:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    return os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}")
+
+
+def _write(path: str, text: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _prune() -> None:
+    """Keep only the newest PROFILE_KEEP reports."""
+    try:
+        paths = [os.path.join(PROFILE_DIR, n) for n in os.listdir(PROFILE_DIR) if not n.endswith(".tmp")]
+    except OSError:
+        return
+    for path in sorted(paths, key=os.path.getmtime)[:-PROFILE_KEEP or None]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def list_reports():
+    """Report files, newest first, as {name, bytes, mtime}."""
+    try:
+        names = [n for n in os.listdir(PROFILE_DIR) if not n.endswith(".tmp")]
+    except OSError:
+        return []
+    reports = []
+    for name in names:
+        st = os.stat(os.path.join(PROFILE_DIR, name))
+        reports.append({"name": name, "bytes": st.st_size, "mtime": st.st_mtime})
+    return sorted(reports, key=lambda r: r["mtime"], reverse=True)
+
+
+def run_profile(process: str, seconds: float, memory: bool) -> list:
+    """Sample for ``seconds`` (plus tracemalloc if ``memory``) and write the reports."""
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start(10)
+    before = tracemalloc.take_snapshot() if memory else None
+    try:
+        stacks = sample_stacks(seconds, PROFILE_INTERVAL_MS / 1000.0)
+        after = tracemalloc.take_snapshot() if memory else None
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    name = f"{process}-{os.getpid()}"
+    written = []
+    path = _report_path(name, ".collapsed")
+    _write(path, "".join(f"{';'.join(stack)} {count}\n" for stack, count in stacks.items()))
+    written.append(path)
+    path = _report_path(name, ".txt")
+    _write(path, f"{process} pid {os.getpid()}, {seconds:g}s at {PROFILE_INTERVAL_MS:g} ms\n" + summarize(stacks))
+    written.append(path)
+    if memory:
+        lines = ["Top allocations by line (traced since the window started, still live at its end):"]
+        lines += [str(stat) for stat in after.statistics("lineno")[:30]]
+        lines += ["", "Growth during the window:"]
+        lines += [str(stat) for stat in after.compare_to(before, "lineno")[:30]]
+        path = _report_path(name, "-memory.txt")
+        _write(path, "\n".join(lines) + "\n")
+        written.append(path)
+    _prune()
+    return written
+
+
+def start_profile(process: str, seconds: float = PROFILE_SECONDS, memory: bool = PROFILE_TRACEMALLOC) -> bool:
+    """Profile in a background thread; False if a profile is already running."""
+    if not _active.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            paths = run_profile(process, seconds, memory)
+            logger.info(f"Profile written: {', '.join(paths)}")
+        except Exception as e:
+            logger.error(f"Profiling failed: {e}")
+        finally:
+            _active.release()
+
+    logger.info(f"Profiling {process} for {seconds:g}s{' with tracemalloc' if memory else ''}...")
+    threading.Thread(target=run, name="profiler", daemon=True).start()
+    return True
+
+
+def install_signal_handler(process: str) -> None:
+    """Start a profile on SIGUSR1 (where the platform has it)."""
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda sig, frame: start_profile(process))
+
+
+# --- slow dashboard requests ------------------------------------------------------
+
+def profile_request() -> Optional[cProfile.Profile]:
+    """A running cProfile for this request, or None when slow-request profiling is off."""
+    if PROFILE_SLOW_REQUEST_MS <= 0:
+        return None
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is active on this thread
+        return None
+    return profile
+
+
+def finish_request(profile: cProfile.Profile, endpoint: str, elapsed: float) -> Optional[str]:
+    """Stop the request's profile and write a report if it ran longer than the threshold."""
+    profile.disable()
+    if elapsed * 1000 < PROFILE_SLOW_REQUEST_MS:
+        return None
+    out = io.StringIO()
+    out.write(f"{endpoint} took {elapsed * 1000:.0f} ms\n\n")
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(40)
+    path = _report_path(f"request-{endpoint.replace('.', '_')}", f"-{time.time_ns() % 1000000:06d}.txt")
+    _write(path, out.getvalue())
+    _prune()
+    logger.warning(f"Slow request {endpoint} ({elapsed * 1000:.0f} ms) profiled to {path}")
+    return path
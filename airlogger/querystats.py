@@ -0,0 +1,356 @@
+"""Per-statement-shape SQL timing, slow-query log and per-process stats files.
+
+``airlogger.db`` opens its connections with ``TimedConnection`` so every
+statement is timed, from ``execute`` through the ``fetch*`` calls that read its
+rows. A statement is recorded when its rows are exhausted or its cursor is
+closed; otherwise (e.g. ``execute(...).fetchone()`` or iterating the cursor) it
+is recorded when the next statement starts on that connection, or when the
+connection is closed or handed back by ``airlogger.db``. Statements are grouped
+by shape - literals and parameter lists collapsed - and each shape keeps a
+count, total, max and a reservoir sample for p95.
+
+A statement slower than SQL_SLOW_MS is logged (at most once a minute per
+shape) with its EXPLAIN QUERY PLAN; shapes whose plan scans a whole table are
+flagged. Each process writes its stats to ``<pid>.json`` in the stats directory
+every SQL_STATS_INTERVAL seconds and at exit, for ``manage.py query-stats``.
+Files of processes that are gone are kept for STALE_INTERVALS intervals, then
+removed by the next reader.
+"""
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import random
+import logging
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+from airlogger.config import SQL_SLOW_MS, SQL_STATS_DIR, SQL_STATS_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+RESERVOIR_SIZE = 256
+MAX_SHAPES = 500
+EXPLAIN_EVERY = 600      # seconds before a slow shape's plan is refreshed
+SLOW_LOG_EVERY = 60      # seconds between slow-query logs for one shape
+STALE_INTERVALS = 10     # SQL_STATS_INTERVALs an exited process's stats file is kept
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"\?\d*|[:@$][A-Za-z_]\w*")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_SPACE = re.compile(r"\s+")
+
+_shape_cache = {}
+_lock = threading.Lock()
+_stats = {}
+_last_write = 0.0
+
+
+def normalize(sql: str) -> str:
+    """Statement shape: literals and parameters as ?, IN lists collapsed, whitespace squeezed."""
+    shape = _shape_cache.get(sql)
+    if shape is None:
+        shape = _STRING.sub("?", sql)
+        shape = _PARAM.sub("?", shape)
+        shape = _NUMBER.sub("?", shape)
+        shape = _IN_LIST.sub("IN (?...)", shape)
+        shape = _SPACE.sub(" ", shape).strip()
+        if len(_shape_cache) >= 2048:
+            _shape_cache.clear()
+        _shape_cache[sql] = shape
+    return shape
+
+
+class ShapeStats:
+    """Timings for one statement shape."""
+
+    __slots__ = ("count", "total", "max", "samples", "plan", "full_scan", "explained_at", "logged_at", "suppressed")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+        self.plan = None
+        self.full_scan = False
+        self.explained_at = 0.0
+        self.logged_at = 0.0
+        self.suppressed = 0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(seconds)
+        else:
+            # Reservoir sampling keeps a uniform sample of every call so far
+            i = random.randrange(self.count)
+            if i < RESERVOIR_SIZE:
+                self.samples[i] = seconds
+
+    def snapshot(self) -> dict:
+        samples = sorted(self.samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+        return {"count": self.count, "total_ms": round(self.total * 1000, 2),
+                "mean_ms": round(self.total * 1000 / self.count, 3) if self.count else 0.0,
+                "p95_ms": round(p95 * 1000, 3), "max_ms": round(self.max * 1000, 2),
+                "full_scan": self.full_scan, "plan": self.plan}
+
+
+def is_full_scan(plan: List[str]) -> bool:
+    """True if a plan step reads a whole table rather than searching an index."""
+    for detail in plan:
+        if detail.startswith("SCAN ") and not detail.startswith("SCAN CONSTANT ROW") \
+                and "VIRTUAL TABLE" not in detail:
+            return True
+    return False
+
+
+def explain(conn, sql: str, parameters=()) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN details for a statement, or None if it cannot be explained."""
+    if sql.lstrip()[:6].upper() not in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLAC"):
+        return None
+    try:
+        rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+    except sqlite3.Error:
+        return None
+    return [row[-1] for row in rows]
+
+
+def record(sql: str, seconds: float, conn=None, parameters=()) -> None:
+    """Add one statement's time; log (and explain) it if it was slow."""
+    shape = normalize(sql)
+    slow = seconds * 1000 >= SQL_SLOW_MS
+    with _lock:
+        stats = _stats.get(shape)
+        if stats is None:
+            if len(_stats) >= MAX_SHAPES:
+                shape = "(other)"
+                stats = _stats.setdefault(shape, ShapeStats())
+            else:
+                stats = _stats[shape] = ShapeStats()
+        stats.add(seconds)
+        due = time.time() - _last_write >= SQL_STATS_INTERVAL
+    if slow:
+        _slow(stats, shape, sql, seconds, conn, parameters)
+    if due:
+        write_stats()
+
+
+def _slow(stats: ShapeStats, shape: str, sql: str, seconds: float, conn, parameters) -> None:
+    now = time.time()
+    if conn is not None and now - stats.explained_at >= EXPLAIN_EVERY:
+        stats.explained_at = now
+        plan = explain(conn, sql, parameters)
+        if plan is not None:
+            stats.plan = plan
+            stats.full_scan = is_full_scan(plan)
+    if now - stats.logged_at < SLOW_LOG_EVERY:
+        stats.suppressed += 1
+        return
+    suppressed, stats.suppressed, stats.logged_at = stats.suppressed, 0, now
+    more = f" (+{suppressed} slow since last report)" if suppressed else ""
+    plan = "; ".join(stats.plan) if stats.plan else "no plan"
+    logger.warning(f"Slow query {seconds * 1000:.0f} ms{more}: {shape} | plan: {plan}")
+
+
+def snapshot() -> dict:
+    """This process's stats."""
+    with _lock:
+        shapes = {shape: stats.snapshot() for shape, stats in _stats.items()}
+    return {"pid": os.getpid(), "process": os.path.basename(sys.argv[0] or "python"),
+            "updated": time.time(), "shapes": shapes}
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()
+
+
+def stats_dir() -> str:
+    if SQL_STATS_DIR:
+        return SQL_STATS_DIR
+    from airlogger import db
+    return os.path.join(os.path.dirname(os.path.abspath(db.DB_PATH)), "query_stats")
+
+
+def write_stats(create: bool = True) -> None:
+    """Atomically write this process's stats to ``<stats dir>/<pid>.json``."""
+    global _last_write
+    _last_write = time.time()
+    directory = stats_dir()
+    try:
+        if not os.path.isdir(directory):
+            if not create:
+                return
+            os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".stats-", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot(), f)
+        os.replace(tmp, os.path.join(directory, f"{os.getpid()}.json"))
+    except OSError as e:
+        logger.debug(f"Query stats write failed: {e}")
+
+
+# Final write at exit, only where this process has written before
+atexit.register(lambda: _stats and write_stats(create=False))
+
+
+def _running(pid: int, process: str) -> bool:
+    """True if pid is alive and, where /proc can tell, still running ``process``."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, owned by someone else
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            args = f.read().decode(errors="replace").split("\0")
+    except OSError:
+        return True
+    # A reused pid belongs to some other program
+    return any(os.path.basename(arg) == process for arg in args)
+
+
+def load_all(directory: Optional[str] = None) -> Dict[int, dict]:
+    """Stats files from every process, keyed by pid (this process's live stats included).
+
+    A file whose process has exited (or whose pid now runs something else) is
+    dropped once it is older than STALE_INTERVALS x SQL_STATS_INTERVAL.
+    """
+    directory = directory or stats_dir()
+    stale_before = time.time() - STALE_INTERVALS * SQL_STATS_INTERVAL
+    out = {}
+    try:
+        names = [n for n in os.listdir(directory) if n.endswith(".json")]
+    except OSError:
+        names = []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            pid = int(data["pid"])
+            if data.get("updated", 0) < stale_before and not _running(pid, data.get("process", "")):
+                os.remove(path)
+                continue
+            out[pid] = data
+        except (OSError, ValueError, KeyError):
+            continue
+    if _stats:
+        out[os.getpid()] = snapshot()
+    return out
+
+
+def merge(snapshots) -> Dict[str, dict]:
+    """Combine per-process shapes (p95 is the worst of the processes' p95s)."""
+    merged = {}
+    for snap in snapshots:
+        for shape, s in snap.get("shapes", {}).items():
+            m = merged.setdefault(shape, {"count": 0, "total_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0,
+                                          "full_scan": False, "plan": None, "processes": []})
+            m["count"] += s["count"]
+            m["total_ms"] = round(m["total_ms"] + s["total_ms"], 2)
+            m["p95_ms"] = max(m["p95_ms"], s["p95_ms"])
+            m["max_ms"] = max(m["max_ms"], s["max_ms"])
+            m["full_scan"] = m["full_scan"] or s["full_scan"]
+            m["plan"] = m["plan"] or s["plan"]
+            m["processes"].append(snap.get("process"))
+    for m in merged.values():
+        m["mean_ms"] = round(m["total_ms"] / m["count"], 3) if m["count"] else 0.0
+    return merged
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times each statement from execute through its fetch calls."""
+
+    _pending = None  # [sql, parameters, seconds] of the statement whose rows are being read
+
+    def execute(self, sql, parameters=()):
+        if self._pending:
+            self._finish()
+        self.connection.finish_pending()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = self.connection._pending = [sql, parameters, time.perf_counter() - start]
+
+    def executemany(self, sql, seq_of_parameters):
+        if self._pending:
+            self._finish()
+        self.connection.finish_pending()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record(sql, time.perf_counter() - start, None)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add(time.perf_counter() - start, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add(time.perf_counter() - start, not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add(time.perf_counter() - start, True)
+        return rows
+
+    def close(self):
+        if self._pending:
+            self._finish()
+        super().close()
+
+    def _add(self, seconds, done):
+        if self._pending:
+            self._pending[2] += seconds
+            if done:
+                self._finish()
+
+    def _finish(self):
+        sql, parameters, seconds = self._pending
+        self._pending.clear()  # shared with the connection, which must not record it again
+        self._pending = None
+        record(sql, seconds, self.connection, parameters)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``execute`` shortcuts) are TimedCursors."""
+
+    _pending = None  # the latest statement's [sql, parameters, seconds]; empty once recorded
+
+    def finish_pending(self):
+        """Record the latest statement if its cursor never finished reading it."""
+        pending, self._pending = self._pending, None
+        if pending:
+            sql, parameters, seconds = pending
+            pending.clear()
+            record(sql, seconds, self, parameters)
+
+    def close(self):
+        self.finish_pending()
+        super().close()
+
+    def cursor(self, factory=None):
+        return super().cursor(factory or TimedCursor)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,73 @@
+"""Snapshot replica of the flights database for analytical reads.
+
+A background thread copies the live database into a separate file with the
+SQLite online backup API every ``AIRLOGGER_REPLICA_INTERVAL`` seconds. The copy
+is made in a single step, so it is one consistent snapshot: under WAL it reads
+inside one read transaction, which does not block the logger's writes (a
+stepped backup would restart every time the logger committed). It is written to
+a temporary file and then atomically swapped in. Readers that pass
+``analytical=True`` to ``get_read_connection`` are routed to the snapshot.
+"""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from urllib.request import pathname2url
+
+from airlogger import db
+from airlogger.config import REPLICA_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+_refresher = None
+_refresher_lock = threading.Lock()
+
+
+def refresh_replica(src_path=None, dst_path=None) -> float:
+    """Copy the database into the replica file. Returns the time taken in seconds."""
+    src_path = src_path or db.DB_PATH
+    dst_path = dst_path or db.replica_path()
+    tmp_path = dst_path + ".tmp"
+    start = time.perf_counter()
+
+    src = sqlite3.connect(f"file:{pathname2url(os.path.abspath(src_path))}?mode=ro", uri=True)
+    try:
+        dst = sqlite3.connect(tmp_path)
+        try:
+            # All pages in one step: a multi-step backup starts over whenever
+            # another connection writes to the source between steps
+            src.backup(dst, pages=-1)
+            # Snapshot is read-only: a plain rollback journal avoids -wal/-shm files
+            dst.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+    os.replace(tmp_path, dst_path)
+    return time.perf_counter() - start
+
+
+def _refresh_loop(interval: int) -> None:
+    while True:
+        try:
+            elapsed = refresh_replica()
+            logger.debug(f"Replica refreshed in {elapsed:.2f}s")
+        except Exception as e:
+            logger.error(f"Replica refresh failed: {e}")
+        time.sleep(interval)
+
+
+def start_replica_refresher(interval: int = REPLICA_INTERVAL):
+    """Start the background refresher once per process. No-op when disabled."""
+    global _refresher
+    if interval <= 0:
+        return None
+    with _refresher_lock:
+        if _refresher is None or not _refresher.is_alive():
+            _refresher = threading.Thread(target=_refresh_loop, args=(interval,),
+                                          name="replica-refresher", daemon=True)
+            _refresher.start()
+            logger.info(f"Replica mode enabled: refreshing {db.replica_path()} every {interval}s")
+    return _refresher
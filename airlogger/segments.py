@@ -0,0 +1,161 @@
+"""Incremental flight segmentation.
+
+Raw positions are grouped into ``flight_segments``: one row per continuous
+sighting of an aircraft. A new segment starts when an aircraft has not been
+seen for ``SEGMENT_GAP`` seconds or when its callsign changes. The compactor
+walks ``flights`` by id from the last processed row, so it can run after every
+journal apply and also catch up on bulk imports.
+"""
+import time
+import calendar
+import logging
+from typing import Dict, Optional
+
+from airlogger.db import get_write_connection
+from airlogger.config import SEGMENT_GAP
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_FIELDS = ("id", "hex", "callsign", "start_utc", "end_utc", "point_count",
+                   "min_lat", "max_lat", "min_lon", "max_lon", "max_altitude", "max_speed")
+
+
+def _epoch(timestamp_utc: str) -> Optional[int]:
+    try:
+        return calendar.timegm(time.strptime(timestamp_utc[:19], "%Y-%m-%d %H:%M:%S"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _utc(epoch: int) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+def _number(value) -> Optional[float]:
+    try:
+        return float(value) if value not in (None, "") else None
+    except ValueError:
+        return None
+
+
+def _max(a, b):
+    if a is None:
+        return b
+    return a if b is None or a >= b else b
+
+
+def _min(a, b):
+    if a is None:
+        return b
+    return a if b is None or a <= b else b
+
+
+def _find_segment(conn, cache: Dict[str, list], hex_code: str, ts: int, gap: int) -> Optional[dict]:
+    """Most recent segment of this aircraft within `gap` of ts; segments seen in this batch are kept in memory."""
+    near = [seg for seg in cache.get(hex_code, ()) if seg["start"] - gap <= ts <= seg["end"] + gap]
+    if near:
+        return max(near, key=lambda seg: seg["end"])
+    row = conn.execute(f"""
+        SELECT {', '.join(_SEGMENT_FIELDS)} FROM flight_segments
+        WHERE hex = ? AND end_utc >= ? AND start_utc <= ?
+        ORDER BY end_utc DESC LIMIT 1
+    """, (hex_code, _utc(ts - gap), _utc(ts + gap))).fetchone()
+    if row is None:
+        return None
+    for seg in cache.get(hex_code, ()):
+        if seg["id"] == row[0]:
+            return seg
+    seg = dict(zip(_SEGMENT_FIELDS, row))
+    seg["start"], seg["end"] = _epoch(seg["start_utc"]), _epoch(seg["end_utc"])
+    cache.setdefault(hex_code, []).append(seg)
+    return seg
+
+
+def _new_segment(conn, cache, hex_code, callsign, ts) -> dict:
+    utc = _utc(ts)
+    cur = conn.execute(
+        "INSERT INTO flight_segments (hex, callsign, start_utc, end_utc, point_count) VALUES (?, ?, ?, ?, 0)",
+        (hex_code, callsign, utc, utc))
+    seg = {"id": cur.lastrowid, "hex": hex_code, "callsign": callsign, "start_utc": utc, "end_utc": utc,
+           "point_count": 0, "min_lat": None, "max_lat": None, "min_lon": None, "max_lon": None,
+           "max_altitude": None, "max_speed": None, "start": ts, "end": ts}
+    cache.setdefault(hex_code, []).append(seg)
+    return seg
+
+
+def _process_batch(conn, rows, gap: int) -> None:
+    cache: Dict[str, list] = {}
+    touched: Dict[int, dict] = {}
+    assignments = []
+    for flight_id, ts, hex_code, callsign, altitude, speed, lat, lon in rows:
+        if ts is None or not hex_code:
+            continue
+        hex_code = hex_code.upper()
+        callsign = (callsign or "").strip()
+
+        seg = _find_segment(conn, cache, hex_code, ts, gap)
+        if seg is not None and callsign and seg["callsign"] and callsign != seg["callsign"]:
+            seg = None
+        if seg is None:
+            seg = _new_segment(conn, cache, hex_code, callsign, ts)
+        elif callsign and not seg["callsign"]:
+            seg["callsign"] = callsign
+
+        seg["start"], seg["end"] = min(seg["start"], ts), max(seg["end"], ts)
+        seg["point_count"] += 1
+        lat, lon = _number(lat), _number(lon)
+        if lat is not None and lon is not None:
+            seg["min_lat"], seg["max_lat"] = _min(seg["min_lat"], lat), _max(seg["max_lat"], lat)
+            seg["min_lon"], seg["max_lon"] = _min(seg["min_lon"], lon), _max(seg["max_lon"], lon)
+        seg["max_altitude"] = _max(seg["max_altitude"], _number(altitude))
+        seg["max_speed"] = _max(seg["max_speed"], _number(speed))
+        touched[seg["id"]] = seg
+        assignments.append((seg["id"], flight_id))
+
+    conn.executemany("""
+        UPDATE flight_segments SET callsign = ?, start_utc = ?, end_utc = ?, point_count = ?,
+            min_lat = ?, max_lat = ?, min_lon = ?, max_lon = ?, max_altitude = ?, max_speed = ?
+        WHERE id = ?
+    """, [(s["callsign"], _utc(s["start"]), _utc(s["end"]), s["point_count"],
+           s["min_lat"], s["max_lat"], s["min_lon"], s["max_lon"], s["max_altitude"], s["max_speed"], s["id"])
+          for s in touched.values()])
+    conn.executemany("UPDATE flights SET segment_id = ? WHERE id = ?", assignments)
+    if touched:
+        # A late row may change a segment whose track is already stored: move the
+        # tracks watermark back so store_closed_tracks looks at it again
+        earliest_end = _utc(min(s["end"] for s in touched.values()))
+        conn.execute("UPDATE track_state SET closed_until = ? WHERE id = 1 AND closed_until > ?",
+                     (earliest_end, earliest_end))
+
+
+def build_segments(batch_size: int = 5000, gap: int = SEGMENT_GAP) -> int:
+    """Assign all unprocessed flights to segments. Returns the number of rows processed."""
+    processed = 0
+    with get_write_connection() as conn:
+        while True:
+            row = conn.execute("SELECT last_flight_id FROM segment_state WHERE id = 1").fetchone()
+            last_id = row[0] if row else 0
+            rows = conn.execute("""
+                SELECT id, ts, hex, callsign, altitude, speed, lat, lon
+                FROM flights WHERE id > ? ORDER BY id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            _process_batch(conn, rows, gap)
+            conn.execute("INSERT OR REPLACE INTO segment_state (id, last_flight_id) VALUES (1, ?)", (rows[-1][0],))
+            conn.commit()
+            processed += len(rows)
+            if len(rows) < batch_size:
+                break
+    return processed
+
+
+def reset_segments() -> None:
+    """Drop all segments so the next build starts from the first flight."""
+    with get_write_connection() as conn:
+        conn.execute("UPDATE flights SET segment_id = NULL WHERE segment_id IS NOT NULL")
+        conn.execute("DELETE FROM flight_segments")
+        conn.execute("DELETE FROM segment_tracks")
+        conn.execute("DELETE FROM segment_state")
+        conn.execute("DELETE FROM track_state")
+        conn.commit()
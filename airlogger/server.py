@@ -0,0 +1,105 @@
+"""Production WSGI serving for the dashboard.
+
+Prefers gunicorn (pre-forked workers with threads, graceful reload on SIGHUP),
+then waitress (multi-threaded), and falls back to Werkzeug's threaded server.
+Shared state is warmed in the parent before any workers are forked.
+"""
+import os
+import logging
+
+from airlogger import metrics
+from airlogger.config import (
+    DASHBOARD_HOST, DASHBOARD_PORT, DASHBOARD_WORKERS, DASHBOARD_THREADS,
+    DASHBOARD_SERVER, DASHBOARD_TIMEOUT, METRICS_FILE,
+)
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("auto", "gunicorn", "waitress", "werkzeug")
+
+
+def load_app():
+    """Import the Flask app and warm shared caches so forked workers inherit them."""
+    from dashboard import app
+    from airlogger import airlines
+    from airlogger.replica import start_replica_refresher
+
+    airlines.load_overrides(force=True)
+    # Runs in the parent only (gunicorn master), so there is one refresher per server
+    start_replica_refresher()
+    # Compile templates once in the parent
+    app.jinja_env.get_template("index.html")
+    return app
+
+
+def _serve_gunicorn(app, host, port, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class DashboardApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread" if threads > 1 else "sync",
+        "preload_app": True,
+        "timeout": DASHBOARD_TIMEOUT,
+        "graceful_timeout": DASHBOARD_TIMEOUT,
+        "accesslog": None,
+    }
+    if workers > 1:
+        # Each worker has its own registry; share them so any worker can answer /metrics
+        metrics.enable_worker_files(os.path.dirname(METRICS_FILE))
+    logger.info(f"Serving dashboard with gunicorn on {host}:{port} "
+                f"({workers} workers x {threads} threads; SIGHUP reloads gracefully)")
+    DashboardApplication(app, options).run()
+
+
+def _serve_waitress(app, host, port, threads):
+    from waitress import serve as waitress_serve
+
+    logger.info(f"Serving dashboard with waitress on {host}:{port} ({threads} threads)")
+    waitress_serve(app, host=host, port=port, threads=threads)
+
+
+def _serve_werkzeug(app, host, port):
+    from werkzeug.serving import make_server
+
+    logger.info(f"Serving dashboard with Werkzeug (threaded) on {host}:{port}; "
+                "install gunicorn or waitress for a production server")
+    make_server(host, port, app, threaded=True).serve_forever()
+
+
+def serve(host=DASHBOARD_HOST, port=DASHBOARD_PORT, workers=DASHBOARD_WORKERS,
+          threads=DASHBOARD_THREADS, backend=DASHBOARD_SERVER):
+    """Run the dashboard under the best available WSGI server."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown server backend '{backend}' (choose from {', '.join(BACKENDS)})")
+    app = load_app()
+
+    if backend in ("auto", "gunicorn"):
+        try:
+            return _serve_gunicorn(app, host, port, workers, threads)
+        except ImportError:
+            if backend == "gunicorn":
+                raise
+            logger.info("gunicorn not installed, trying waitress")
+    if backend in ("auto", "waitress"):
+        try:
+            return _serve_waitress(app, host, port, threads)
+        except ImportError:
+            if backend == "waitress":
+                raise
+            logger.info("waitress not installed, falling back to Werkzeug")
+    return _serve_werkzeug(app, host, port)
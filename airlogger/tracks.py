@@ -0,0 +1,171 @@
+"""Altitude-aware track simplification with per-segment caching.
+
+Tracks are simplified with Douglas-Peucker in local metres (equirectangular
+projection around the track), with altitude scaled by ``ALT_WEIGHT`` so climbs
+and descents survive simplification. Each zoom level uses a tolerance of
+``TOLERANCE_PX`` screen pixels at that zoom. Closed segments are simplified once
+by the logger and stored in ``segment_tracks``; open segments are simplified on
+request.
+"""
+import json
+import math
+import time
+import logging
+from typing import List, Optional, Sequence, Tuple
+
+from airlogger.config import SEGMENT_GAP
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371008.8
+# Web Mercator metres per pixel at zoom 0 on the equator (256 px tiles)
+METRES_PER_PIXEL_Z0 = 156543.03392
+TOLERANCE_PX = 1.5
+# 1 m of altitude counts as this many metres of horizontal offset
+ALT_WEIGHT = 10.0
+# Stored detail levels (map zooms); at FULL_DETAIL_ZOOM and above raw points are returned
+LEVELS = (6, 8, 10, 12, 14)
+FULL_DETAIL_ZOOM = 15
+
+Point = Tuple[float, float, float]  # lat, lon, altitude (ft)
+
+
+def tolerance_for_zoom(zoom: int, lat: float) -> float:
+    """Simplification tolerance in metres for a map zoom at a latitude."""
+    return TOLERANCE_PX * METRES_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / (2 ** zoom)
+
+
+def level_for_zoom(zoom: int) -> Optional[int]:
+    """Stored level to serve for a map zoom (None means full detail)."""
+    if zoom >= FULL_DETAIL_ZOOM:
+        return None
+    eligible = [level for level in LEVELS if level <= zoom]
+    return eligible[-1] if eligible else LEVELS[0]
+
+
+def _project(points: Sequence[Point]) -> List[Tuple[float, float, float]]:
+    lat0 = math.radians(sum(p[0] for p in points) / len(points))
+    k = EARTH_RADIUS_M * math.cos(lat0)
+    return [(k * math.radians(lon), EARTH_RADIUS_M * math.radians(lat), alt * 0.3048 * ALT_WEIGHT)
+            for lat, lon, alt in points]
+
+
+def _distance_sq(p, a, b) -> float:
+    """Squared distance from p to segment ab (3D)."""
+    abx, aby, abz = b[0] - a[0], b[1] - a[1], b[2] - a[2]
+    apx, apy, apz = p[0] - a[0], p[1] - a[1], p[2] - a[2]
+    denom = abx * abx + aby * aby + abz * abz
+    t = 0.0 if denom == 0 else max(0.0, min(1.0, (apx * abx + apy * aby + apz * abz) / denom))
+    dx, dy, dz = apx - t * abx, apy - t * aby, apz - t * abz
+    return dx * dx + dy * dy + dz * dz
+
+
+def simplify(points: Sequence[Point], tolerance_m: float) -> List[Point]:
+    """Iterative Douglas-Peucker; keeps the endpoints and every point further than tolerance."""
+    n = len(points)
+    if n < 3:
+        return list(points)
+    xyz = _project(points)
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol_sq = tolerance_m * tolerance_m
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        a, b = xyz[first], xyz[last]
+        worst, worst_i = tol_sq, -1
+        for i in range(first + 1, last):
+            d = _distance_sq(xyz[i], a, b)
+            if d > worst:
+                worst, worst_i = d, i
+        if worst_i != -1:
+            keep[worst_i] = True
+            stack.append((first, worst_i))
+            stack.append((worst_i, last))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def simplify_levels(points: Sequence[Point]) -> dict:
+    """Simplified track for every stored level."""
+    if not points:
+        return {level: [] for level in LEVELS}
+    mid_lat = sum(p[0] for p in points) / len(points)
+    return {level: simplify(points, tolerance_for_zoom(level, mid_lat)) for level in LEVELS}
+
+
+def _altitude(value) -> float:
+    try:
+        return float(str(value).replace(',', '')) if value not in (None, '') else 0.0
+    except ValueError:
+        return 0.0
+
+
+def load_points(conn, segment_id: int) -> List[Point]:
+    """Positioned points of a segment in time order."""
+    rows = conn.execute('''
+        SELECT lat, lon, altitude FROM flights
+        WHERE segment_id = ? AND lat <> '' AND lon <> ''
+        ORDER BY timestamp_utc, id
+    ''', (segment_id,)).fetchall()
+    points = []
+    for lat, lon, alt in rows:
+        try:
+            points.append((float(lat), float(lon), _altitude(alt)))
+        except (TypeError, ValueError):
+            continue
+    return points
+
+
+def encode_coords(points: Sequence[Point]) -> list:
+    return [[round(lat, 5), round(lon, 5), int(alt)] for lat, lon, alt in points]
+
+
+def segment_coords(conn, segment_id: int, point_count: int, zoom: int) -> list:
+    """Coordinates of a segment at the detail level for a zoom, from the cache when current."""
+    level = level_for_zoom(zoom)
+    if level is not None:
+        row = conn.execute(
+            "SELECT source_points, coords FROM segment_tracks WHERE segment_id = ? AND level = ?",
+            (segment_id, level)).fetchone()
+        if row and row[0] == point_count:
+            return json.loads(row[1])
+    points = load_points(conn, segment_id)
+    if level is None:
+        return encode_coords(points)
+    mid_lat = sum(p[0] for p in points) / len(points) if points else 0.0
+    return encode_coords(simplify(points, tolerance_for_zoom(level, mid_lat)))
+
+
+def store_closed_tracks(limit: int = 200, gap: int = SEGMENT_GAP) -> int:
+    """Simplify and store tracks for closed segments that are missing or out of date.
+
+    Only segments that closed since the last run are examined: ``track_state``
+    keeps the end time up to which every closed segment has been stored, and
+    ``build_segments`` moves it back when a late row changes an older segment.
+    """
+    from airlogger.db import get_write_connection
+
+    cutoff = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - gap))
+    stored = 0
+    with get_write_connection() as conn:
+        row = conn.execute("SELECT closed_until FROM track_state WHERE id = 1").fetchone()
+        closed_until = row[0] if row else ""
+        pending = conn.execute('''
+            SELECT s.id, s.point_count, s.end_utc FROM flight_segments s
+            LEFT JOIN segment_tracks t ON t.segment_id = s.id AND t.level = ?
+            WHERE s.end_utc >= ? AND s.end_utc < ?
+              AND (t.segment_id IS NULL OR t.source_points != s.point_count)
+            ORDER BY s.end_utc LIMIT ?
+        ''', (LEVELS[0], closed_until, cutoff, limit)).fetchall()
+        for segment_id, point_count, _ in pending:
+            levels = simplify_levels(load_points(conn, segment_id))
+            conn.executemany(
+                "INSERT OR REPLACE INTO segment_tracks (segment_id, level, source_points, coords) VALUES (?, ?, ?, ?)",
+                [(segment_id, level, point_count, json.dumps(encode_coords(points), separators=(',', ':')))
+                 for level, points in levels.items()])
+            stored += 1
+        # A full batch may have left segments ending at the same time for the next run
+        closed_until = pending[-1][2] if len(pending) == limit else cutoff
+        conn.execute("INSERT OR REPLACE INTO track_state (id, closed_until) VALUES (1, ?)", (closed_until,))
+        conn.commit()
+    return stored
@@ -1,7 +1,10 @@
+import time
 import pytz
 import logging
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta, timezone
 from airlogger.config import TIMEZONE as TIMEZONE_CONFIG
+from airlogger.airlines import iata_flight_number
 
 logger = logging.getLogger(__name__)
 
@@ -31,15 +34,76 @@ if not LOCAL_TZ:
     except Exception:
         LOCAL_TZ = pytz.utc
 
+UTC = timezone.utc
+
+# UTC offset (seconds) per UTC hour bucket; None marks an hour containing a DST change
+_offset_cache = {}
+_day_cache = {}
+_CACHE_LIMIT = 100000
+
+def utc_epoch(utc_str):
+    """Epoch seconds for a UTC 'YYYY-MM-DD HH:MM:SS[.ffffff]' string, or None if malformed."""
+    try:
+        return calendar.timegm((int(utc_str[0:4]), int(utc_str[5:7]), int(utc_str[8:10]),
+                                int(utc_str[11:13]), int(utc_str[14:16]), int(utc_str[17:19])))
+    except (TypeError, ValueError):
+        return None
+
+def utc_offset(epoch):
+    """Local UTC offset in seconds at an epoch, cached per hour."""
+    bucket = epoch // 3600
+    offset = _offset_cache.get(bucket, False)
+    if offset is False:
+        if len(_offset_cache) > _CACHE_LIMIT:
+            _offset_cache.clear()
+        start = datetime.fromtimestamp(bucket * 3600, LOCAL_TZ).utcoffset()
+        end = datetime.fromtimestamp(bucket * 3600 + 3599, LOCAL_TZ).utcoffset()
+        offset = _offset_cache[bucket] = int(start.total_seconds()) if start == end else None
+    if offset is None:
+        return int(datetime.fromtimestamp(epoch, LOCAL_TZ).utcoffset().total_seconds())
+    return offset
+
+def format_local(epoch):
+    """Local 'YYYY-MM-DD HH:MM:SS' for epoch seconds (None passes through)."""
+    if epoch is None:
+        return None
+    local = int(epoch) + utc_offset(int(epoch))
+    day, secs = divmod(local, 86400)
+    day_str = _day_cache.get(day)
+    if day_str is None:
+        if len(_day_cache) > _CACHE_LIMIT:
+            _day_cache.clear()
+        day_str = _day_cache[day] = time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+    return f"{day_str} {secs // 3600:02d}:{secs // 60 % 60:02d}:{secs % 60:02d}"
+
+_SECONDS = [f"{i:02d}" for i in range(60)]
+
+def format_local_many(epochs):
+    """format_local over a sequence of epochs, reusing the 'YYYY-MM-DD HH:MM:' prefix per minute."""
+    out = []
+    append = out.append
+    offsets = _offset_cache
+    prefixes = {}
+    for epoch in epochs:
+        if epoch is None:
+            append(None)
+            continue
+        offset = offsets.get(epoch // 3600)
+        local = epoch + (offset if offset is not None else utc_offset(epoch))
+        minute, second = divmod(local, 60)
+        prefix = prefixes.get(minute)
+        if prefix is None:
+            prefix = prefixes[minute] = format_local(epoch)[:17]
+        append(prefix + _SECONDS[second])
+    return out
+
 def convert_to_local(utc_str):
     """Convert UTC string (YYYY-MM-DD HH:MM:SS) to local datetime."""
     try:
         if not utc_str: return None
         # Handle formats with or without microseconds
         fmt = "%Y-%m-%d %H:%M:%S.%f" if "." in utc_str else "%Y-%m-%d %H:%M:%S"
-        utc_time = datetime.strptime(utc_str, fmt).replace(
-            tzinfo=ZoneInfo("UTC") if HAS_ZONEINFO else pytz.utc
-        )
+        utc_time = datetime.strptime(utc_str, fmt).replace(tzinfo=UTC)
         if LOCAL_TZ:
             return utc_time.astimezone(LOCAL_TZ)
         return utc_time
@@ -47,6 +111,21 @@ def convert_to_local(utc_str):
         logger.debug(f"Error converting {utc_str} to local: {e}")
         return None
 
+def local_day_epoch_bounds(date_str):
+    """Epoch seconds [start, end) of a local calendar day."""
+    day = datetime.strptime(date_str, "%Y-%m-%d")
+    bounds = []
+    for dt in (day, day + timedelta(days=1)):
+        local = LOCAL_TZ.localize(dt) if hasattr(LOCAL_TZ, 'localize') else dt.replace(tzinfo=LOCAL_TZ)
+        bounds.append(int(local.timestamp()))
+    return bounds[0], bounds[1]
+
+def local_day_utc_bounds(date_str):
+    """UTC 'YYYY-MM-DD HH:MM:SS' strings for the start and end of a local calendar day."""
+    start, end = local_day_epoch_bounds(date_str)
+    fmt = '%Y-%m-%d %H:%M:%S'
+    return time.strftime(fmt, time.gmtime(start)), time.strftime(fmt, time.gmtime(end - 1))
+
 def get_local_time(utc_time_str):
     """Convert UTC time string to local time formatted string."""
     dt = convert_to_local(utc_time_str)
@@ -56,19 +135,4 @@ def get_local_time(utc_time_str):
 
 def get_fr24_callsign(callsign):
     """Convert ICAO callsign to IATA-ish flight number for FR24 links."""
-    if not callsign: return ""
-    c = callsign.upper().strip()
-    
-    # Mapping for major world airlines
-    mapping = {
-        "QFA": "QF", "JST": "JQ", "VOZ": "VA", "ANZ": "NZ", "BAW": "BA", "DLH": "LH", "UAE": "EK",
-        "AAL": "AA", "DAL": "DL", "UAL": "UA", "SWA": "WN", "AFR": "AF", "KLM": "KL",
-        "RYR": "FR", "EZY": "U2", "THY": "TK", "QTR": "QR", "ETD": "EY", "CXA": "MF", "CPA": "CX",
-        "ANA": "NH", "JAL": "JL", "KAL": "KE", "SIA": "SQ", "AIC": "AI", "IBE": "IB", "TAP": "TP",
-        "FIN": "AY", "SAS": "SK", "SWR": "LX", "AUA": "OS", "BEL": "SN", "LOT": "LO", "CSA": "OK"
-    }
-    
-    prefix = c[:3]
-    if prefix in mapping:
-        return mapping[prefix] + c[3:]
-    return c
+    return iata_flight_number(callsign)
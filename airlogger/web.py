@@ -1,9 +1,9 @@
 import logging
 from collections import Counter
-from datetime import datetime, time as dt_time, timedelta
+from datetime import datetime
 from flask import Blueprint, render_template, request
-from airlogger.db import get_db_connection
-from airlogger.utils import convert_to_local, LOCAL_TZ, get_fr24_callsign
+from airlogger.db import get_read_connection
+from airlogger.utils import local_day_epoch_bounds, format_local_many, LOCAL_TZ, get_fr24_callsign
 from airlogger import config
 from airlogger.config import VERSION, HEALTH_THRESHOLD, HEARTBEAT_FILE
 import os
@@ -18,33 +18,47 @@ def fr24_callsign_filter(s):
 
 logger = logging.getLogger(__name__)
 
+METADATA_FIELDS = ("Registration", "Model", "Operator", "Callsign")
+
+def fill_from_same_hex(data, hexes):
+    """Fill blank metadata on rows of ``hexes`` from that hex's other rows.
+
+    Only rows `manage.py backfill-metadata` has not reached yet need this; backfilled
+    rows carry their metadata in the database.
+    """
+    rows = [row for row in data if row["Hex"] in hexes]
+    best = {}
+    for row in rows:
+        known = best.setdefault(row["Hex"], dict.fromkeys(METADATA_FIELDS, ""))
+        for field in METADATA_FIELDS:
+            if len(row[field]) > len(known[field]):
+                known[field] = row[field]
+    for row in rows:
+        known = best[row["Hex"]]
+        for field in METADATA_FIELDS:
+            if not row[field]:
+                row[field] = known[field]
+
 def load_historical_data(target_date_str):
     """Load and process historical data for a specific date."""
     try:
-        target_date = datetime.strptime(target_date_str, "%Y-%m-%d").date()
+        day_start, day_end = local_day_epoch_bounds(target_date_str)
     except Exception:
         return [], 0, 0, [], []
 
-    # Simple logic for determining UTC overlap
-    # In a real app we'd query precisely, but this works for local/UTC edge cases
-    utc_dates = [target_date - timedelta(days=1), target_date, target_date + timedelta(days=1)]
-    utc_dates_str = [str(d) for d in utc_dates]
-    placeholders = ','.join('?' for _ in utc_dates_str)
-
     aircraft_data = []
-    hex_metadata = {}
+    incomplete = set()
 
     try:
-        with get_db_connection() as conn:
+        with get_read_connection(analytical=True) as conn:
             cursor = conn.cursor()
-            query = f"SELECT * FROM flights WHERE date(timestamp_utc) IN ({placeholders})"
-            cursor.execute(query, utc_dates_str)
-            
-            for row in cursor.fetchall():
-                local_time = convert_to_local(row['timestamp_utc'])
-                if not local_time or local_time.date() != target_date:
-                    continue
-                
+            cursor.execute(
+                "SELECT * FROM flights WHERE ts >= ? AND ts < ? ORDER BY ts DESC, id DESC",
+                (day_start, day_end))
+            rows = cursor.fetchall()
+            local_times = format_local_many([row['ts'] for row in rows])
+
+            for row, local_time in zip(rows, local_times):
                 # Sanity
                 try:
                     alt = int(row['altitude']) if row['altitude'] else 0
@@ -53,7 +67,7 @@ def load_historical_data(target_date_str):
                 except: pass
 
                 row_dict = {
-                    "Time Local": local_time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "Time Local": local_time,
                     "Hex": row['hex'].upper(),
                     "Callsign": row['callsign'] or "",
                     "Altitude": row['altitude'] or "",
@@ -63,44 +77,41 @@ def load_historical_data(target_date_str):
                     "Longitude": row['lon'] or "",
                     "Registration": row['registration'] or "",
                     "Model": row['model'] or "",
-                    "Operator": row['operator'] or ""
+                    "Operator": row['operator'] or "",
+                    "Segment": row['segment_id'] or ""
                 }
-                
-                hex_code = row_dict["Hex"]
-                if hex_code:
-                    if hex_code not in hex_metadata:
-                        hex_metadata[hex_code] = {"Registration": "", "Model": "", "Operator": "", "Callsign": ""}
-                    for field in ["Registration", "Model", "Operator", "Callsign"]:
-                        val = row_dict[field]
-                        if val and len(val) > len(hex_metadata[hex_code][field]):
-                            hex_metadata[hex_code][field] = val
-                
+                if not (row_dict["Registration"] and row_dict["Model"] and row_dict["Operator"]):
+                    incomplete.add(row_dict["Hex"])
                 aircraft_data.append(row_dict)
 
-        # Apply metadata & stats
-        operator_counts = Counter()
-        model_counts = Counter()
-        unique_hexes = set()
-
-        for row in aircraft_data:
-            hex_code = row["Hex"]
-            unique_hexes.add(hex_code)
-            meta = hex_metadata.get(hex_code, {})
-            for field in ["Registration", "Model", "Operator", "Callsign"]:
-                if not row.get(field) and meta.get(field):
-                    row[field] = meta[field]
-        
-        for hex_code in unique_hexes:
-            meta = hex_metadata.get(hex_code, {})
-            if meta.get("Operator"): operator_counts[meta["Operator"]] += 1
-            if meta.get("Model"): model_counts[meta["Model"]] += 1
-
-        aircraft_data.sort(key=lambda x: x.get("Time Local", ""), reverse=True)
-        return aircraft_data, len(aircraft_data), len(unique_hexes), operator_counts.most_common(5), model_counts.most_common(5)
+        if incomplete:
+            fill_from_same_hex(aircraft_data, incomplete)
+
+        # One operator/model per aircraft for the summary
+        operators = {row["Hex"]: row["Operator"] for row in aircraft_data}
+        models = {row["Hex"]: row["Model"] for row in aircraft_data}
+        operator_counts = Counter(op for op in operators.values() if op)
+        model_counts = Counter(model for model in models.values() if model)
+
+        return aircraft_data, len(aircraft_data), len(operators), operator_counts.most_common(5), model_counts.most_common(5)
     except Exception as e:
         logger.error(f"Error loading historical data: {e}")
         return [], 0, 0, [], []
 
+# Row dict key for each column shipped to the dashboard
+TABLE_COLUMNS = {
+    "time": "Time Local", "hex": "Hex", "callsign": "Callsign", "reg": "Registration",
+    "model": "Model", "operator": "Operator", "alt": "Altitude", "speed": "Speed",
+    "track": "Track", "lat": "Latitude", "lon": "Longitude", "segment": "Segment",
+}
+
+def table_columns(data):
+    """Historical rows as one list per column, plus FR24 flight numbers for callsign links."""
+    columns = {name: [row[key] for row in data] for name, key in TABLE_COLUMNS.items()}
+    flights = {c: get_fr24_callsign(c) for c in set(columns["callsign"]) if c}
+    columns["flight"] = [flights.get(c, "") for c in columns["callsign"]]
+    return columns
+
 @web_bp.route("/")
 def index():
     date_str = request.args.get("date")
@@ -129,6 +140,7 @@ def index():
 
     return render_template("index.html", 
                            data=data, 
+                           table_columns=table_columns(data), 
                            summary=summary, 
                            selected_date=selected_date, 
                            max_date=today_local, 
@@ -3,11 +3,15 @@ import logging
 from airlogger.config import DASHBOARD_HOST, DASHBOARD_PORT
 from airlogger.web import web_bp
 from airlogger.api import api_bp
+from airlogger.admin import admin_bp
+from airlogger.profiling import install_signal_handler
+from airlogger.replica import start_replica_refresher
 
 # Flask App Initialization
 app = Flask(__name__)
 app.register_blueprint(web_bp)
 app.register_blueprint(api_bp)
+app.register_blueprint(admin_bp)
 
 # Simple logging setup for the entry point
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
@@ -15,4 +19,6 @@ logger = logging.getLogger('dashboard')
 
 if __name__ == "__main__":
     logger.info(f"Starting Aircraft Dashboard on {DASHBOARD_HOST}:{DASHBOARD_PORT}...")
+    start_replica_refresher()
+    install_signal_handler('dashboard')
     app.run(host=DASHBOARD_HOST, port=DASHBOARD_PORT)
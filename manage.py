@@ -3,6 +3,7 @@ import argparse
 import subprocess
 import sys
 import os
+from airlogger import config
 
 def run_logger():
     print("Starting Aircraft Logger...")
@@ -12,26 +13,139 @@ def run_dashboard():
     print("Starting Aircraft Dashboard...")
     subprocess.run([sys.executable, "dashboard.py"])
 
+def serve(args):
+    print("Starting Aircraft Dashboard (production server)...")
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    from airlogger.server import serve as run_server
+    run_server(host=args.host, port=args.port, workers=args.workers,
+               threads=args.threads, backend=args.backend)
+
 def migrate_db():
     print("Running database migrations...")
     from airlogger.db import init_db
     init_db()
     print("Database is up to date.")
 
+def refresh_replica():
+    print("Refreshing read replica...")
+    from airlogger.db import replica_path
+    from airlogger.replica import refresh_replica as run_refresh
+    elapsed = run_refresh()
+    print(f"Replica {replica_path()} refreshed in {elapsed:.2f}s.")
+
 def cleanup():
     print("Running manual cleanup...")
     from airlogger.core import cleanup_old_logs
     cleanup_old_logs()
     print("Cleanup complete.")
 
+def backfill_metadata(args):
+    print(f"Backfilling missing metadata since {args.since}...")
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    from airlogger.backfill import backfill_metadata as run_backfill
+    state = run_backfill(args.since, batch_size=args.batch_size, pause=args.pause,
+                         lookups_per_minute=args.rate, offline=args.offline,
+                         restart=args.restart)
+    print(f"Backfill complete: {state['resolved']} hexes resolved, {state['rows_updated']} rows updated.")
+
+def build_segments(args):
+    print("Building flight segments...")
+    from airlogger.db import init_db
+    from airlogger.segments import build_segments as run_build, reset_segments
+    init_db()
+    if args.rebuild:
+        reset_segments()
+    processed = run_build(batch_size=args.batch_size)
+    print(f"Segments up to date ({processed} positions processed).")
+
+def rebuild_coverage():
+    print("Rebuilding coverage aggregates...")
+    from airlogger.db import init_db
+    from airlogger.coverage import update_coverage, reset_coverage
+    init_db()
+    reset_coverage()
+    processed = update_coverage()
+    print(f"Coverage rebuilt from {processed} positions.")
+
+def stats():
+    import time
+    from airlogger.latency import read_snapshots, STAGES
+    snapshots = read_snapshots()
+    if not any(snapshots.values()):
+        print(f"No latency data yet (the logger writes {config.LATENCY_FILE} on each heartbeat).")
+        return
+    print(f"{'stage':<10}{'count':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for process, snap in snapshots.items():
+        if not snap:
+            continue
+        for stage in STAGES:
+            row = snap["stages"].get(stage)
+            if row:
+                cells = [row["count"]] + ["-" if row[k] is None else row[k] for k in ("p50_ms", "p90_ms", "p99_ms", "max_ms")]
+                print(f"{stage:<10}" + "".join(f"{c:>10}" for c in cells))
+    for process, snap in snapshots.items():
+        if snap:
+            queued = f", {snap['queued']} rows awaiting commit" if snap.get("queued") else ""
+            print(f"{process}: updated {time.time() - snap['updated']:.0f}s ago{queued}")
+
+def query_stats(args):
+    import shutil
+    from airlogger.querystats import load_all, merge, stats_dir
+    if args.reset:
+        shutil.rmtree(stats_dir(), ignore_errors=True)
+        print(f"Removed {stats_dir()}.")
+        return
+    snapshots = load_all()
+    if not snapshots:
+        print(f"No query stats yet in {stats_dir()}.")
+        return
+    shapes = merge(snapshots.values())
+    key = {"total": "total_ms", "p95": "p95_ms", "count": "count", "max": "max_ms"}[args.sort]
+    print(f"{len(snapshots)} process(es): " + ", ".join(f"{s['process']}[{pid}]" for pid, s in snapshots.items()))
+    print(f"{'count':>9}{'total ms':>12}{'mean ms':>10}{'p95 ms':>10}{'max ms':>10}  scan  statement")
+    for shape, s in sorted(shapes.items(), key=lambda item: item[1][key], reverse=True)[:args.limit]:
+        statement = shape if len(shape) <= 100 else shape[:97] + "..."
+        print(f"{s['count']:>9}{s['total_ms']:>12.1f}{s['mean_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['max_ms']:>10.1f}"
+              f"  {'FULL' if s['full_scan'] else '    '}  {statement}")
+        if args.plans and s["plan"]:
+            for detail in s["plan"]:
+                print(f"{'':>55}  {detail}")
+
 def main():
     parser = argparse.ArgumentParser(description="Aircraft Logger Management Tool")
     subparsers = parser.add_subparsers(dest="command")
 
     subparsers.add_parser("run-logger", help="Start the aircraft logger service")
     subparsers.add_parser("run-dashboard", help="Start the dashboard web server")
+    serve_parser = subparsers.add_parser("serve", help="Serve the dashboard with a production WSGI server")
+    serve_parser.add_argument("--host", default=config.DASHBOARD_HOST)
+    serve_parser.add_argument("--port", type=int, default=config.DASHBOARD_PORT)
+    serve_parser.add_argument("--workers", type=int, default=config.DASHBOARD_WORKERS, help="Worker processes (gunicorn only)")
+    serve_parser.add_argument("--threads", type=int, default=config.DASHBOARD_THREADS, help="Threads per worker")
+    serve_parser.add_argument("--backend", default=config.DASHBOARD_SERVER, choices=["auto", "gunicorn", "waitress", "werkzeug"])
     subparsers.add_parser("migrate", help="Initialize or migrate the database")
     subparsers.add_parser("cleanup", help="Manually trigger log cleanup")
+    subparsers.add_parser("refresh-replica", help="Refresh the analytical read replica once")
+    subparsers.add_parser("stats", help="Show rolling ingest latency percentiles per pipeline stage")
+    qstats = subparsers.add_parser("query-stats", help="Show SQL timings per statement shape across processes")
+    qstats.add_argument("--sort", choices=("total", "p95", "count", "max"), default="total")
+    qstats.add_argument("--limit", type=int, default=20)
+    qstats.add_argument("--plans", action="store_true", help="Show the EXPLAIN QUERY PLAN of slow statements")
+    qstats.add_argument("--reset", action="store_true", help="Delete all stats files")
+    subparsers.add_parser("rebuild-coverage", help="Rebuild the coverage heatmap and range-by-bearing tables")
+    segments = subparsers.add_parser("build-segments", help="Group new positions into flight segments")
+    segments.add_argument("--rebuild", action="store_true", help="Discard existing segments and rebuild from scratch")
+    segments.add_argument("--batch-size", type=int, default=5000, help="Positions per transaction (default 5000)")
+
+    backfill = subparsers.add_parser("backfill-metadata", help="Fill in missing registration/model/operator on past rows")
+    backfill.add_argument("--since", required=True, help="UTC date (YYYY-MM-DD) to backfill from")
+    backfill.add_argument("--batch-size", type=int, default=50, help="Hexes per batch (default 50)")
+    backfill.add_argument("--pause", type=float, default=1.0, help="Seconds to sleep between batches (default 1.0)")
+    backfill.add_argument("--rate", type=float, default=60, help="Max network lookups per minute (default 60)")
+    backfill.add_argument("--offline", action="store_true", help="Only use the cache and existing rows, no network")
+    backfill.add_argument("--restart", action="store_true", help="Ignore saved progress and start over")
 
     args = parser.parse_args()
 
@@ -39,10 +153,24 @@ def main():
         run_logger()
     elif args.command == "run-dashboard":
         run_dashboard()
+    elif args.command == "serve":
+        serve(args)
     elif args.command == "migrate":
         migrate_db()
     elif args.command == "cleanup":
         cleanup()
+    elif args.command == "refresh-replica":
+        refresh_replica()
+    elif args.command == "stats":
+        stats()
+    elif args.command == "query-stats":
+        query_stats(args)
+    elif args.command == "rebuild-coverage":
+        rebuild_coverage()
+    elif args.command == "build-segments":
+        build_segments(args)
+    elif args.command == "backfill-metadata":
+        backfill_metadata(args)
     else:
         parser.print_help()
 
@@ -11,8 +11,8 @@ import json
 import os
 from datetime import datetime
 
-# File to store discovered operators
-OPERATORS_FILE = os.path.expanduser("~/.opensky_operators.json")
+from airlogger import airlines
+from airlogger.config import OPERATORS_FILE
 
 # Load custom operators from file
 def load_custom_operators():
@@ -126,101 +126,10 @@ def get_operator_info(callsign, origin_country, prompt_new=True):
     
     prefix = callsign[:3] if len(callsign) >= 3 else callsign
     
-    # Check custom operators file first (user-discovered operators)
-    custom_operators = load_custom_operators()
-    if prefix in custom_operators:
-        return f"{custom_operators[prefix]} ({prefix})"
-    
-    # Common airline prefixes (first 3 characters of callsign)
-    airline_prefixes = {
-        "BAW": "British Airways",
-        "SHT": "British Airways (Shuttle)",
-        "EZY": "easyJet",
-        "BEE": "Flybe",
-        "RYR": "Ryanair",
-        "STN": "Ryanair",
-        "WZZ": "Wizz Air",
-        "DLH": "Lufthansa",
-        "GWI": "Germanwings",
-        "AFR": "Air France",
-        "KLM": "KLM Royal Dutch Airlines",
-        "DLX": "Delta Air Lines",
-        "AAL": "American Airlines",
-        "UAL": "United Airlines",
-        "SWA": "Southwest Airlines",
-        "JBU": "JetBlue Airways",
-        "QFA": "Qantas",
-        "Qantas": "Qantas",
-        "ANZ": "Air New Zealand",
-        "VA": "Virgin Australia",
-        "vir": "Virgin Atlantic",
-        "VIR": "Virgin Atlantic",
-        "UAE": "Emirates",
-        "QTR": "Qatar Airways",
-        "ETD": "Etihad Airways",
-        "SIA": "Singapore Airlines",
-        "HKG": "Hong Kong Airlines",
-        "CPA": "Cathay Pacific",
-        "JAL": "Japan Airlines",
-        "ANA": "All Nippon Airways",
-        "KAL": "Korean Air",
-        "ASN": "Korean Air",
-        "TAM": "LATAM Airlines",
-        "LAN": "LATAM Airlines",
-        "GLO": "Gol Linhas Aéreas",
-        "AZA": "ITA Airways",
-        "IBE": "Iberia",
-    "JST": "Jetstar",
-        "AVA": "Avianca",
-        "LAN": "LATAM Chile",
-        "LPE": "LATAM Express",
-        "LPC": "LATAM Paraguay",
-        "LPL": "LATAM Perú",
-        "TUI": "TUI Airways",
-        "CFG": "Condor",
-        "SAS": "SAS Scandinavian Airlines",
-        "FIN": "Finnair",
-        "AAR": "Asiana Airlines",
-        "CSN": "China Southern Airlines",
-        "CCA": "Air China",
-        "CES": "China Eastern Airlines",
-        "CKK": "China Cargo Airline",
-        "HYA": "Hainan Airlines",
-        "SQA": "SF Airlines",
-        "XJC": "Hong Kong Express",
-        "CPE": "Cope",
-        "CFE": "BA CityFlyer",
-        "EXS": "Jet2.com",
-        "GAW": "Gandalf Airways",
-        "GLG": "AeroLease",
-        "HSR": "Air Saint Pierre",
-        "HZT": "Air Horizont",
-        "JEA": "Northeaster",
-        "JKK": "Binter Canarias",
-        "JSY": "Jalways",
-        "LGL": "Luxair",
-        "LRC": "Lufthansa CityLine",
-        "LXB": "Luxair",
-        "OCN": "Air Charter Services",
-        "OHY": "Onur Air",
-        "SXS": "SunExpress",
-        "TNT": "FedEx",
-        "UPS": "UPS Airlines",
-        "FDX": "FedEx",
-        "CLX": "Cargolux",
-        "GTI": "Atlas Air",
-        "ABX": "ABX Air",
-        "CAL": "China Airlines",
-        "EVA": "EVA Air",
-        "BOX": "Polar Air Cargo",
-        "PAC": "Polar Air Cargo",
-        "NCA": "Nippon Cargo Airlines",
-    }
-    
-    prefix = callsign[:3] if len(callsign) >= 3 else callsign
-    
-    if prefix in airline_prefixes:
-        return f"{airline_prefixes[prefix]} ({prefix})"
+    # Shared designator table (user overrides from ~/.opensky_operators.json first)
+    operator = airlines.operator_name(prefix)
+    if operator:
+        return f"{operator} ({prefix})"
     
     # Try to guess from country
     country_airlines = {
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Benchmark dashboard throughput and tail latency.
+
+Hammers `/api/live_flights` and `/` with concurrent clients and reports
+requests/sec, p50 and p99 per path.
+
+Usage:
+  # Benchmark an already running server
+  python3 scripts/bench_dashboard.py --url http://localhost:5000
+
+  # Start the Flask dev server and `manage.py serve` in turn and compare them
+  python3 scripts/bench_dashboard.py --compare
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DEFAULT_PATHS = ['/api/live_flights', '/']
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))]
+
+
+def bench_path(base_url, path, concurrency, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        session = requests.Session()
+        local, local_errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                r = session.get(base_url + path, timeout=30)
+                if r.status_code >= 500:
+                    local_errors += 1
+            except requests.RequestException:
+                local_errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def bench(base_url, paths, concurrency, duration):
+    return {path: bench_path(base_url, path, concurrency, duration) for path in paths}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(base_url + '/health', timeout=2)
+            return True
+        except requests.RequestException:
+            time.sleep(0.2)
+    return False
+
+
+def spawn(cmd, port):
+    env = dict(os.environ, AIRLOGGER_DASHBOARD_PORT=str(port), AIRLOGGER_DASHBOARD_HOST='127.0.0.1')
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def print_results(label, results):
+    print(f'\n{label}')
+    print(f"  {'path':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for path, r in results.items():
+        print(f"  {path:<22}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['errors']:>8}")
+
+
+def main():
+    p = argparse.ArgumentParser()
+    p.add_argument('--url', help='Base URL of a running dashboard')
+    p.add_argument('--compare', action='store_true', help='Start dev server and manage.py serve and compare')
+    p.add_argument('--path', action='append', dest='paths', help='Path to benchmark (repeatable)')
+    p.add_argument('--concurrency', type=int, default=8)
+    p.add_argument('--duration', type=float, default=10.0, help='Seconds per path')
+    p.add_argument('--workers', type=int, default=2)
+    p.add_argument('--threads', type=int, default=4)
+    args = p.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    if args.url:
+        print_results(args.url, bench(args.url.rstrip('/'), paths, args.concurrency, args.duration))
+        return
+    if not args.compare:
+        p.error('either --url or --compare is required')
+
+    servers = [
+        ('Flask dev server (dashboard.py)', [sys.executable, 'dashboard.py']),
+        (f'manage.py serve ({args.workers} workers x {args.threads} threads)',
+         [sys.executable, 'manage.py', 'serve', '--host', '127.0.0.1',
+          '--workers', str(args.workers), '--threads', str(args.threads)]),
+    ]
+    for label, cmd in servers:
+        port = free_port()
+        if '--host' in cmd:
+            cmd = cmd + ['--port', str(port)]
+        proc = spawn(cmd, port)
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            if not wait_ready(base_url):
+                print(f'\n{label}: did not start')
+                continue
+            print_results(label, bench(base_url, paths, args.concurrency, args.duration))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark station distance/bearing computation over a day of positions.
+
+Fills a scratch database with synthetic positions (stored as text, like the
+logger does), then times the scalar `api.calculate_distance` loop against
+column-wise fetch plus the vectorised `airlogger.geo` functions.
+
+Usage:
+  python3 scripts/bench_geo.py --rows 500000
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+# Add parent directory to path so we can import airlogger
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from airlogger import geo
+
+STATION = (-37.8, 145.0)
+
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    """The pre-vectorisation per-row path, as called by the API for each aircraft."""
+    try:
+        if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+            return None
+        l1, n1, l2, n2 = float(lat1), float(lon1), float(lat2), float(lon2)
+        if l2 == 0 or n2 == 0:
+            return None
+        return geo.haversine_nm(l1, n1, l2, n2)
+    except (ValueError, TypeError):
+        return None
+
+
+def build(path, rows):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE flights (id INTEGER PRIMARY KEY, lat TEXT, lon TEXT)")
+    rng = random.Random(1)
+    conn.executemany("INSERT INTO flights (lat, lon) VALUES (?, ?)", (
+        (f"{STATION[0] + rng.uniform(-3, 3):.5f}", f"{STATION[1] + rng.uniform(-3, 3):.5f}")
+        if rng.random() > 0.02 else ("", "")
+        for _ in range(rows)))
+    conn.commit()
+    return conn
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<32} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000, help="Positions to generate (default 500k, a busy day)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = timed(f"build {args.rows} rows", lambda: build(os.path.join(tmp, "bench.db"), args.rows))
+        print(f"numpy: {'yes ' + geo.np.__version__ if geo.np is not None else 'no (pure-Python fallback)'}")
+
+        text_rows = timed("fetch text columns", lambda: conn.execute("SELECT lat, lon FROM flights").fetchall())
+        timed("scalar calculate_distance loop",
+              lambda: [calculate_distance(STATION[0], STATION[1], lat, lon) for lat, lon in text_rows])
+
+        real_rows = timed("fetch REAL columns", lambda: conn.execute(
+            "SELECT CAST(NULLIF(lat, '') AS REAL), CAST(NULLIF(lon, '') AS REAL) FROM flights").fetchall())
+        lats, lons = timed("float_columns", lambda: geo.float_columns(real_rows, 0, 1))
+        timed("vectorised distance + bearing", lambda: (
+            geo.distances_nm(STATION[0], STATION[1], lats, lons),
+            geo.bearings_deg(STATION[0], STATION[1], lats, lons)))
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
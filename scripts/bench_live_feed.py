@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Benchmark the live feed formats of `/api/live_flights` for N aircraft.
+
+Fills a scratch database with N aircraft seen in the last minutes, then for
+each format (JSON, columnar JSON, packed binary) reports payload size (raw
+and gzipped), full request time through the Flask app, and decode time.
+Decode is measured in Python (json.loads / feed.decode_packed) as a proxy for
+the browser, where the packed feed is read through typed-array views.
+
+Usage:
+  python3 scripts/bench_live_feed.py --aircraft 500
+"""
+import os
+import sys
+import gzip
+import json
+import time
+import random
+import argparse
+import tempfile
+
+# Add parent directory to path so we can import airlogger
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import airlogger.db as db
+from airlogger import feed
+
+FORMATS = (("json", "application/json"), ("columns", feed.COLUMNS_MIME), ("packed", feed.PACKED_MIME))
+
+
+def fill(aircraft, positions):
+    rng = random.Random(1)
+    now = time.time()
+    rows = []
+    for a in range(aircraft):
+        hex_code = f"7C{a:04X}"
+        lat, lon = -37.8 + rng.uniform(-3, 3), 145.0 + rng.uniform(-3, 3)
+        for p in range(positions):
+            ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - 300 + p * 10 + rng.random()))
+            rows.append((ts, hex_code, f"QFA{a}", str(rng.randrange(1000, 40000)), str(rng.randrange(150, 500)),
+                         str(rng.randrange(360)), f"{lat + p * 0.01:.5f}", f"{lon:.5f}",
+                         f"VH-{a:03d}", "B738", "Qantas Airways"))
+    db.insert_flights(rows)
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--aircraft", type=int, default=500)
+    parser.add_argument("--positions", type=int, default=20, help="Recent positions per aircraft")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, "aircraft.db")
+        db.init_db()
+        fill(args.aircraft, args.positions)
+
+        import dashboard
+        client = dashboard.app.test_client()
+        decoders = {"json": json.loads, "columns": json.loads, "packed": feed.decode_packed}
+        # Serialisation alone, from the same data the endpoint builds
+        legacy = client.get("/api/live_flights").get_json()
+        columns = {k: list(v) for k, v in feed.decode_packed(
+            client.get("/api/live_flights", headers={"Accept": feed.PACKED_MIME}).data).items()}
+        encoders = {
+            "json": lambda: json.dumps(legacy),
+            "columns": lambda: feed.encode_columns(columns),
+            "packed": lambda: feed.encode_packed(columns),
+        }
+
+        print(f"{args.aircraft} aircraft\n")
+        print(f"{'format':<10}{'bytes':>10}{'gzip':>10}{'encode ms':>12}{'request ms':>13}{'decode ms':>12}")
+        for name, mime in FORMATS:
+            body = client.get("/api/live_flights", headers={"Accept": mime}).data
+            encode_s = best_of(encoders[name], args.repeat)
+            request_s = best_of(lambda: client.get("/api/live_flights", headers={"Accept": mime}), args.repeat)
+            decode_s = best_of(lambda: decoders[name](body), args.repeat)
+            print(f"{name:<10}{len(body):>10}{len(gzip.compress(body)):>10}{encode_s * 1000:>12.2f}"
+                  f"{request_s * 1000:>13.2f}{decode_s * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
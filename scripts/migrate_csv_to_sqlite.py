@@ -1,88 +1,229 @@
 #!/usr/bin/env python3
+"""Bulk-import daily CSV logs (aircraft_log_*.csv[.gz]) into the SQLite database.
+
+Files are decompressed and parsed in a process pool while the main process
+batch-inserts with `executemany` under bulk-load pragmas (no journal, no fsync)
+and with the `flights` indexes dropped until the end. Rows already in the
+database (same timestamp_utc and hex) are skipped, so re-running is safe.
+
+Stop the logger before importing: the bulk pragmas need exclusive access.
+
+Usage:
+  python3 scripts/migrate_csv_to_sqlite.py [--workers N] [--batch-size N] [--log-dir DIR]
+"""
 import os
 import csv
 import gzip
+import time
 import logging
+import argparse
 import sys
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
 
 # Add parent directory to path so we can import airlogger
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from airlogger.db import init_db, get_db_connection
+from airlogger.db import (
+    init_db, get_db_connection, INSERT_FLIGHT_SQL, has_rtree, backfill_rtree, create_rtree_triggers,
+)
+from airlogger.config import LOG_DIR
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger('migrate')
 
-LOG_DIR = os.path.expanduser('~/aircraft-logger/logs')
+# CSV header (lower-case) for each flights column, in INSERT_FLIGHT_SQL order
+CSV_COLUMNS = ("time utc", "hex", "callsign", "altitude", "speed", "track",
+               "latitude", "longitude", "registration", "model", "operator")
+
+
+def find_csv_files(log_dir):
+    """Daily log files sorted by date (a day's .csv and .csv.gz end up adjacent)."""
+    if not os.path.exists(log_dir):
+        return []
+    return sorted(os.path.join(log_dir, f) for f in os.listdir(log_dir)
+                  if f.startswith('aircraft_log_') and (f.endswith('.csv') or f.endswith('.csv.gz')))
+
+
+def file_day(filepath):
+    """YYYY-MM-DD from aircraft_log_YYYY-MM-DD.csv[.gz]."""
+    return os.path.basename(filepath)[len('aircraft_log_'):len('aircraft_log_') + 10]
+
+
+def parse_csv_file(filepath):
+    """Parse one log file into flights rows. Runs in a worker process.
+
+    Returns (filepath, rows, error).
+    """
+    try:
+        if filepath.endswith('.gz'):
+            file_handle = gzip.open(filepath, 'rt', newline='', encoding='utf-8', errors='ignore')
+        else:
+            file_handle = open(filepath, 'r', newline='', encoding='utf-8', errors='ignore')
+
+        rows = []
+        with file_handle:
+            reader = csv.reader(file_handle)
+            header = next(reader, None)
+            if not header:
+                return filepath, rows, None
+            index = {name.strip().lower(): i for i, name in enumerate(header)}
+            positions = [index.get(name) for name in CSV_COLUMNS]
+            ts_pos, hex_pos = positions[0], positions[1]
+            if ts_pos is None or hex_pos is None:
+                return filepath, rows, "missing 'Time UTC' or 'Hex' column"
+
+            width = len(header)
+            for record in reader:
+                if len(record) < width:
+                    record = record + [''] * (width - len(record))
+                timestamp = record[ts_pos].strip()
+                if not timestamp:
+                    continue
+                row = [record[i].strip() if i is not None else '' for i in positions]
+                row[1] = row[1].upper()
+                rows.append(tuple(row))
+        return filepath, rows, None
+    except Exception as e:
+        return filepath, [], str(e)
+
+
+def _existing_keys(conn, day):
+    """(timestamp_utc, hex) pairs already stored for a day."""
+    return set(conn.execute(
+        "SELECT timestamp_utc, hex FROM import_existing_keys WHERE timestamp_utc BETWEEN ? AND ?",
+        (day, day + '\uffff')).fetchall())
 
-def migrate_csvs():
+
+def _parsed_in_order(files, workers):
+    """Yield parse results in file order, keeping at most 2*workers files in flight."""
+    if workers <= 1:
+        for f in files:
+            yield parse_csv_file(f)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        files = iter(files)
+        for f in files:
+            pending.append(pool.submit(parse_csv_file, f))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            result = pending.pop(0).result()
+            nxt = next(files, None)
+            if nxt is not None:
+                pending.append(pool.submit(parse_csv_file, nxt))
+            yield result
+
+
+def migrate_csvs(log_dir=LOG_DIR, workers=None, batch_size=50000):
     logger.info("Initializing database...")
     init_db()
 
-    # Find all CSV files
-    candidates = []
-    if os.path.exists(LOG_DIR):
-        for f in os.listdir(LOG_DIR):
-            if f.startswith('aircraft_log_') and (f.endswith('.csv') or f.endswith('.csv.gz')):
-                candidates.append(os.path.join(LOG_DIR, f))
-    
-    candidates.sort() # sort by date
-    
-    total_inserted = 0
+    files = find_csv_files(log_dir)
+    if not files:
+        logger.info(f"No CSV logs found in {log_dir}")
+        return 0
+    workers = workers or os.cpu_count() or 1
+    first_day, last_day = file_day(files[0]), file_day(files[-1])
+    logger.info(f"Importing {len(files)} files ({first_day} .. {last_day}) with {workers} workers")
+
+    total_inserted = total_skipped = 0
+    started = time.perf_counter()
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        for filepath in candidates:
-            logger.info(f"Processing {filepath}...")
-            count = 0
-            try:
-                if filepath.endswith('.gz'):
-                    file_handle = gzip.open(filepath, 'rt', encoding='utf-8', errors='ignore')
-                else:
-                    file_handle = open(filepath, 'r', newline='', encoding='utf-8', errors='ignore')
-
-                with file_handle:
-                    reader = csv.DictReader(file_handle)
-                    if not reader.fieldnames:
+        conn.row_factory = None
+        # Snapshot existing keys for the date range while the timestamp index still exists
+        conn.execute("PRAGMA temp_store=FILE")
+        conn.execute("DROP TABLE IF EXISTS temp.import_existing_keys")
+        conn.execute("""
+            CREATE TEMP TABLE import_existing_keys (
+                timestamp_utc TEXT, hex TEXT, PRIMARY KEY (timestamp_utc, hex)
+            ) WITHOUT ROWID
+        """)
+        conn.execute("""
+            INSERT OR IGNORE INTO import_existing_keys
+            SELECT timestamp_utc, hex FROM flights WHERE timestamp_utc BETWEEN ? AND ?
+        """, (first_day, last_day + '\uffff'))
+        conn.commit()
+        existing = conn.execute("SELECT count(*) FROM import_existing_keys").fetchone()[0]
+        logger.info(f"{existing} existing rows in range will be skipped if re-imported")
+
+        # Bulk-load mode: no rollback journal, no fsync, indexes rebuilt at the end
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA cache_size=-65536")
+        indexes = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name='flights' AND sql IS NOT NULL"
+        ).fetchall()
+        for name, _ in indexes:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        # The spatial index is also built in one pass at the end instead of per-row triggers
+        rtree = has_rtree(conn)
+        last_id = conn.execute("SELECT coalesce(max(id), 0) FROM flights").fetchone()[0]
+        conn.execute("DROP TRIGGER IF EXISTS flights_rtree_ai")
+        conn.commit()
+
+        try:
+            day, seen = None, set()
+            pending_rows = []
+            for n, (filepath, rows, error) in enumerate(_parsed_in_order(files, workers), 1):
+                name = os.path.basename(filepath)
+                if error:
+                    logger.error(f"Failed to process {name}: {error}")
+                    continue
+                if file_day(filepath) != day:
+                    day = file_day(filepath)
+                    seen = _existing_keys(conn, day)
+
+                inserted = 0
+                for row in rows:
+                    key = (row[0], row[1])
+                    if key in seen:
                         continue
-                    
-                    # Normalize fieldnames
-                    field_map = {f.strip().lower(): f for f in reader.fieldnames}
-                    
-                    def get_row_val(r, key):
-                        actual_key = field_map.get(key.lower())
-                        return (r.get(actual_key) or "").strip() if actual_key else ""
-                    
-                    for row in reader:
-                        timestamp = get_row_val(row, "Time UTC")
-                        if not timestamp:
-                            continue
-                            
-                        hex_code = get_row_val(row, "Hex").upper()
-                        callsign = get_row_val(row, "Callsign")
-                        altitude = get_row_val(row, "Altitude")
-                        speed = get_row_val(row, "Speed")
-                        lat = get_row_val(row, "Latitude")
-                        lon = get_row_val(row, "Longitude")
-                        reg = get_row_val(row, "Registration")
-                        model = get_row_val(row, "Model")
-                        operator = get_row_val(row, "Operator")
-                        
-                        cursor.execute('''
-                            INSERT INTO flights (
-                                timestamp_utc, hex, callsign, altitude, speed, lat, lon, registration, model, operator
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (timestamp, hex_code, callsign, altitude, speed, lat, lon, reg, model, operator))
-                        count += 1
-                        total_inserted += 1
-                        
+                    seen.add(key)
+                    pending_rows.append(row)
+                    inserted += 1
+                    if len(pending_rows) >= batch_size:
+                        conn.executemany(INSERT_FLIGHT_SQL, pending_rows)
+                        conn.commit()
+                        pending_rows = []
+
+                total_inserted += inserted
+                total_skipped += len(rows) - inserted
+                elapsed = time.perf_counter() - started
+                logger.info(f"[{n}/{len(files)}] {name}: {inserted} inserted, {len(rows) - inserted} duplicates "
+                            f"({total_inserted / elapsed if elapsed else 0:,.0f} rows/s overall)")
+
+            if pending_rows:
+                conn.executemany(INSERT_FLIGHT_SQL, pending_rows)
                 conn.commit()
-                logger.info(f"  -> Inserted {count} rows from {os.path.basename(filepath)}")
-            except Exception as e:
-                logger.error(f"Failed to process {filepath}: {e}")
-                
-    logger.info(f"Migration complete! Total rows inserted: {total_inserted}")
+        finally:
+            logger.info(f"Rebuilding {len(indexes)} indexes...")
+            index_started = time.perf_counter()
+            for _, sql in indexes:
+                conn.execute(sql.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS ", 1))
+            if rtree:
+                backfill_rtree(conn, last_id)
+                create_rtree_triggers(conn)
+            conn.execute("DROP TABLE IF EXISTS temp.import_existing_keys")
+            conn.commit()
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            logger.info(f"Indexes rebuilt in {time.perf_counter() - index_started:.1f}s")
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Migration complete! {total_inserted} rows inserted, {total_skipped} duplicates skipped "
+                f"in {elapsed:.1f}s ({total_inserted / elapsed if elapsed else 0:,.0f} rows/s)")
+    return total_inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import CSV logs into the SQLite database")
+    parser.add_argument("--log-dir", default=LOG_DIR, help=f"Directory with aircraft_log_*.csv[.gz] (default {LOG_DIR})")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=50000, help="Rows per insert transaction (default 50000)")
+    args = parser.parse_args()
+    migrate_csvs(args.log_dir, args.workers, args.batch_size)
+
 
 if __name__ == '__main__':
-    migrate_csvs()
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Profile the historical page loader (`web.load_historical_data`).
+
+Fills a scratch database with a synthetic day of positions (or uses an
+existing one with --db), runs the loader under cProfile and prints the top
+functions. It also times per-row timestamp conversion both ways: the old
+`convert_to_local` strptime path and the cached epoch formatter now used.
+
+Usage:
+  python3 scripts/profile_history.py --rows 200000
+  python3 scripts/profile_history.py --db ~/aircraft-logger/logs/aircraft.db --date 2025-05-04
+"""
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import argparse
+import tempfile
+
+# Add parent directory to path so we can import airlogger
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import airlogger.db as db
+from airlogger import utils
+from airlogger.web import load_historical_data
+
+
+def fill(rows, date_str):
+    start, end = utils.local_day_epoch_bounds(date_str)
+    rng = random.Random(1)
+    batch = []
+    for i in range(rows):
+        epoch = start + (end - start) * i // rows
+        batch.append((time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch)), f"7C{rng.randrange(4096):04X}",
+                      "QFA1", str(rng.randrange(1000, 40000)), "450", "90",
+                      f"{-37.8 + rng.uniform(-2, 2):.5f}", f"{145.0 + rng.uniform(-2, 2):.5f}", "", "", ""))
+        if len(batch) == 10000:
+            db.insert_flights(batch)
+            batch = []
+    if batch:
+        db.insert_flights(batch)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    print(f"{label:<40} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic positions to generate")
+    parser.add_argument("--db", help="Profile an existing database instead")
+    parser.add_argument("--date", default="2025-05-04", help="Local date to load (YYYY-MM-DD)")
+    parser.add_argument("--top", type=int, default=15, help="Functions to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.expanduser(args.db) if args.db else os.path.join(tmp, "aircraft.db")
+        db.init_db()
+        if not args.db:
+            timed(f"fill {args.rows} rows", lambda: fill(args.rows, args.date))
+
+        with db.get_read_connection() as conn:
+            rows = conn.execute("SELECT timestamp_utc, ts FROM flights").fetchall()
+        timed("convert_to_local + strftime per row", lambda: [
+            utils.convert_to_local(r[0]).strftime("%Y-%m-%d %H:%M:%S") for r in rows])
+        timed("format_local_many (cached offsets)", lambda: utils.format_local_many([r[1] for r in rows]))
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        data, total, unique, _, _ = load_historical_data(args.date)
+        profiler.disable()
+        print(f"\nload_historical_data({args.date}): {total} rows, {unique} aircraft\n")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -68,9 +68,10 @@ def consolidate_aircraft_data():
     try:
         import sys
         sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-        from airlogger.db import get_db_connection
+        from airlogger.db import get_read_connection
+        from airlogger.airlines import operator_from_callsign
         
-        with get_db_connection() as conn:
+        with get_read_connection(analytical=True) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM flights WHERE date(timestamp_utc) = ?", (TODAY,))
             
@@ -90,7 +91,7 @@ def consolidate_aircraft_data():
                 timestamp = row['timestamp_utc']
                 callsign = (row['callsign'] or '').strip()
                 registration = (row['registration'] or '').strip()
-                operator = (row['operator'] or '').strip()
+                operator = (row['operator'] or '').strip() or operator_from_callsign(callsign)
                 model = (row['model'] or '').strip()
                 
                 # Update consolidated data
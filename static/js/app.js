@@ -2,15 +2,124 @@
  * Aircraft Logger Dashboard - Main Application Logic
  */
 
+// Positions kept per aircraft trail in live mode
+const LIVE_TRAIL_POINTS = 200;
+
+// Binary live feed negotiated with /api/live_flights (see airlogger/feed.py)
+const PACKED_FEED_MIME = 'application/vnd.airlogger.packed';
+
+// History table column per header index (see sortTable in index.html)
+const TABLE_SORT_COLUMNS = ['time', 'hex', 'callsign', 'reg', 'model', 'operator', 'alt', 'speed'];
+
+const escapeHtml = (value) => String(value == null ? '' : value)
+    .replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+
+/**
+ * History table that renders only the rows in view from columnar data.
+ * Sorting and filtering run in table-worker.js and return the visible row order.
+ */
+class VirtualTable {
+    constructor(columns, scrollEl, bodyEl, workerUrl, overscan = 10) {
+        this.columns = columns;
+        this.scrollEl = scrollEl;
+        this.bodyEl = bodyEl;
+        this.overscan = overscan;
+        this.rowCount = (columns.hex || []).length;
+        this.view = Uint32Array.from({ length: this.rowCount }, (_, i) => i);
+        this.rowHeight = 0;
+        this.seq = 0;
+        this.state = { column: null, dir: 1, filter: '' };
+        this.frame = null;
+
+        this.worker = new Worker(workerUrl);
+        this.worker.onmessage = (event) => {
+            // Ignore answers to queries that a newer one has replaced
+            if (event.data.seq !== this.seq) return;
+            this.view = event.data.view;
+            this.scrollEl.scrollTop = 0;
+            this.render();
+        };
+        this.worker.postMessage({ type: 'load', columns });
+
+        this.scrollEl.addEventListener('scroll', () => {
+            if (!this.frame) this.frame = requestAnimationFrame(() => { this.frame = null; this.render(); });
+        }, { passive: true });
+        this.bodyEl.addEventListener('click', (event) => {
+            const tr = event.target.closest('tr[data-hex]');
+            if (tr && !event.target.closest('a')) window.dashboard.focusAircraft(tr.dataset.hex);
+        });
+        this.render();
+    }
+
+    sortBy(index) {
+        const column = TABLE_SORT_COLUMNS[index];
+        this.state.dir = this.state.column === column ? -this.state.dir : 1;
+        this.state.column = column;
+        this.query();
+    }
+
+    setFilter(text) {
+        this.state.filter = text;
+        this.query();
+    }
+
+    query() {
+        this.worker.postMessage({ type: 'query', seq: ++this.seq, ...this.state });
+    }
+
+    rowHtml(i) {
+        const c = this.columns;
+        const hex = escapeHtml(c.hex[i]);
+        const aircraftUrl = `https://www.flightradar24.com/data/aircraft/${escapeHtml(c.reg[i] || c.hex[i])}`;
+        const flightUrl = `https://www.flightradar24.com/data/flights/${escapeHtml(c.flight[i] || c.hex[i])}`;
+        return `<tr style="cursor: pointer;" data-hex="${hex}">
+            <td class="text-nowrap">${escapeHtml((c.time[i] || '').split(' ')[1] || '')}</td>
+            <td><a href="${aircraftUrl}" target="_blank" class="fw-bold text-decoration-none text-reset">${hex}</a></td>
+            <td><a href="${flightUrl}" target="_blank" class="fw-bold text-primary text-decoration-none">${escapeHtml(c.callsign[i])}</a></td>
+            <td><a href="${aircraftUrl}" target="_blank" class="text-decoration-none text-reset">${escapeHtml(c.reg[i])}</a></td>
+            <td><small>${escapeHtml(c.model[i])}</small></td>
+            <td class="text-truncate" style="max-width: 150px;">${escapeHtml(c.operator[i])}</td>
+            <td>${escapeHtml(c.alt[i])}</td>
+            <td>${escapeHtml(c.speed[i])}</td>
+        </tr>`;
+    }
+
+    render() {
+        const total = this.view.length;
+        const rowHeight = this.rowHeight || 41;
+        const visible = Math.ceil((this.scrollEl.clientHeight || 600) / rowHeight);
+        const first = Math.max(0, Math.floor(this.scrollEl.scrollTop / rowHeight) - this.overscan);
+        const last = Math.min(total, first + visible + 2 * this.overscan);
+
+        // Spacer rows stand in for everything outside the window so the scrollbar stays true
+        let html = `<tr aria-hidden="true" style="height:${first * rowHeight}px"></tr>`;
+        for (let k = first; k < last; k++) html += this.rowHtml(this.view[k]);
+        html += `<tr aria-hidden="true" style="height:${(total - last) * rowHeight}px"></tr>`;
+        this.bodyEl.innerHTML = html;
+
+        if (!this.rowHeight && last > first) {
+            this.rowHeight = this.bodyEl.rows[1].offsetHeight || rowHeight;
+            if (this.rowHeight !== rowHeight) this.render();
+        }
+    }
+}
+
 class AircraftDashboard {
     constructor(config) {
         this.config = config;
-        this.initialData = config.initialData || [];
+        // History rows arrive columnar (one array per field); the map and charts take row objects
+        this.tableColumns = config.tableColumns || {};
+        this.initialData = this.rowsFromColumns(this.tableColumns);
         this.summary = config.summary || null;
         this.mapThemeUrl = config.mapThemeUrl;
         this.isLiveModeActive = false;
         this.liveMapInterval = null;
         this.mapLayers = [];
+        // Live mode: hex -> { marker, trail, color, ac, heading }, updated in place on each refresh
+        this.liveStore = new Map();
+        this.livePending = new Map();
+        this.liveFrame = null;
+        this.liveFitted = false;
         this.weatherLayer = null;
         this.colors = ['#667eea', '#764ba2', '#43e97b', '#4facfe', '#ff0844', '#f6d365', '#fda085', '#00f2fe', '#f093fb', '#f5576c'];
         
@@ -24,9 +133,11 @@ class AircraftDashboard {
         // Initial setup
         this.updateMap(this.initialData, false);
         this.fetchListOnly();
+        this.fetchLatency();
         
-        // Background polling for the list (every 60s)
+        // Background polling for the list (every 60s) and ingest latency (every 30s)
         setInterval(() => this.fetchListOnly(), 60000);
+        setInterval(() => this.fetchLatency(), 30000);
     }
 
     initMap() {
@@ -36,6 +147,12 @@ class AircraftDashboard {
             subdomains: 'abcd',
             maxZoom: 19
         }).addTo(this.flightMap);
+        // History positions and tracks share one canvas instead of thousands of DOM nodes
+        this.canvasRenderer = L.canvas({ padding: 0.5 });
+        this.flightMap.on('moveend', () => {
+            clearTimeout(this.historyPointsTimer);
+            this.historyPointsTimer = setTimeout(() => this.loadHistoryPoints(), 250);
+        });
         
         this.initWeather();
     }
@@ -101,6 +218,81 @@ class AircraftDashboard {
         }
     }
 
+    toggleCoverage() {
+        const btn = document.getElementById('coverageToggle');
+        if (this.coverageLayer && this.flightMap.hasLayer(this.coverageLayer)) {
+            this.flightMap.removeLayer(this.coverageLayer);
+            if (btn) {
+                btn.classList.replace('btn-primary', 'btn-outline-primary');
+                btn.innerHTML = '<i class="bi bi-broadcast-pin me-1"></i> Coverage';
+            }
+            return;
+        }
+        const show = () => {
+            this.coverageLayer.addTo(this.flightMap);
+            if (btn) {
+                btn.classList.replace('btn-outline-primary', 'btn-primary');
+                btn.innerHTML = '<i class="bi bi-broadcast-pin me-1"></i> Coverage On';
+            }
+        };
+        if (this.coverageLayer) return show();
+        if (btn) btn.innerHTML = '<i class="bi bi-broadcast-pin me-1"></i> Loading...';
+        Promise.all([
+            fetch('/api/coverage?days=90').then(res => res.json()),
+            fetch('/api/coverage/range?days=90').then(res => res.json())
+        ]).then(([grid, range]) => {
+            this.coverageLayer = this.buildCoverageLayer(grid, range);
+            show();
+        }).catch(err => {
+            console.warn('Coverage unavailable:', err);
+            if (btn) btn.innerHTML = '<i class="bi bi-broadcast-pin me-1"></i> Coverage';
+        });
+    }
+
+    buildCoverageLayer(grid, range) {
+        // Cells drawn on one canvas; opacity on a log scale of position counts
+        const renderer = L.canvas({ padding: 0.5 });
+        const layer = L.layerGroup();
+        const size = grid.cell_deg;
+        const logMax = Math.log1p(grid.max || 1);
+        (grid.cells || []).forEach(([latIdx, lonIdx, count]) => {
+            L.rectangle([[latIdx * size, lonIdx * size], [(latIdx + 1) * size, (lonIdx + 1) * size]], {
+                renderer, stroke: false, fillColor: '#0d6efd',
+                fillOpacity: 0.1 + 0.6 * Math.log1p(count) / logMax, interactive: false
+            }).addTo(layer);
+        });
+        const [lat0, lon0] = range.station || [0, 0];
+        if ((lat0 || lon0) && range.max_nm) {
+            // Polar outline of the furthest position seen in each bearing sector
+            const R = 3440.065;
+            const outline = [];
+            range.max_nm.forEach((nm, i) => {
+                if (nm === null) return;
+                const brg = (i + 0.5) * range.bin_deg * Math.PI / 180;
+                const phi1 = lat0 * Math.PI / 180, d = nm / R;
+                const phi2 = Math.asin(Math.sin(phi1) * Math.cos(d) + Math.cos(phi1) * Math.sin(d) * Math.cos(brg));
+                const lam = Math.atan2(Math.sin(brg) * Math.sin(d) * Math.cos(phi1), Math.cos(d) - Math.sin(phi1) * Math.sin(phi2));
+                outline.push([phi2 * 180 / Math.PI, lon0 + lam * 180 / Math.PI]);
+            });
+            if (outline.length > 2) {
+                L.polygon(outline, { renderer, color: '#dc3545', weight: 2, fill: false, interactive: false }).addTo(layer);
+            }
+        }
+        return layer;
+    }
+
+    rowsFromColumns(columns) {
+        const names = Object.keys(columns);
+        const count = names.length ? columns[names[0]].length : 0;
+        const rows = new Array(count);
+        for (let i = 0; i < count; i++) {
+            const row = {};
+            names.forEach(name => { row[name] = columns[name][i]; });
+            rows[i] = row;
+        }
+        return rows;
+    }
+
     normalizeData(data) {
         return data.map(ac => ({
             hex: ac.hex || ac.Hex || "UNKNOWN",
@@ -113,12 +305,17 @@ class AircraftDashboard {
             lat: parseFloat(ac.lat || ac.Latitude),
             lon: parseFloat(ac.lon || ac.Longitude),
             time: ac.time || ac["Time Local"] || "",
-            distance: ac.distance || null
+            distance: ac.distance || null,
+            segment: ac.segment || ac.Segment || ""
         }));
     }
 
     updateMap(aircraftData, isLive = false) {
+        if (isLive) return this.updateLiveMap(aircraftData);
+
         // Clear existing layers
+        this.clearLiveStore();
+        this.clearHistoryPoints();
         this.mapLayers.forEach(layer => this.flightMap.removeLayer(layer));
         this.mapLayers = [];
         
@@ -128,75 +325,43 @@ class AircraftDashboard {
         
         normalizedData.forEach(ac => {
             if (!isNaN(ac.lat) && !isNaN(ac.lon) && ac.lat !== 0 && ac.lon !== 0) {
-                if (!flightsByHex[ac.hex]) flightsByHex[ac.hex] = [];
-                flightsByHex[ac.hex].push(ac);
+                // History rows carry a flight segment id, so separate visits of one aircraft stay separate paths
+                const key = ac.segment ? `${ac.hex}:${ac.segment}` : ac.hex;
+                if (!flightsByHex[key]) flightsByHex[key] = [];
+                flightsByHex[key].push(ac);
                 bounds.push([ac.lat, ac.lon]);
             }
         });
 
-        Object.keys(flightsByHex).forEach((hex, index) => {
-            const flightPath = flightsByHex[hex];
+        Object.keys(flightsByHex).forEach((key, index) => {
+            const flightPath = flightsByHex[key];
             const latlngs = flightPath.map(ac => [ac.lat, ac.lon]);
             const color = this.colors[index % this.colors.length];
             
-            // ONLY draw the path line if in Live Mode or if we have very few aircraft
-            if (isLive || Object.keys(flightsByHex).length < 5) {
+            // Only draw path lines when there are very few aircraft; otherwise on click
+            if (Object.keys(flightsByHex).length < 5) {
                 const polyline = L.polyline(latlngs, {
-                    color: color, weight: 2, opacity: 0.6, smoothFactor: 1
+                    color: color, weight: 2, opacity: 0.6, smoothFactor: 1, renderer: this.canvasRenderer
                 }).addTo(this.flightMap);
                 this.mapLayers.push(polyline);
             }
 
-            // Draw markers - in non-live mode, only show the LATEST position to keep it clean
-            const pointsToShow = isLive ? flightPath : [flightPath[0]];
-            
-            pointsToShow.forEach((ac, i) => {
-                const isLatest = (i === 0);
-                let marker;
-                
-                if (isLatest) {
-                    let heading = ac.track;
-                    if (isNaN(heading) || heading === undefined) {
-                        heading = (flightPath.length > 1) ? this.calculateHeading(ac, flightPath[1]) : 0;
-                    }
-                    
-                    const iconHtml = `<div style="transform: rotate(${heading}deg); color: ${color}; font-size: 1.5rem; text-shadow: 1px 1px 2px #000;"><i class="bi bi-airplane-fill"></i></div>`;
-                    const planeIcon = L.divIcon({
-                        html: iconHtml, className: 'custom-plane-icon', iconSize: [24, 24], iconAnchor: [12, 12]
-                    });
-                    
-                    marker = L.marker([ac.lat, ac.lon], { icon: planeIcon }).addTo(this.flightMap);
-                    marker.hexCode = ac.hex; // Store hex for lookup
-                    if (ac.callsign) {
-                        marker.bindTooltip(`<b>${ac.callsign}</b>`, {
-                            permanent: true, direction: 'right', className: 'bg-transparent border-0 text-white shadow-none fs-6', offset: [10, 0]
-                        });
-                    }
-                } else {
-                    marker = L.circleMarker([ac.lat, ac.lon], {
-                        radius: 3, fillColor: color, color: "transparent", weight: 0, opacity: 1, fillOpacity: 0.8
-                    }).addTo(this.flightMap);
-                    marker.hexCode = ac.hex;
-                }
-                
-                marker.bindPopup(this.createPopup(ac, color));
-                this.mapLayers.push(marker);
-
-                // In non-live mode, clicking the marker can trigger the full path
-                if (!isLive && isLatest) {
-                    marker.on('click', () => {
-                        const polyline = L.polyline(latlngs, {
-                            color: color, weight: 3, opacity: 0.9, smoothFactor: 1
-                        }).addTo(this.flightMap);
-                        this.mapLayers.push(polyline);
-                    });
-                }
-            });
+            // Latest position per path, drawn on the shared canvas rather than as DOM markers
+            const ac = flightPath[0];
+            const marker = L.circleMarker([ac.lat, ac.lon], {
+                renderer: this.canvasRenderer, radius: 6, fillColor: color, color: '#000', weight: 1, opacity: 0.6, fillOpacity: 0.9
+            }).addTo(this.flightMap);
+            marker.hexCode = ac.hex;
+            if (ac.callsign) marker.bindTooltip(`<b>${ac.callsign}</b>`, { direction: 'right', offset: [8, 0] });
+            marker.bindPopup(() => this.createPopup(ac, color));
+            marker.on('click', () => this.drawTrack(ac, color, latlngs));
+            this.mapLayers.push(marker);
         });
 
         if (bounds.length > 0) {
             this.flightMap.fitBounds(bounds, { padding: [30, 30] });
             this.removeMapStatus();
+            this.loadHistoryPoints();
         } else {
             // Default view: Center on Jindivick (approx 100nm zoom)
             const lat = this.config.stationLat || 0;
@@ -205,9 +370,199 @@ class AircraftDashboard {
             this.showMapStatus("No tracked aircraft");
         }
 
-        if (isLive) {
-            this.updateLiveList(flightsByHex);
+    }
+
+    loadHistoryPoints() {
+        // Every position of the day, clustered server-side for the current zoom and view
+        if (this.isLiveModeActive || !this.config.selectedDate) return;
+        const b = this.flightMap.getBounds();
+        const params = new URLSearchParams({
+            date: this.config.selectedDate,
+            zoom: this.flightMap.getZoom(),
+            bbox: [b.getWest(), b.getSouth(), b.getEast(), b.getNorth()].map(v => v.toFixed(4)).join(',')
+        });
+        const request = this.historyPointsRequest = (this.historyPointsRequest || 0) + 1;
+        fetch(`/api/history_points?${params}`)
+            .then(r => r.json())
+            .then(data => {
+                // Drop responses overtaken by a newer pan/zoom or by live mode
+                if (request !== this.historyPointsRequest || this.isLiveModeActive || !data.points) return;
+                this.clearHistoryPoints();
+                const layer = this.historyPointsLayer = L.layerGroup();
+                data.points.forEach(([lat, lon, count, hex, segment]) => {
+                    const point = L.circleMarker([lat, lon], {
+                        renderer: this.canvasRenderer, radius: Math.min(2 + Math.log2(count), 12),
+                        stroke: false, fillColor: hex ? this.colorFor(hex) : '#6c757d', fillOpacity: 0.5
+                    }).addTo(layer);
+                    point.on('click', () => {
+                        if (hex) {
+                            this.drawTrack({ hex, segment, time: this.config.selectedDate }, this.colorFor(hex), [[lat, lon]]);
+                        } else {
+                            this.flightMap.setView([lat, lon], this.flightMap.getZoom() + 2);
+                        }
+                    });
+                });
+                layer.addTo(this.flightMap);
+                if (data.truncated) this.showMapStatus("Showing the densest areas; zoom in for more");
+                else if (this.historyPointsTruncated) this.removeMapStatus();
+                this.historyPointsTruncated = data.truncated;
+            })
+            .catch(e => console.warn('History points unavailable:', e));
+    }
+
+    clearHistoryPoints() {
+        if (this.historyPointsLayer) {
+            this.flightMap.removeLayer(this.historyPointsLayer);
+            this.historyPointsLayer = null;
+        }
+    }
+
+    colorFor(hex) {
+        // Stable per aircraft, so colours don't shuffle as aircraft come and go
+        let h = 0;
+        for (let i = 0; i < hex.length; i++) h = (h * 31 + hex.charCodeAt(i)) | 0;
+        return this.colors[Math.abs(h) % this.colors.length];
+    }
+
+    updateLiveMap(aircraftData, normalized = false) {
+        this.clearHistoryPoints();
+        if (this.mapLayers.length) {
+            this.mapLayers.forEach(layer => this.flightMap.removeLayer(layer));
+            this.mapLayers = [];
+        }
+        const flightsByHex = {};
+        (normalized ? aircraftData : this.normalizeData(aircraftData)).forEach(ac => {
+            if (!isNaN(ac.lat) && !isNaN(ac.lon) && ac.lat !== 0 && ac.lon !== 0) {
+                if (!flightsByHex[ac.hex]) flightsByHex[ac.hex] = [];
+                flightsByHex[ac.hex].push(ac);
+            }
+        });
+
+        // Queue the diff; a newer refresh replaces anything not yet applied
+        this.livePending.clear();
+        Object.keys(flightsByHex).forEach(hex => this.livePending.set(hex, flightsByHex[hex][0]));
+        this.liveStore.forEach((entry, hex) => {
+            if (!flightsByHex[hex]) this.livePending.set(hex, null);
+        });
+        if (!this.liveFrame) this.liveFrame = requestAnimationFrame(() => this.flushLiveUpdates());
+
+        const hexes = Object.keys(flightsByHex);
+        if (!this.liveFitted && hexes.length > 0) {
+            this.flightMap.fitBounds(hexes.map(hex => [flightsByHex[hex][0].lat, flightsByHex[hex][0].lon]), { padding: [30, 30] });
+            this.liveFitted = true;
+        }
+        if (hexes.length > 0) this.removeMapStatus();
+        else this.showMapStatus("No tracked aircraft");
+        this.updateLiveList(flightsByHex);
+    }
+
+    flushLiveUpdates() {
+        // Apply queued updates for up to ~8 ms per frame and continue on the next one
+        const deadline = performance.now() + 8;
+        for (const [hex, ac] of this.livePending) {
+            this.livePending.delete(hex);
+            if (ac) this.upsertLiveAircraft(ac);
+            else this.removeLiveAircraft(hex);
+            if (performance.now() > deadline) break;
+        }
+        this.liveFrame = this.livePending.size
+            ? requestAnimationFrame(() => this.flushLiveUpdates())
+            : null;
+    }
+
+    upsertLiveAircraft(ac) {
+        const latlng = [ac.lat, ac.lon];
+        let entry = this.liveStore.get(ac.hex);
+        if (!entry) {
+            const color = this.colorFor(ac.hex);
+            const marker = L.marker(latlng, {
+                icon: L.divIcon({
+                    html: `<div class="plane-heading" style="color: ${color}; font-size: 1.5rem; text-shadow: 1px 1px 2px #000;"><i class="bi bi-airplane-fill"></i></div>`,
+                    className: 'custom-plane-icon', iconSize: [24, 24], iconAnchor: [12, 12]
+                })
+            }).addTo(this.flightMap);
+            marker.hexCode = ac.hex;
+            const trail = L.polyline([latlng], { color: color, weight: 2, opacity: 0.6, smoothFactor: 1 }).addTo(this.flightMap);
+            entry = { marker, trail, color, ac, heading: null, callsign: '' };
+            // Popup content is built when opened, so refreshes never rebuild it
+            marker.bindPopup(() => this.createPopup(entry.ac, entry.color));
+            this.liveStore.set(ac.hex, entry);
+        } else {
+            const prev = entry.marker.getLatLng();
+            if (prev.lat !== ac.lat || prev.lng !== ac.lon) {
+                entry.marker.setLatLng(latlng);
+                entry.trail.addLatLng(latlng);
+                const points = entry.trail.getLatLngs();
+                if (points.length > LIVE_TRAIL_POINTS) entry.trail.setLatLngs(points.slice(-LIVE_TRAIL_POINTS));
+            }
+            if (entry.marker.isPopupOpen()) entry.marker.setPopupContent(this.createPopup(ac, entry.color));
+        }
+
+        let heading = ac.track;
+        if (isNaN(heading)) {
+            const points = entry.trail.getLatLngs();
+            heading = points.length > 1
+                ? this.calculateHeading(ac, { lat: points[points.length - 2].lat, lon: points[points.length - 2].lng })
+                : (entry.heading || 0);
+        }
+        if (heading !== entry.heading) {
+            const el = entry.marker.getElement();
+            const rotor = el && el.querySelector('.plane-heading');
+            if (rotor) rotor.style.transform = `rotate(${heading}deg)`;
+            entry.heading = heading;
+        }
+        if (ac.callsign !== entry.callsign) {
+            if (entry.marker.getTooltip()) entry.marker.setTooltipContent(`<b>${ac.callsign}</b>`);
+            else if (ac.callsign) {
+                entry.marker.bindTooltip(`<b>${ac.callsign}</b>`, {
+                    permanent: true, direction: 'right', className: 'bg-transparent border-0 text-white shadow-none fs-6', offset: [10, 0]
+                });
+            }
+            entry.callsign = ac.callsign;
         }
+        entry.ac = ac;
+    }
+
+    removeLiveAircraft(hex) {
+        const entry = this.liveStore.get(hex);
+        if (!entry) return;
+        entry.marker.off();
+        entry.marker.unbindPopup().unbindTooltip();
+        this.flightMap.removeLayer(entry.marker);
+        this.flightMap.removeLayer(entry.trail);
+        this.liveStore.delete(hex);
+    }
+
+    clearLiveStore() {
+        if (this.liveFrame) cancelAnimationFrame(this.liveFrame);
+        this.liveFrame = null;
+        this.livePending.clear();
+        Array.from(this.liveStore.keys()).forEach(hex => this.removeLiveAircraft(hex));
+        this.liveFitted = false;
+    }
+
+    drawTrack(ac, color, fallbackLatLngs) {
+        // Server-simplified track at the current zoom; raw points only if the request fails
+        const params = new URLSearchParams({ zoom: this.flightMap.getZoom() });
+        if (ac.segment) params.set('segment', ac.segment);
+        else params.set('date', (ac.time || '').split(' ')[0]);
+
+        const draw = paths => paths.forEach(path => {
+            const polyline = L.polyline(path, {
+                color: color, weight: 3, opacity: 0.9, smoothFactor: 1, renderer: this.canvasRenderer
+            }).addTo(this.flightMap);
+            this.mapLayers.push(polyline);
+        });
+
+        fetch(`/api/track/${ac.hex}?${params}`)
+            .then(r => r.json())
+            .then(data => {
+                const paths = ((data && data.segments) || [])
+                    .map(s => s.coords.map(c => [c[0], c[1]]))
+                    .filter(p => p.length > 0);
+                draw(paths.length ? paths : [fallbackLatLngs]);
+            })
+            .catch(() => draw([fallbackLatLngs]));
     }
 
     calculateHeading(p1, p2) {
@@ -274,6 +629,12 @@ class AircraftDashboard {
     }
 
     focusAircraft(hex) {
+        const live = this.liveStore.get(hex);
+        if (live) {
+            this.flightMap.setView(live.marker.getLatLng(), 12);
+            live.marker.openPopup();
+            return;
+        }
         // Find the latest marker for this hex
         const markers = this.mapLayers.filter(l => l instanceof L.Marker || l instanceof L.CircleMarker);
         const hexMarkers = markers.filter(m => m.hexCode === hex);
@@ -302,9 +663,9 @@ class AircraftDashboard {
         }
 
         let html = '<div class="list-group list-group-flush">';
-        hexes.forEach((hex, idx) => {
+        hexes.forEach(hex => {
             const ac = flightsByHex[hex][0];
-            const color = this.colors[idx % this.colors.length];
+            const color = this.colorFor(hex);
             const fr24Url = `https://www.flightradar24.com/${ac.reg || ac.callsign || ac.hex}`;
             const callsign = ac.callsign 
                 ? `<a href="${fr24Url}" target="_blank" class="fw-bold fs-5 text-primary text-decoration-none" onclick="event.stopPropagation();">${ac.callsign}</a>` 
@@ -356,6 +717,28 @@ class AircraftDashboard {
             });
     }
 
+    fetchLatency() {
+        const body = document.querySelector('#latencyTable tbody');
+        if (!body) return;
+        fetch('/api/latency')
+            .then(r => r.json())
+            .then(data => {
+                const stages = { ...((data.logger || {}).stages || {}), ...((data.dashboard || {}).stages || {}) };
+                const order = ['parse', 'metadata', 'commit', 'ingest', 'exposure'].filter(s => stages[s]);
+                if (!order.length) return;
+                const cell = v => `<td>${v == null ? '-' : escapeHtml(v)}</td>`;
+                body.innerHTML = order.map(s => {
+                    const st = stages[s];
+                    return `<tr><td class="ps-4 fw-bold">${s}</td>${cell(st.count)}${cell(st.p50_ms)}${cell(st.p90_ms)}${cell(st.p99_ms)}${cell(st.max_ms)}</tr>`;
+                }).join('');
+                if (data.logger && data.logger.updated) {
+                    const age = Math.max(0, Math.round(Date.now() / 1000 - data.logger.updated));
+                    document.getElementById('latencyUpdated').textContent = `logger snapshot ${age}s ago`;
+                }
+            })
+            .catch(() => {});
+    }
+
     toggleLiveMode() {
         const btn = document.getElementById('liveViewToggle');
         if (this.liveMapInterval) {
@@ -376,19 +759,51 @@ class AircraftDashboard {
     }
 
     fetchLiveFlights() {
-        fetch('/api/live_flights')
-            .then(r => r.json())
-            .then(data => {
-                if (!data || data.error) return;
-                // API returns a dict keyed by hex; flatten to array first
-                const flatData = Array.isArray(data)
-                    ? data
-                    : Object.values(data).flat();
-                this.updateMap(flatData, true);
+        // Ask for the packed binary feed; older servers answer with JSON
+        fetch('/api/live_flights', { headers: { 'Accept': `${PACKED_FEED_MIME}, application/json;q=0.5` } })
+            .then(r => {
+                if ((r.headers.get('Content-Type') || '').startsWith(PACKED_FEED_MIME)) {
+                    return r.arrayBuffer().then(buffer => this.updateLiveMap(this.decodeLiveFeed(buffer), true));
+                }
+                return r.json().then(data => {
+                    if (!data || data.error) return;
+                    // API returns a dict keyed by hex; flatten to array first
+                    const flatData = Array.isArray(data)
+                        ? data
+                        : Object.values(data).flat();
+                    this.updateMap(flatData, true);
+                });
             })
             .catch(e => console.error("Live fetch error", e));
     }
 
+    decodeLiveFeed(buffer) {
+        // Layout documented in airlogger/feed.py: header, f64 lat/lon, f32 alt/speed/track/distance, JSON strings
+        const header = new DataView(buffer);
+        const n = header.getUint32(4, true);
+        const stringBytes = header.getUint32(8, true);
+        let offset = 16;
+        const take = (Type) => {
+            const values = new Type(buffer, offset, n);
+            offset += n * Type.BYTES_PER_ELEMENT;
+            return values;
+        };
+        const lat = take(Float64Array), lon = take(Float64Array);
+        const alt = take(Float32Array), speed = take(Float32Array), track = take(Float32Array), distance = take(Float32Array);
+        const str = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, offset, stringBytes)));
+        const aircraft = new Array(n);
+        for (let i = 0; i < n; i++) {
+            aircraft[i] = {
+                hex: str.hex[i], callsign: str.callsign[i], reg: str.reg[i], model: str.model[i],
+                operator: str.operator[i], time: str.time[i],
+                lat: lat[i], lon: lon[i], alt: alt[i], speed: speed[i], track: track[i],
+                distance: isNaN(distance[i]) ? null : Math.round(distance[i] * 10) / 10,
+                segment: ""
+            };
+        }
+        return aircraft;
+    }
+
     initCharts() {
         // Shared chart settings
         Chart.defaults.font.family = "'Outfit', sans-serif";
@@ -470,15 +885,17 @@ class AircraftDashboard {
     }
 
     initTableFilters() {
+        const scrollEl = document.getElementById('historyTableScroll');
+        const bodyEl = document.getElementById('historyTableBody');
+        if (!scrollEl || !bodyEl || !window.Worker) return;
+        this.historyTable = new VirtualTable(this.tableColumns, scrollEl, bodyEl, this.config.tableWorkerUrl);
+
         const searchInput = document.getElementById('tableSearch');
         if (searchInput) {
-            searchInput.addEventListener('keyup', () => {
-                const filter = searchInput.value.toUpperCase();
-                const rows = document.querySelector("#historyTable tbody").rows;
-                for (let i = 0; i < rows.length; i++) {
-                    const text = rows[i].textContent.toUpperCase();
-                    rows[i].style.display = text.includes(filter) ? "" : "none";
-                }
+            let timer = null;
+            searchInput.addEventListener('input', () => {
+                clearTimeout(timer);
+                timer = setTimeout(() => this.historyTable.setFilter(searchInput.value), 120);
             });
         }
     }
@@ -519,42 +936,9 @@ class AircraftDashboard {
         const toggle = document.getElementById('liveViewToggle');
         if (toggle) toggle.onclick = () => this.toggleLiveMode();
         
-        // Add global sort function
+        // Header clicks sort the history table (off the main thread)
         window.sortTable = (n) => {
-            const table = document.getElementById("historyTable");
-            let rows, switching, i, x, y, shouldSwitch, dir, switchcount = 0;
-            switching = true;
-            dir = "asc";
-            while (switching) {
-                switching = false;
-                rows = table.rows;
-                for (i = 1; i < (rows.length - 1); i++) {
-                    shouldSwitch = false;
-                    x = rows[i].getElementsByTagName("TD")[n];
-                    y = rows[i + 1].getElementsByTagName("TD")[n];
-                    if (dir == "asc") {
-                        if (x.innerHTML.toLowerCase() > y.innerHTML.toLowerCase()) {
-                            shouldSwitch = true;
-                            break;
-                        }
-                    } else if (dir == "desc") {
-                        if (x.innerHTML.toLowerCase() < y.innerHTML.toLowerCase()) {
-                            shouldSwitch = true;
-                            break;
-                        }
-                    }
-                }
-                if (shouldSwitch) {
-                    rows[i].parentNode.insertBefore(rows[i + 1], rows[i]);
-                    switching = true;
-                    switchcount++;
-                } else {
-                    if (switchcount == 0 && dir == "asc") {
-                        dir = "desc";
-                        switching = true;
-                    }
-                }
-            }
+            if (this.historyTable) this.historyTable.sortBy(n);
         };
     }
 }
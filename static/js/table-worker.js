@@ -0,0 +1,106 @@
+/**
+ * Aircraft Logger Dashboard - history table sort/filter worker
+ *
+ * Columns arrive once. String columns are dictionary-encoded into Uint32Array
+ * ranks (so sorts compare integers and a filter tests each distinct value
+ * once) and numeric columns into Float64Arrays. Each query returns the row
+ * indexes to show, in order, as a transferred Uint32Array.
+ */
+
+const STRING_COLUMNS = ['time', 'hex', 'callsign', 'reg', 'model', 'operator'];
+const NUMERIC_COLUMNS = ['alt', 'speed'];
+const SEARCH_COLUMNS = ['hex', 'callsign', 'reg', 'model', 'operator'];
+
+let rowCount = 0;
+const keys = {};        // column -> typed array of sort keys per row
+const dictionaries = {}; // string column -> distinct upper-cased values, indexed by code
+const codes = {};        // string column -> Uint32Array of dictionary codes per row
+const sortedCache = {};  // "column:dir" -> full sorted order, reused while the filter changes
+
+function encodeStrings(values) {
+    const distinct = Array.from(new Set(values.map(v => v == null ? '' : String(v))));
+    const lower = distinct.map(v => v.toLowerCase());
+    const byRank = distinct.map((_, i) => i).sort((a, b) => (lower[a] < lower[b] ? -1 : lower[a] > lower[b] ? 1 : 0));
+    const rankOf = new Uint32Array(distinct.length);
+    byRank.forEach((code, rank) => { rankOf[code] = rank; });
+    const index = new Map(distinct.map((v, i) => [v, i]));
+    const rowCodes = new Uint32Array(values.length);
+    const ranks = new Uint32Array(values.length);
+    values.forEach((v, row) => {
+        const code = index.get(v == null ? '' : String(v));
+        rowCodes[row] = code;
+        ranks[row] = rankOf[code];
+    });
+    return { ranks, rowCodes, dictionary: distinct.map(v => v.toUpperCase()) };
+}
+
+function encodeNumbers(values) {
+    const out = new Float64Array(values.length);
+    values.forEach((v, row) => {
+        const n = parseFloat(String(v == null ? '' : v).replace(/,/g, ''));
+        out[row] = isNaN(n) ? -Infinity : n; // blanks sort first ascending
+    });
+    return out;
+}
+
+function load(columns) {
+    rowCount = (columns.hex || []).length;
+    STRING_COLUMNS.forEach(name => {
+        const encoded = encodeStrings(columns[name] || new Array(rowCount).fill(''));
+        keys[name] = encoded.ranks;
+        codes[name] = encoded.rowCodes;
+        dictionaries[name] = encoded.dictionary;
+    });
+    NUMERIC_COLUMNS.forEach(name => {
+        keys[name] = encodeNumbers(columns[name] || []);
+    });
+    Object.keys(sortedCache).forEach(k => delete sortedCache[k]);
+}
+
+function sortedOrder(column, dir) {
+    const identity = () => Uint32Array.from({ length: rowCount }, (_, i) => i);
+    if (!column || !keys[column]) return identity();
+    const cacheKey = `${column}:${dir}`;
+    if (!sortedCache[cacheKey]) {
+        const key = keys[column];
+        // Ties keep the server order (newest first)
+        sortedCache[cacheKey] = identity().sort((a, b) => (key[a] - key[b]) * dir || a - b);
+    }
+    return sortedCache[cacheKey];
+}
+
+function query({ column, dir, filter }) {
+    const order = sortedOrder(column, dir || 1);
+    const needle = (filter || '').trim().toUpperCase();
+    if (!needle) return order.slice();
+
+    // Test each distinct value once, then filter rows by code lookups
+    const matches = SEARCH_COLUMNS.map(name => ({
+        rowCodes: codes[name],
+        hit: Uint8Array.from(dictionaries[name], v => (v.includes(needle) ? 1 : 0))
+    }));
+    const out = new Uint32Array(rowCount);
+    let n = 0;
+    for (let i = 0; i < order.length; i++) {
+        const row = order[i];
+        for (let m = 0; m < matches.length; m++) {
+            if (matches[m].hit[matches[m].rowCodes[row]]) {
+                out[n++] = row;
+                break;
+            }
+        }
+    }
+    return out.slice(0, n);
+}
+
+self.onmessage = (event) => {
+    const msg = event.data;
+    if (msg.type === 'load') {
+        load(msg.columns);
+        return;
+    }
+    if (msg.type === 'query') {
+        const view = query(msg);
+        self.postMessage({ seq: msg.seq, view }, [view.buffer]);
+    }
+};
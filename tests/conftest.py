@@ -0,0 +1,29 @@
+import sys
+
+import pytest
+
+import airlogger.db as db
+
+
+@pytest.fixture
+def temp_db(monkeypatch, tmp_path):
+    """A fresh, initialised database in tmp_path; returns its path."""
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "aircraft.db"))
+    db.init_db()
+    return db.DB_PATH
+
+
+@pytest.fixture
+def dashboard_app(temp_db):
+    """The dashboard app on the temp database, unloaded again after the test."""
+    import dashboard
+    yield dashboard.app
+    # Other tests reload config and expect a fresh import of the app modules
+    for name in ("dashboard", "airlogger.api", "airlogger.web"):
+        sys.modules.pop(name, None)
+
+
+@pytest.fixture
+def client(dashboard_app):
+    """Test client for the dashboard; override it in a module to seed data first."""
+    return dashboard_app.test_client()
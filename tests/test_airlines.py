@@ -0,0 +1,37 @@
+import json
+import os
+
+from airlogger import airlines
+
+
+def test_iata_flight_number():
+    assert airlines.iata_flight_number("qfa123 ") == "QF123"
+    assert airlines.iata_flight_number("XYZ999") == "XYZ999"
+    assert airlines.iata_flight_number("") == ""
+
+
+def test_overrides_reload_on_mtime_change(monkeypatch, tmp_path):
+    path = tmp_path / "operators.json"
+    path.write_text(json.dumps({"ABC": "Alpha Air"}))
+    monkeypatch.setattr(airlines, "OPERATORS_FILE", str(path))
+    monkeypatch.setattr(airlines, "OVERRIDE_CHECK_INTERVAL", 0)
+
+    assert airlines.operator_from_callsign("ABC123") == "Alpha Air"
+    # Overrides take precedence over the built-in table
+    path.write_text(json.dumps({"ABC": "Bravo Air", "QFA": "Qantas Airways"}))
+    st = os.stat(path)
+    os.utime(path, (st.st_atime, st.st_mtime + 10))
+    assert airlines.operator_from_callsign("ABC123") == "Bravo Air"
+    assert airlines.operator_from_callsign("QFA1") == "Qantas Airways"
+
+    path.unlink()
+    assert airlines.operator_from_callsign("QFA1") == "Qantas"
+
+
+def test_designators_and_iata_prefixes():
+    assert airlines.operator_from_callsign("JKK412") == "Binter Canarias"
+    assert airlines.operator_from_callsign("LPL2101") == "LATAM Perú"
+    # IATA-style callsigns resolve through the ICAO table
+    assert airlines.operator_from_callsign("VA123") == "Virgin Australia"
+    assert airlines.operator_from_callsign("NZ7") == "Air New Zealand"
+    assert airlines.operator_from_callsign("VHABC") == ""
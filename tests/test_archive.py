@@ -0,0 +1,74 @@
+import math
+
+from airlogger import archive
+
+
+def make_row(i, day="2025-05-04"):
+    return (f"{day} 10:{i // 60:02d}:{i % 60:02d}", "7C6B2D" if i % 2 else "ABC123", f"QFA{i % 3}",
+            str(1000 * i), "450", "" if i == 1 else "90", "-37.8", "145.0", "VH-VXA", "B738", "Qantas")
+
+
+def test_round_trip_with_missing_values(tmp_path):
+    writer = archive.DailyArchiveWriter(str(tmp_path), chunk_rows=3)
+    rows = [make_row(i) for i in range(10)]
+    for row in rows:
+        writer.append(row)
+    writer.seal()
+
+    assert archive.list_days(str(tmp_path)) == ["2025-05-04"]
+    with archive.load_day("2025-05-04", str(tmp_path)) as day:
+        assert day.rows == 10
+        assert day.meta["rows"] == 10
+        assert list(day.column("altitude")) == [1000.0 * i for i in range(10)]
+        assert math.isnan(day.column("track")[1])
+        assert day.strings("hex") == [r[1] for r in rows]
+        assert day.strings("callsign") == [r[2] for r in rows]
+        assert sorted(day.dictionary("operator")) == ["Qantas"]
+        assert int(day.column("ts")[0]) == 1746352800
+
+
+def test_rollover_seals_previous_day_and_reopen_continues(tmp_path):
+    writer = archive.DailyArchiveWriter(str(tmp_path))
+    writer.append(make_row(0, "2025-05-03"))
+    writer.append(make_row(1, "2025-05-04"))
+    writer.close()
+    assert archive.list_days(str(tmp_path)) == ["2025-05-03"]
+
+    # A restart on the same day keeps appending to the open day with the same dictionaries
+    writer = archive.DailyArchiveWriter(str(tmp_path))
+    writer.append(make_row(2, "2025-05-04"))
+    writer.seal()
+    with archive.load_day("2025-05-04", str(tmp_path)) as day:
+        assert day.strings("hex") == ["7C6B2D", "ABC123"]
+        assert len(day.dictionary("registration")) == 1
+
+
+def test_torn_chunk_is_ignored(tmp_path):
+    writer = archive.DailyArchiveWriter(str(tmp_path))
+    for i in range(4):
+        writer.append(make_row(i))
+    writer.close()
+    with open(tmp_path / "2025-05-04" / "lat.bin", "ab") as f:
+        f.write(b"\x00" * 12)
+
+    with archive.load_day("2025-05-04", str(tmp_path)) as day:
+        assert day.rows == 4
+        assert len(day.column("lat")) == 4
+
+
+def test_torn_dictionary_line_is_dropped_before_appending(tmp_path):
+    writer = archive.DailyArchiveWriter(str(tmp_path))
+    for i in range(2):
+        writer.append(make_row(i))
+    writer.close()
+    # Power loss while appending a new callsign
+    with open(tmp_path / "2025-05-04" / "callsign.dict", "a", encoding="utf-8") as f:
+        f.write("QFA")
+
+    writer = archive.DailyArchiveWriter(str(tmp_path))
+    writer.append(make_row(2))
+    writer.append(make_row(5))
+    writer.seal()
+    with archive.load_day("2025-05-04", str(tmp_path)) as day:
+        assert day.dictionary("callsign") == ["QFA0", "QFA1", "QFA2"]
+        assert day.strings("callsign") == ["QFA0", "QFA1", "QFA2", "QFA2"]
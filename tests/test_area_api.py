@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+import airlogger.db as db
+
+
+@pytest.fixture
+def client(client):
+    rows = [
+        ("2025-05-04 10:00:00", "7C6B2D", "QFA1", "-37.80", "145.00"),
+        ("2025-05-04 10:05:00", "7C6B2D", "QFA1", "-37.90", "145.10"),
+        ("2025-05-04 10:10:00", "7C6B2D", "QFA1", "-33.90", "151.20"),  # outside bbox
+        ("2025-05-04 11:00:00", "ABC123", "VOZ2", "-37.85", "144.95"),
+        ("2025-05-05 09:00:00", "7C1111", "JST3", "-37.85", "144.95"),  # outside time range
+        ("2025-05-04 10:00:00", "7C2222", "", "", ""),                   # no position
+    ]
+    for ts, hex_code, callsign, lat, lon in rows:
+        db.insert_flight(ts, hex_code, callsign, "35000", "450", "90", lat, lon, "", "", "")
+    return client
+
+
+def query(client):
+    rv = client.get("/api/area?bbox=144.5,-38.5,145.5,-37.5&from=2025-05-04&to=2025-05-04")
+    assert rv.status_code == 200
+    return {a["hex"]: a for a in rv.get_json()["aircraft"]}
+
+
+def test_area_query_uses_rtree(client):
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert conn.execute("SELECT count(*) FROM flights_rtree").fetchone()[0] == 5
+
+    found = query(client)
+    assert set(found) == {"7C6B2D", "ABC123"}
+    assert found["7C6B2D"]["points"] == 2
+    assert found["7C6B2D"]["last_seen"] == "2025-05-04 10:05:00"
+    assert found["7C6B2D"]["bbox"] == [145.0, -37.9, 145.1, -37.8]
+
+
+def test_area_query_returns_segments(client):
+    from airlogger.segments import build_segments
+    build_segments()
+    rv = client.get("/api/area?bbox=144.5,-38.5,145.5,-37.5&from=2025-05-04&to=2025-05-04")
+    segs = rv.get_json()["segments"]
+    # Whole segments are returned (including the point outside the box); 7C2222 has no position
+    assert sorted((s["hex"], s["points"]) for s in segs) == [("7C6B2D", 3), ("ABC123", 1)]
+
+
+def test_area_query_without_rtree_gives_same_answer(client):
+    expected = query(client)
+    with sqlite3.connect(db.DB_PATH) as conn:
+        conn.execute("DROP TABLE flights_rtree")
+    db._read_pool.clear()
+    assert query(client) == expected
+
+
+def test_area_query_rejects_bad_bbox(client):
+    assert client.get("/api/area?bbox=1,2,3").status_code == 400
+    assert client.get("/api/area?bbox=145,-37,144,-38").status_code == 400
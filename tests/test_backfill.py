@@ -0,0 +1,43 @@
+import airlogger.db as db
+from airlogger import backfill
+
+
+def _insert(conn, ts, hex_code, reg="", model="", operator="", callsign=""):
+    conn.execute(
+        "INSERT INTO flights (timestamp_utc, hex, callsign, registration, model, operator) "
+        "VALUES (?, ?, ?, ?, ?, ?)", (ts, hex_code, callsign, reg, model, operator))
+
+
+def test_backfill_offline_fills_from_known_rows(temp_db, tmp_path):
+    with db.get_db_connection() as conn:
+        _insert(conn, "2025-05-01 10:00:00", "7C6B2D", "VH-VXA", "B738", "Qantas")
+        _insert(conn, "2025-05-04 10:00:00", "7C6B2D")
+        _insert(conn, "2025-05-04 11:00:00", "7C6B2D", model="B738")
+        _insert(conn, "2025-05-04 12:00:00", "ABCDEF")  # nothing known anywhere
+        conn.commit()
+
+    state_file = str(tmp_path / "state.json")
+    state = backfill.backfill_metadata("2025-05-02", batch_size=1, pause=0,
+                                       offline=True, state_file=state_file)
+    assert state["resolved"] == 1
+    assert state["rows_updated"] == 2
+
+    with db.get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT registration, model, operator FROM flights "
+            "WHERE hex = '7C6B2D' AND timestamp_utc >= '2025-05-02'").fetchall()
+    assert [tuple(r) for r in rows] == [("VH-VXA", "B738", "Qantas")] * 2
+
+
+def test_backfill_resumes_from_checkpoint(temp_db, tmp_path):
+    with db.get_db_connection() as conn:
+        for hex_code in ("AAAAAA", "BBBBBB", "CCCCCC"):
+            _insert(conn, "2025-05-04 10:00:00", hex_code)
+        conn.commit()
+
+    state_file = str(tmp_path / "state.json")
+    backfill.save_state({"since": "2025-05-01", "last_hex": "BBBBBB", "hexes": 2,
+                         "resolved": 0, "rows_updated": 0}, state_file)
+    state = backfill.backfill_metadata("2025-05-01", pause=0, offline=True, state_file=state_file)
+    assert state["hexes"] == 3
+    assert state["last_hex"] == "CCCCCC"
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+import airlogger.db as db
+from airlogger import coverage, geo
+
+
+def test_geo_matches_known_values():
+    # Melbourne -> Sydney is roughly 385 nm, heading north-east
+    assert geo.haversine_nm(-37.8136, 144.9631, -33.8688, 151.2093) == pytest.approx(385, abs=2)
+    assert geo.bearing_deg(0, 0, 1, 0) == pytest.approx(0)
+    assert geo.bearing_deg(0, 0, 0, -1) == pytest.approx(270)
+
+
+def _insert(ts, lat, lon):
+    db.insert_flight(ts, "7C6B2D", "QFA1", "30000", "450", "0", str(lat), str(lon), "", "", "")
+
+
+@pytest.fixture
+def station(monkeypatch, temp_db):
+    monkeypatch.setattr(coverage, "STATION_LAT", -37.0)
+    monkeypatch.setattr(coverage, "STATION_LON", 145.0)
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def test_update_is_incremental(station):
+    ts = f"{station} 10:00:00"
+    _insert(ts, -36.0, 145.0)      # 60 nm due north
+    _insert(ts, -36.01, 145.0)     # same cell, slightly closer
+    _insert(ts, -37.0, 146.0)      # east
+    _insert(ts, 10.0, 145.0)       # beyond MAX_RANGE_NM: counted in the grid only
+    _insert(ts, "", "")
+    assert coverage.update_coverage() == 5
+    assert coverage.update_coverage() == 0
+
+    _insert(ts, -35.5, 145.0)      # further north extends the range
+    coverage.update_coverage()
+
+    with db.get_read_connection() as conn:
+        total = conn.execute("SELECT sum(count) FROM coverage_cells").fetchone()[0]
+        north = conn.execute("SELECT max_nm FROM range_by_bearing WHERE bearing_bin = 0").fetchone()[0]
+        bins = conn.execute("SELECT count(*) FROM range_by_bearing").fetchone()[0]
+    assert total == 5
+    assert north == pytest.approx(90, abs=0.5)
+    assert bins == 2
+
+    coverage.reset_coverage()
+    assert coverage.update_coverage() == 6
+
+
+@pytest.fixture
+def client(client, station):
+    for i in range(20):
+        _insert(f"{station} 10:00:{i:02d}", -36.0 + i * 0.01, 145.0)
+    coverage.update_coverage()
+    return client
+
+
+def test_coverage_endpoints(client):
+    grid = client.get("/api/coverage?days=90").get_json()
+    assert sum(c[2] for c in grid["cells"]) == 20
+    assert grid["max"] == max(c[2] for c in grid["cells"])
+
+    polar = client.get("/api/coverage/range").get_json()
+    assert len(polar["max_nm"]) == 360 // polar["bin_deg"]
+    assert polar["max_nm"][0] == pytest.approx(71.4, abs=0.5)
+    assert polar["max_nm"][36] is None
+
+
+def test_array_helpers_match_scalar_without_numpy(monkeypatch):
+    lats, lons = [-36.0, -37.0, float("nan")], [145.0, 146.0, 145.0]
+    vector = list(geo.distances_nm(-37.0, 145.0, lats, lons))
+    monkeypatch.setattr(geo, "np", None)
+    assert geo.distances_nm(-37.0, 145.0, lats, lons)[:2] == pytest.approx(vector[:2])
+    assert geo.bounding_box(lats, lons) == (-37.0, 145.0, -36.0, 146.0)
+
+    lat, lon = geo.dead_reckon([-37.0], [145.0], [90.0], [480.0], [3600.0])
+    assert geo.haversine_nm(-37.0, 145.0, lat[0], lon[0]) == pytest.approx(480.0)
+    assert geo.bearing_deg(-37.0, 145.0, lat[0], lon[0]) == pytest.approx(90.0)
@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+
+import pytest
+
+import airlogger.db as db
+
+
+def test_read_connection_is_pooled_and_read_only(temp_db):
+    db.insert_flight("2025-05-04 10:00:00", "7C6B2D", "QFA1", "35000", "450", "90",
+                     "-37.8", "145.0", "VH-VXA", "B738", "Qantas")
+
+    with db.get_read_connection() as conn:
+        first = conn
+        assert conn.execute("SELECT count(*) FROM flights").fetchone()[0] == 1
+        assert conn.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM flights")
+
+    with db.get_read_connection() as conn:
+        assert conn is first
+
+    with db.get_read_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_readers_see_new_writes_and_do_not_block_writer(temp_db):
+    with db.get_read_connection() as conn:
+        conn.execute("SELECT count(*) FROM flights").fetchone()
+        # A writer can commit while a reader connection is checked out
+        db.insert_flight("2025-05-04 10:00:00", "7C6B2D", "", "", "", "", "", "", "", "", "")
+    with db.get_read_connection() as conn:
+        assert conn.execute("SELECT count(*) FROM flights").fetchone()[0] == 1
+
+
+def test_concurrent_checkouts_get_distinct_connections(temp_db):
+    seen = []
+    barrier = threading.Barrier(2)
+
+    def reader():
+        with db.get_read_connection() as conn:
+            seen.append(id(conn))
+            barrier.wait(timeout=5)
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(seen)) == 2
+
+
+def test_analytical_reads_use_replica_snapshot(monkeypatch, temp_db):
+    from airlogger import replica
+
+    monkeypatch.setattr(db, "REPLICA_INTERVAL", 60)
+    db.insert_flight("2025-05-04 10:00:00", "AAAAAA", "", "", "", "", "", "", "", "", "")
+
+    # No snapshot yet: analytical reads fall back to the main database
+    with db.get_read_connection(analytical=True) as conn:
+        assert conn.execute("PRAGMA database_list").fetchone()[2] == temp_db
+
+    replica.refresh_replica()
+    db.insert_flight("2025-05-04 10:01:00", "BBBBBB", "", "", "", "", "", "", "", "", "")
+    with db.get_read_connection(analytical=True) as conn:
+        assert conn.execute("PRAGMA database_list").fetchone()[2] == db.replica_path()
+        assert conn.execute("SELECT count(*) FROM flights").fetchone()[0] == 1
+    with db.get_read_connection() as conn:
+        assert conn.execute("SELECT count(*) FROM flights").fetchone()[0] == 2
+
+    # A new snapshot is swapped in atomically and pooled connections follow it
+    replica.refresh_replica()
+    with db.get_read_connection(analytical=True) as conn:
+        assert conn.execute("SELECT count(*) FROM flights").fetchone()[0] == 2
+
+
+def test_replica_refresh_finishes_while_the_logger_commits(temp_db):
+    from airlogger import replica
+
+    db.insert_flights([("2025-05-04 10:00:00", f"{i:06X}", "", "", "", "", "", "", "", "", "")
+                       for i in range(20000)])
+    stop = threading.Event()
+
+    def writer():
+        while not stop.is_set():
+            db.insert_flight("2025-05-04 11:00:00", "CCCCCC", "", "", "", "", "", "", "", "", "")
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        replica.refresh_replica()
+    finally:
+        stop.set()
+        thread.join()
+    snapshot = sqlite3.connect(db.replica_path())
+    try:
+        assert snapshot.execute("SELECT count(*) FROM flights WHERE hex != 'CCCCCC'").fetchone()[0] == 20000
+    finally:
+        snapshot.close()
@@ -0,0 +1,59 @@
+import pytest
+
+import airlogger.db as db
+from airlogger import querystats, utils
+from airlogger.segments import build_segments
+
+
+@pytest.fixture
+def client(client):
+    start, _ = utils.local_day_epoch_bounds("2025-05-04")
+    rows = []
+    # Two aircraft 1 degree apart, 100 points each along a short line
+    for i in range(100):
+        ts = utils.time.strftime("%Y-%m-%d %H:%M:%S", utils.time.gmtime(start + 3600 + i * 5))
+        rows.append((ts, "7C6B2D", "QFA1", "30000", "450", "0", f"{-37.0 + i * 0.001:.5f}", "145.00000", "", "", ""))
+        rows.append((ts, "7C1234", "VOZ2", "30000", "450", "0", f"{-38.0 + i * 0.001:.5f}", "145.00000", "", "", ""))
+    # The previous local day is excluded
+    rows.append(("2000-01-01 00:00:00", "7C6B2D", "QFA1", "", "", "", "-37.0", "145.0", "", "", ""))
+    db.insert_flights(rows)
+    build_segments()
+    return client
+
+
+def test_low_zoom_clusters_everything(client):
+    data = client.get("/api/history_points?date=2025-05-04&zoom=0").get_json()
+    assert sum(p[2] for p in data["points"]) == 200
+    assert len(data["points"]) == 1
+    assert data["points"][0][3] is None  # mixed aircraft: no hex
+    assert not data["truncated"]
+
+
+def test_high_zoom_separates_aircraft(client):
+    data = client.get("/api/history_points?date=2025-05-04&zoom=16").get_json()
+    assert sum(p[2] for p in data["points"]) == 200
+    assert len(data["points"]) > 100
+    assert {p[3] for p in data["points"]} == {"7C6B2D", "7C1234"}
+    assert all(p[4] is not None for p in data["points"])
+
+
+def test_bbox_and_validation(client):
+    data = client.get("/api/history_points?date=2025-05-04&zoom=10&bbox=144,-37.5,146,-36").get_json()
+    assert sum(p[2] for p in data["points"]) == 100
+    assert {p[3] for p in data["points"]} == {"7C6B2D"}
+
+    assert client.get("/api/history_points?date=nope").status_code == 400
+    assert client.get("/api/history_points?date=2025-05-04&bbox=1,2").status_code == 400
+
+
+def test_bbox_uses_the_rtree_and_drops_null_island(client):
+    start, _ = utils.local_day_epoch_bounds("2025-05-04")
+    ts = utils.time.strftime("%Y-%m-%d %H:%M:%S", utils.time.gmtime(start + 7200))
+    db.insert_flight(ts, "7C9999", "", "", "", "", "0", "0", "", "", "")
+    data = client.get("/api/history_points?date=2025-05-04&zoom=0").get_json()
+    assert sum(p[2] for p in data["points"]) == 200
+
+    querystats.reset()
+    boxed = client.get("/api/history_points?date=2025-05-04&zoom=10&bbox=144,-37.5,146,-36").get_json()
+    assert sum(p[2] for p in boxed["points"]) == 100
+    assert any("FROM flights_rtree r JOIN flights f" in shape for shape in querystats.snapshot()["shapes"])
@@ -0,0 +1,164 @@
+import sqlite3
+
+import pytest
+
+import airlogger.db as db
+from airlogger.journal import IngestJournal, read_records, encode_record
+
+
+def make_row(i):
+    return ("2025-05-04 10:00:%02d" % (i % 60), "7C%04X" % i, "QFA%d" % i, "35000", "450", "90",
+            "-37.8", "145.0", "VH-VXA", "B738", "Qantas")
+
+
+def count_rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT count(*) FROM flights").fetchone()[0]
+
+
+def test_records_round_trip(tmp_path):
+    path = tmp_path / "j"
+    path.write_bytes(b"".join(encode_record(make_row(i)) for i in range(3)))
+    rows, end = read_records(str(path))
+    assert rows == [make_row(i) for i in range(3)]
+    assert end == path.stat().st_size
+
+
+def test_replay_after_crash_applies_flushed_rows_once(temp_db, tmp_path):
+    journal = IngestJournal(str(tmp_path / "journal"), flush_every=1000)
+    for i in range(10):
+        journal.append(make_row(i))
+    journal.flush()
+    # Simulated crash: the journal is abandoned without close()
+
+    restarted = IngestJournal(str(tmp_path / "journal"))
+    assert restarted.replay() == 10
+    assert count_rows(temp_db) == 10
+    # Replaying again must not duplicate anything
+    assert restarted.replay() == 0
+    restarted.close()
+    assert count_rows(temp_db) == 10
+
+
+def test_torn_tail_is_truncated_on_startup(temp_db, tmp_path):
+    directory = tmp_path / "journal"
+    journal = IngestJournal(str(directory))
+    for i in range(3):
+        journal.append(make_row(i))
+    journal.flush()
+    segment = next(directory.iterdir())
+    with open(segment, "ab") as f:
+        f.write(encode_record(make_row(99))[:-5])
+
+    restarted = IngestJournal(str(directory))
+    restarted.append(make_row(3))
+    assert restarted.replay() == 4
+    restarted.close()
+    assert count_rows(temp_db) == 4
+
+
+def test_locked_database_keeps_rows_for_retry(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "DB_BUSY_TIMEOUT", 0.05)
+    db._writer.__dict__.clear()
+    journal = IngestJournal(str(tmp_path / "journal"))
+    for i in range(5):
+        journal.append(make_row(i))
+
+    blocker = sqlite3.connect(temp_db)
+    blocker.execute("BEGIN EXCLUSIVE")
+    with pytest.raises(sqlite3.OperationalError):
+        journal.apply_pending()
+    blocker.rollback()
+    blocker.close()
+
+    assert journal.apply_pending() == 5
+    journal.close()
+    assert count_rows(temp_db) == 5
+
+
+def test_segments_rotate_once_applied(temp_db, tmp_path):
+    directory = tmp_path / "journal"
+    journal = IngestJournal(str(directory), max_bytes=512)
+    total = 0
+    for _ in range(5):
+        for _ in range(10):
+            journal.append(make_row(total))
+            total += 1
+        journal.apply_pending()
+    journal.close()
+
+    assert count_rows(temp_db) == total
+    assert len(list(directory.iterdir())) <= 2
+
+
+def flip_byte(path, offset):
+    data = bytearray(path.read_bytes())
+    data[offset] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_corrupt_record_mid_segment_is_skipped_and_quarantined(temp_db, tmp_path):
+    from airlogger.journal import CORRUPT_RECORDS
+
+    directory = tmp_path / "journal"
+    journal = IngestJournal(str(directory))
+    for i in range(10):
+        journal.append(make_row(i))
+    journal.flush()
+    segment = next(directory.glob("*.journal"))
+    record_size = len(encode_record(make_row(0)))
+    # Corrupt the payload of the fourth record
+    flip_byte(segment, 3 * record_size + 12)
+
+    before = CORRUPT_RECORDS.labels().value
+    assert journal.apply_pending() == 9
+    # Records appended after the bad one keep flowing in
+    journal.append(make_row(10))
+    assert journal.apply_pending() == 1
+    journal.close()
+
+    assert count_rows(temp_db) == 10
+    assert CORRUPT_RECORDS.labels().value == before + 1
+    quarantined = list((directory / "quarantine").iterdir())
+    assert [p.read_bytes() for p in quarantined] == [segment.read_bytes()[3 * record_size:4 * record_size]]
+
+
+def test_corruption_in_older_segment_keeps_later_records(temp_db, tmp_path):
+    directory = tmp_path / "journal"
+    journal = IngestJournal(str(directory))
+    for i in range(5):
+        journal.append(make_row(i))
+    journal.flush()
+    first = next(directory.glob("*.journal"))
+    # A bad length field in the middle, then a new segment after a restart
+    flip_byte(first, len(encode_record(make_row(0))) * 2)
+    with open(first, "ab") as f:
+        f.write(encode_record(make_row(5)))
+    (directory / "ingest-000002.journal").write_bytes(encode_record(make_row(6)))
+
+    restarted = IngestJournal(str(directory))
+    assert restarted.replay() == 6
+    restarted.close()
+    # Rows 2 and 5 (written after the bad record) were applied before the segment was deleted
+    with sqlite3.connect(temp_db) as conn:
+        hexes = {row[0] for row in conn.execute("SELECT hex FROM flights")}
+    assert hexes == {make_row(i)[1] for i in range(7) if i != 2}
+    assert not first.exists()
+    assert len(list((directory / "quarantine").iterdir())) == 1
+
+
+def test_startup_repair_only_truncates_the_torn_tail(temp_db, tmp_path):
+    directory = tmp_path / "journal"
+    journal = IngestJournal(str(directory), flush_every=1000)
+    for i in range(4):
+        journal.append(make_row(i))
+    journal.flush()
+    segment = next(directory.glob("*.journal"))
+    flip_byte(segment, 12)
+    with open(segment, "ab") as f:
+        f.write(encode_record(make_row(99))[:-5])
+
+    restarted = IngestJournal(str(directory))
+    assert restarted.replay() == 3
+    restarted.close()
+    assert count_rows(temp_db) == 3
@@ -0,0 +1,96 @@
+import logging
+import time
+
+import pytest
+
+import airlogger.db as db
+from airlogger import core, latency
+
+
+def _row(seconds_ago, hex_code="7C6B2D"):
+    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - seconds_ago))
+    return (ts, hex_code, "QFA1", "30000", "450", "90", "-37.0", "145.0", "VH-ABC", "B738", "Qantas")
+
+
+@pytest.fixture
+def tracker(monkeypatch, tmp_path, temp_db):
+    fresh = latency.LatencyTracker(window=100, thresholds={"metadata": 0.5}, log_interval=60)
+    monkeypatch.setattr(latency, "tracker", fresh)
+    monkeypatch.setattr(core, "latency", fresh)
+    monkeypatch.setattr(latency, "_exposed_id", None)
+    monkeypatch.setattr(latency, "_last_exposure_write", 0.0)
+    monkeypatch.setattr(latency, "LATENCY_DASHBOARD_FILE", str(tmp_path / "latency_dashboard.json"))
+    return fresh
+
+
+def test_stages_percentiles_and_journal_commits(tracker, caplog):
+    for i in range(10):
+        tracker.accepted("7C6B2D", 100.0, 100.001, 100.01 + i * 0.01)
+    snap = tracker.snapshot()["stages"]
+    assert snap["parse"]["count"] == 10 and snap["parse"]["p50_ms"] == pytest.approx(1.0)
+    assert snap["metadata"]["max_ms"] == pytest.approx(99.0)
+
+    tracker.queued("7C6B2D", time.time() - 2, time.time() - 1)
+    tracker.queued("7C1234", time.time() - 2, time.time() - 1)
+    tracker.applied(1)
+    snap = tracker.snapshot()
+    assert snap["queued"] == 1 and snap["stages"]["ingest"]["p50_ms"] >= 2000
+
+    with caplog.at_level(logging.WARNING, logger="airlogger.latency"):
+        for _ in range(3):
+            tracker.record("metadata", 0.8, "7C6B2D")
+    assert len([r for r in caplog.records if "Slow ingest stage" in r.getMessage()]) == 1
+
+
+def test_log_aircraft_traces_direct_writes(tracker, monkeypatch):
+    monkeypatch.setattr(core, "fetch_metadata", lambda h: ("VH-ABC", "B738", "Qantas", "QFA1"))
+    monkeypatch.setattr(core, "ARCHIVE_FORMAT", "columnar")
+    monkeypatch.setattr(core, "get_archive_writer", lambda: type("W", (), {"append": lambda self, r: None})())
+    core.log_aircraft(("7C9999", "QFA9", "1000", "200", "90", "-37.0", "145.0"), time.time() - 0.2)
+    stages = tracker.snapshot()["stages"]
+    assert set(stages) == {"parse", "metadata", "commit", "ingest"}
+    assert stages["ingest"]["p50_ms"] >= 200
+
+
+def test_exposure_is_recorded_for_newly_served_rows(tracker, client):
+    db.insert_flights([_row(60)])
+    client.get("/api/live_flights")  # sets the mark
+    db.insert_flights([_row(3, "7C1234")])
+    client.get("/api/live_flights")
+    client.get("/api/live_flights")
+    data = client.get("/api/latency").get_json()
+    exposure = data["dashboard"]["stages"]["exposure"]
+    assert exposure["count"] == 1 and exposure["p50_ms"] >= 2000
+
+
+def test_exposure_is_merged_across_gunicorn_workers(tracker, monkeypatch, tmp_path):
+    import json
+    import os
+    import subprocess
+    import sys
+    from airlogger import metrics
+
+    monkeypatch.setattr(metrics, "_worker_dir", str(tmp_path))
+    latency.record_exposure([{"id": 1, "ts": time.time() - 5, "hex": "7C6B2D"}])
+    latency.record_exposure([{"id": 2, "ts": time.time() - 2, "hex": "7C6B2D"}])
+    own = tmp_path / f"latency_dashboard-{os.getpid()}.json"
+    assert own.exists() and not (tmp_path / "latency_dashboard.json").exists()
+
+    def worker_file(pid, p99):
+        stage = {"count": 4, "p50_ms": 1000.0, "p90_ms": p99, "p99_ms": p99, "max_ms": p99}
+        (tmp_path / f"latency_dashboard-{pid}.json").write_text(json.dumps(
+            {"updated": time.time(), "window": 100, "queued": 0, "stages": {"exposure": stage}}))
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    sibling = subprocess.Popen(["sleep", "30"])
+    try:
+        worker_file(sibling.pid, 9000.0)
+        worker_file(exited.pid, 99000.0)
+        dashboard = latency.read_snapshots(live=tracker.snapshot())["dashboard"]
+    finally:
+        sibling.kill()
+        sibling.wait()
+    exposure = dashboard["stages"]["exposure"]
+    assert dashboard["workers"] == 2 and exposure["count"] == 5 and exposure["p99_ms"] == 9000.0
+    assert not (tmp_path / f"latency_dashboard-{exited.pid}.json").exists()
@@ -0,0 +1,60 @@
+import json
+import math
+import time
+
+import pytest
+
+import airlogger.db as db
+from airlogger import feed
+
+
+@pytest.fixture
+def client(client):
+    now = time.time()
+    rows = []
+    for i in range(3):
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - 60 + i))
+        rows.append((ts, "7c6b2d", "QFA1", "30,000", "450", "90", f"{-37.0 + i * 0.01:.5f}", "145.0", "VH-ABC", "B738", "Qantas"))
+    rows.append((time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - 30)), "7C1234", "", "", "", "", "", "", "", "", ""))
+    db.insert_flights(rows)
+    return client
+
+
+def test_formats_carry_the_same_aircraft(client):
+    legacy = client.get("/api/live_flights").get_json()
+    assert set(legacy) == {"7C6B2D", "7C1234"}
+    assert legacy["7C6B2D"][0]["lat"] == "-36.98000"
+
+    r = client.get("/api/live_flights", headers={"Accept": feed.COLUMNS_MIME})
+    assert r.mimetype == feed.COLUMNS_MIME and r.headers["Vary"] == "Accept"
+    columns = json.loads(r.data)
+    assert columns["count"] == 2
+    i = columns["hex"].index("7C6B2D")
+    assert columns["lat"][i] == pytest.approx(-36.98)
+    assert columns["alt"][i] == 30000
+    assert columns["lat"][1 - i] is None and columns["alt"][1 - i] == 0
+
+    r = client.get("/api/live_flights", headers={"Accept": f"{feed.PACKED_MIME}, application/json;q=0.5"})
+    assert r.mimetype == feed.PACKED_MIME
+    packed = feed.decode_packed(r.data)
+    assert packed["hex"] == columns["hex"]
+    assert packed["lat"][i] == pytest.approx(-36.98)
+    assert packed["speed"][i] == 450
+    assert math.isnan(packed["lon"][1 - i])
+    assert packed["time"] == columns["time"]
+    assert len(r.data) < len(client.get("/api/live_flights").data)
+
+
+def test_decode_rejects_other_payloads():
+    with pytest.raises(ValueError):
+        feed.decode_packed(b"JSON" + bytes(12))
+
+
+@pytest.mark.parametrize("accept", [
+    "*/*",
+    "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+])
+def test_wildcard_accept_gets_json(client, accept):
+    r = client.get("/api/live_flights", headers={"Accept": accept})
+    assert r.mimetype == "application/json"
+    assert set(r.get_json()) == {"7C6B2D", "7C1234"}
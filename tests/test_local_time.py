@@ -0,0 +1,65 @@
+import sqlite3
+from zoneinfo import ZoneInfo
+
+import pytest
+
+import airlogger.db as db
+from airlogger import utils
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    def use(name):
+        monkeypatch.setattr(utils, "LOCAL_TZ", ZoneInfo(name))
+        utils._offset_cache.clear()
+        utils._day_cache.clear()
+    yield use
+    utils._offset_cache.clear()
+    utils._day_cache.clear()
+
+
+@pytest.mark.parametrize("zone", ["Australia/Melbourne", "Australia/Lord_Howe", "America/New_York", "UTC"])
+def test_format_local_matches_strptime_path_across_dst(local_tz, zone):
+    local_tz(zone)
+    # Every 37 minutes through 2025, covering both DST transitions
+    start = utils.utc_epoch("2025-01-01 00:00:00")
+    epochs = list(range(start, start + 365 * 86400, 37 * 60))
+    for epoch in epochs:
+        utc_str = utils.time.strftime("%Y-%m-%d %H:%M:%S", utils.time.gmtime(epoch))
+        expected = utils.convert_to_local(utc_str).strftime("%Y-%m-%d %H:%M:%S")
+        assert utils.format_local(epoch) == expected, utc_str
+    assert utils.format_local_many(epochs + [None]) == [utils.format_local(e) for e in epochs] + [None]
+
+
+def test_utc_epoch():
+    assert utils.utc_epoch("1970-01-01 00:01:00") == 60
+    assert utils.utc_epoch("2025-05-04 10:00:00.123456") == utils.utc_epoch("2025-05-04 10:00:00")
+    assert utils.utc_epoch("") is None
+    assert utils.utc_epoch(None) is None
+
+
+def test_existing_database_is_backfilled(monkeypatch, tmp_path):
+    path = tmp_path / "aircraft.db"
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE flights (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp_utc TEXT, hex TEXT, callsign TEXT,
+            altitude TEXT, speed TEXT, track TEXT, lat TEXT, lon TEXT,
+            registration TEXT, model TEXT, operator TEXT
+        )
+    """)
+    conn.execute("INSERT INTO flights (timestamp_utc, hex) VALUES ('2025-05-04 10:00:00', '7C6B2D')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_PATH", str(path))
+    db.init_db()
+    db.insert_flight("2025-05-04 10:00:05", "7C6B2D", "QFA1", "", "", "", "", "", "", "", "")
+    with db.get_write_connection() as conn:
+        # Inserts that bypass INSERT_FLIGHT_SQL are filled by the trigger
+        conn.execute("INSERT INTO flights (timestamp_utc, hex) VALUES ('2025-05-04 10:00:10', '7C6B2D')")
+        conn.commit()
+    with db.get_read_connection() as conn:
+        ts = [r[0] for r in conn.execute("SELECT ts FROM flights ORDER BY id")]
+    base = utils.utc_epoch("2025-05-04 10:00:00")
+    assert ts == [base, base + 5, base + 10]
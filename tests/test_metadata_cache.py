@@ -0,0 +1,64 @@
+import sys
+
+from airlogger.cache import MetadataCache
+
+
+class FakeClock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def test_lru_eviction():
+    cache = MetadataCache(max_entries=2, ttl=100, clock=FakeClock())
+    cache.put("a", ("A",))
+    cache.put("b", ("B",))
+    assert cache.get("a") == ("A",)  # a becomes most recently used
+    cache.put("c", ("C",))
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_stale_entry_served_and_refresh_requested():
+    clock = FakeClock()
+    refreshed = []
+    cache = MetadataCache(max_entries=10, ttl=100, max_stale=1000,
+                          on_stale=refreshed.append, clock=clock)
+    cache.put("ab1234", ("N1", "B738", "Qantas", "QFA1"))
+
+    clock.t += 150
+    assert cache.get("ab1234") == ("N1", "B738", "Qantas", "QFA1")
+    assert refreshed == ["ab1234"]
+
+    # Too old even for stale serving: treated as a miss
+    clock.t += 2000
+    assert cache.get("ab1234") is None
+
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_put_refreshes_timestamp():
+    clock = FakeClock()
+    cache = MetadataCache(max_entries=10, ttl=100, max_stale=1000, clock=clock)
+    cache.put("ab1234", ("old",))
+    clock.t += 150
+    cache.put("ab1234", ("new",))
+    assert cache.get("ab1234") == ("new",)
+    assert cache.stats()["hits"] == 1
+
+
+def test_hits_do_not_allocate():
+    cache = MetadataCache(max_entries=10, ttl=1e9)
+    result = ("N1", "B738", "Qantas", "QFA1")
+    cache.put("ab1234", result)
+    cache.get("ab1234")
+
+    before = sys.getallocatedblocks()
+    for _ in range(10000):
+        assert cache.get("ab1234") is result
+    assert sys.getallocatedblocks() - before < 50
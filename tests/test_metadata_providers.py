@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from airlogger.metadata import (
+    AdsbLolProvider, OpenSkyProvider, ProviderChain, merge_results,
+)
+
+
+class StubServer:
+    """Local HTTP server returning a fixed JSON body after a configurable delay."""
+
+    def __init__(self, body, status=200, delay=0.0):
+        self.body = body
+        self.status = status
+        self.delay = delay
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                delay = stub.delay() if callable(stub.delay) else stub.delay
+                time.sleep(delay)
+                payload = json.dumps(stub.body).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/{{hex}}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+ADSB_BODY = {"ac": [{"r": "VH-VXA", "t": "B738", "flight": ""}]}
+OPENSKY_BODY = {"registration": "VH-VXA", "model": "737-838", "operator": "Qantas",
+                "operatorCallsign": "QANTAS"}
+
+
+@pytest.fixture
+def servers():
+    created = []
+
+    def make(*args, **kwargs):
+        server = StubServer(*args, **kwargs)
+        created.append(server)
+        return server
+
+    yield make
+    for server in created:
+        server.close()
+
+
+def prime(provider, latency, n=50):
+    for _ in range(n):
+        provider.stats.record(latency, False)
+
+
+def test_merge_results_field_by_field():
+    assert merge_results([("A", "", "", ""), ("B", "M", "Op", "")]) == ("A", "M", "Op", "")
+    assert merge_results([None, None]) is None
+
+
+def test_primary_fast_no_hedge(servers):
+    adsb, opensky = servers(ADSB_BODY), servers(OPENSKY_BODY)
+    chain = ProviderChain([AdsbLolProvider(adsb.url), OpenSkyProvider(opensky.url)])
+    assert chain.resolve("7c6b2d") == ("VH-VXA", "B738", "", "")
+    assert opensky.hits == 0
+
+
+def test_fallback_on_error(servers):
+    adsb, opensky = servers({}, status=500), servers(OPENSKY_BODY)
+    chain = ProviderChain([AdsbLolProvider(adsb.url), OpenSkyProvider(opensky.url)])
+    assert chain.resolve("7c6b2d") == ("VH-VXA", "737-838", "Qantas", "QANTAS")
+    assert chain.stats()["adsb_lol"]["errors"] == 1
+
+
+def test_hedges_when_primary_slower_than_p90(servers):
+    adsb, opensky = servers(ADSB_BODY, delay=1.0), servers(OPENSKY_BODY)
+    late = []
+    primary = AdsbLolProvider(adsb.url)
+    prime(primary, 0.02)
+    chain = ProviderChain([primary, OpenSkyProvider(opensky.url)],
+                          on_late=lambda h, r: late.append(r))
+
+    start = time.perf_counter()
+    result = chain.resolve("7c6b2d")
+    assert time.perf_counter() - start < 0.5
+    assert result == ("VH-VXA", "737-838", "Qantas", "QANTAS")
+    assert primary.stats.hedged == 1
+
+    # The slow primary's answer is still delivered for field-by-field merging
+    deadline = time.time() + 3
+    while not late and time.time() < deadline:
+        time.sleep(0.05)
+    assert late == [("VH-VXA", "B738", "", "")]
+
+
+def test_hedging_cuts_tail_latency(servers):
+    calls = {"n": 0}
+
+    def spiky():
+        calls["n"] += 1
+        return 0.6 if calls["n"] % 20 == 0 else 0.01
+
+    adsb, opensky = servers(ADSB_BODY, delay=spiky), servers(OPENSKY_BODY, delay=0.01)
+    primary = AdsbLolProvider(adsb.url)
+    chain = ProviderChain([primary, OpenSkyProvider(opensky.url)], min_hedge_delay=0.02)
+    prime(primary, 0.02)
+
+    latencies = []
+    for i in range(60):
+        start = time.perf_counter()
+        assert chain.resolve(f"{i:06x}") is not None
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    assert p99 < 0.3
+    assert primary.stats.hedged >= 1
@@ -0,0 +1,73 @@
+import pytest
+
+from airlogger import metrics
+
+
+@pytest.fixture
+def client(client, monkeypatch, tmp_path):
+    import airlogger.api as api
+    monkeypatch.setattr(api, "METRICS_FILE", str(tmp_path / "metrics_logger.prom"))
+    return client
+
+
+def test_render_counters_and_histograms():
+    c = metrics.counter("test_events_total", "Events", ("kind",))
+    c.labels("a").inc()
+    c.labels("a").inc(2)
+    assert metrics.counter("test_events_total", "Events", ("kind",)) is c
+    with pytest.raises(ValueError):
+        metrics.gauge("test_events_total", "Events")
+
+    h = metrics.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        h.observe(value)
+    metrics.counter("test_untouched_total", "Never incremented")
+
+    text = metrics.render("logger")
+    assert 'test_events_total{process="logger",kind="a"} 3' in text
+    assert 'test_latency_seconds_bucket{process="logger",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{process="logger",le="1.0"} 2' in text
+    assert 'test_latency_seconds_bucket{process="logger",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{process="logger"} 3' in text
+    assert "test_untouched_total" not in text
+
+
+def test_textfile_is_merged_into_dashboard_metrics(client, tmp_path):
+    metrics.counter("test_merged_total", "Merged across processes").inc()
+    metrics.write_textfile(str(tmp_path / "metrics_logger.prom"), "logger")
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".metrics-")] == []
+
+    assert client.get("/health").status_code in (200, 503)
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.mimetype == "text/plain"
+    text = r.get_data(as_text=True)
+    assert text.count("# TYPE test_merged_total counter") == 1
+    assert 'test_merged_total{process="logger"} 1' in text
+    assert 'test_merged_total{process="dashboard"} 1' in text
+    assert 'airlogger_http_request_duration_seconds_count{process="dashboard",endpoint="api.health",method="GET"}' in text
+
+
+def test_workers_share_metrics_through_per_pid_files(client, monkeypatch, tmp_path):
+    import os
+
+    workers = tmp_path / "workers"
+    workers.mkdir()
+    monkeypatch.setattr(metrics, "_worker_dir", str(workers))
+    monkeypatch.setattr(metrics, "_worker_written", 0.0)
+    # A sibling worker (any live pid) and one that has exited
+    sibling, dead = os.getppid(), 2 ** 22 + 1
+    for pid in (sibling, dead):
+        (workers / f"metrics_dashboard-{pid}.prom").write_text(
+            "# HELP airlogger_http_requests_total Dashboard requests by endpoint and status\n"
+            "# TYPE airlogger_http_requests_total counter\n"
+            f'airlogger_http_requests_total{{process="dashboard",worker="{pid}",endpoint="api.health",'
+            'method="GET",status="200"} 7\n')
+
+    client.get("/health")
+    assert (workers / f"metrics_dashboard-{os.getpid()}.prom").exists()
+    text = client.get("/metrics").get_data(as_text=True)
+    assert text.count("# TYPE airlogger_http_requests_total counter") == 1
+    assert f'worker="{sibling}",endpoint="api.health",method="GET",status="200"}} 7' in text
+    assert f'airlogger_http_requests_total{{process="dashboard",worker="{os.getpid()}",endpoint="api.health"' in text
+    assert f'worker="{dead}"' not in text
+    assert not (workers / f"metrics_dashboard-{dead}.prom").exists()
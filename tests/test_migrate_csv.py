@@ -0,0 +1,44 @@
+import gzip
+import importlib.util
+import os
+import sqlite3
+import sys
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "migrate_csv_to_sqlite.py")
+spec = importlib.util.spec_from_file_location("migrate_csv_to_sqlite", SCRIPT)
+migrate = importlib.util.module_from_spec(spec)
+# Registered so worker processes can unpickle parse_csv_file
+sys.modules[spec.name] = migrate
+spec.loader.exec_module(migrate)
+
+HEADER = "Time UTC,Hex,Callsign,Altitude,Speed,Latitude,Longitude,Registration,Model,Operator\n"
+
+
+def write_logs(log_dir):
+    log_dir.mkdir()
+    (log_dir / "aircraft_log_2025-05-03.csv").write_text(
+        HEADER + "2025-05-03 10:00:00,7c6b2d,QFA1,35000,450,-37.8,145.0,VH-VXA,B738,Qantas\n"
+                 "2025-05-03 10:00:30,7C6B2D,QFA1,35100,451,-37.9,145.1,VH-VXA,B738,Qantas\n")
+    with gzip.open(log_dir / "aircraft_log_2025-05-04.csv.gz", "wt", newline="") as f:
+        # Reordered columns are matched by header name
+        f.write("Hex,Time UTC,Callsign\nABC123,2025-05-04 09:00:00,VOZ2\n,,\n")
+
+
+def test_bulk_import_is_idempotent_and_restores_indexes(temp_db, tmp_path):
+    log_dir = tmp_path / "logs"
+    write_logs(log_dir)
+
+    assert migrate.migrate_csvs(str(log_dir), workers=2, batch_size=2) == 3
+    assert migrate.migrate_csvs(str(log_dir), workers=1) == 0
+
+    with sqlite3.connect(temp_db) as conn:
+        rows = conn.execute("SELECT timestamp_utc, hex, callsign, altitude FROM flights ORDER BY id").fetchall()
+        indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert rows == [
+        ("2025-05-03 10:00:00", "7C6B2D", "QFA1", "35000"),
+        ("2025-05-03 10:00:30", "7C6B2D", "QFA1", "35100"),
+        ("2025-05-04 09:00:00", "ABC123", "VOZ2", ""),
+    ]
+    assert {"idx_timestamp_utc", "idx_hex"} <= indexes
+    assert journal_mode == "wal"
@@ -0,0 +1,93 @@
+from airlogger.cache import NegativeCache
+
+
+class FakeClock:
+    def __init__(self, t=1000.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+def test_backoff_is_per_hex():
+    clock = FakeClock()
+    cache = NegativeCache(max_entries=100, base_delay=60, max_delay=3600, clock=clock)
+
+    assert cache.record_failure("aaaaaa") == 60
+    assert not cache.should_retry("aaaaaa")
+    # Other hexes failing must not change aaaaaa's interval
+    for i in range(50):
+        cache.record_failure(f"b{i:05x}")
+    assert cache.retry_at("aaaaaa") == 1060
+
+    clock.t += 61
+    assert cache.should_retry("aaaaaa")
+    assert cache.record_failure("aaaaaa") == 120
+    assert cache.record_failure("aaaaaa") == 240
+    assert cache.attempts("aaaaaa") == 3
+
+
+def test_backoff_capped_and_forget():
+    clock = FakeClock()
+    cache = NegativeCache(max_entries=10, base_delay=60, max_delay=300, clock=clock)
+    delays = [cache.record_failure("abc123") for _ in range(6)]
+    assert delays == [60, 120, 240, 300, 300, 300]
+    cache.forget("abc123")
+    assert cache.should_retry("abc123")
+    assert cache.attempts("abc123") == 0
+
+
+def test_entries_expire():
+    clock = FakeClock()
+    cache = NegativeCache(max_entries=100, base_delay=60, max_delay=600, clock=clock)
+    cache.record_failure("abc123")
+    clock.t += 60 + 600 + 1
+    assert cache.purge() == 1
+    assert len(cache) == 0
+
+
+def test_100k_distinct_failing_hexes_stay_bounded():
+    clock = FakeClock()
+    cache = NegativeCache(max_entries=5000, base_delay=60, max_delay=3600, clock=clock)
+    cache.record_failure("keep01")
+
+    for i in range(100_000):
+        clock.t += 0.001
+        assert cache.record_failure(f"{i:06x}") == 60
+        assert len(cache) <= 5000
+        assert len(cache._heap) <= 2 * 5000 + 1
+
+    # Oldest entries are evicted first; the newest ones keep their backoff
+    assert "keep01" not in cache
+    assert not cache.should_retry(f"{99_999:06x}")
+    assert cache.attempts(f"{99_999:06x}") == 1
+    # Repeated failures for one hex are unaffected by the cache churn
+    assert cache.record_failure(f"{99_999:06x}") == 120
+
+
+def test_concurrent_failures_and_purges():
+    import threading
+    clock = FakeClock()
+    cache = NegativeCache(max_entries=50, base_delay=1, max_delay=2, clock=clock)
+    errors = []
+
+    def worker(prefix):
+        try:
+            for i in range(2000):
+                key = f"{prefix}{i % 200:04x}"
+                cache.record_failure(key)
+                cache.should_retry(key)
+                if i % 3 == 0:
+                    cache.forget(key)
+                clock.t += 0.01
+                cache.purge()
+        except Exception as e:  # pragma: no cover - the failure being tested
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(p,)) for p in "ab"]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(cache) <= 50
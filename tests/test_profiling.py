@@ -0,0 +1,114 @@
+import time
+import threading
+import tracemalloc
+
+import pytest
+
+from airlogger import profiling
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path / "profiles"))
+    return tmp_path / "profiles"
+
+
+@pytest.fixture
+def client(client, profile_dir):
+    return client
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampling_profile_reports_stacks_and_memory(profile_dir):
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    try:
+        paths = profiling.run_profile("test", 0.3, memory=True)
+    finally:
+        stop.set()
+        worker.join()
+
+    assert not tracemalloc.is_tracing()
+    assert len(paths) == 3 and sum(p.endswith("-memory.txt") for p in paths) == 1
+    collapsed = next(p for p in paths if p.endswith(".collapsed"))
+    assert any(line.startswith("busy;") and "busy_loop" in line for line in open(collapsed))
+    summary = next(p for p in paths if p.endswith(".txt") and not p.endswith("-memory.txt"))
+    assert "busy_loop" in open(summary).read()
+    assert [r["name"] for r in profiling.list_reports()]
+
+
+def test_admin_endpoints_are_local_only(client, profile_dir):
+    assert client.get("/admin/profiles", environ_base={"REMOTE_ADDR": "10.0.0.5"}).status_code == 403
+
+    r = client.post("/admin/profile?seconds=1&memory=0")
+    assert r.status_code == 202 and r.get_json()["memory"] is False
+    assert client.post("/admin/profile?seconds=1").status_code == 409
+    deadline = time.time() + 5
+    while not profiling.list_reports() and time.time() < deadline:
+        time.sleep(0.1)
+    names = [r["name"] for r in client.get("/admin/profiles").get_json()]
+    assert any(n.endswith(".collapsed") for n in names)
+    assert client.get(f"/admin/profiles/{names[0]}").status_code == 200
+
+
+def test_slow_requests_are_profiled_when_enabled(client, profile_dir, monkeypatch):
+    client.get("/health")
+    assert not profile_dir.exists()
+
+    monkeypatch.setattr(profiling, "PROFILE_SLOW_REQUEST_MS", 1)
+    monkeypatch.setattr(profiling, "finish_request", _slow(profiling.finish_request))
+    client.get("/health")
+    report = next(profile_dir.glob("request-api_health-*.txt")).read_text()
+    assert "api.health took" in report and "cumulative" in report
+
+
+def _slow(finish):
+    """Report every profiled request as slower than the threshold."""
+    return lambda profile, endpoint, elapsed: finish(profile, endpoint, 1.0)
+
+
+def test_logger_is_only_signalled_through_a_fresh_heartbeat(client, monkeypatch, tmp_path):
+    import json
+    import os
+    import subprocess
+    import sys
+    from airlogger import admin
+
+    script = tmp_path / "aircraft_logger.py"
+    script.write_text(
+        "import signal, sys, time\n"
+        "signal.signal(signal.SIGUSR1, lambda *a: (open(sys.argv[1], 'w').close(), sys.exit(0)))\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(30)\n")
+    marker = tmp_path / "signalled"
+    heartbeat = tmp_path / "heartbeat.json"
+    monkeypatch.setattr(admin, "HEARTBEAT_FILE", str(heartbeat))
+
+    def beat(pid, age=0):
+        heartbeat.write_text(json.dumps({"timestamp": time.time() - age, "pid": pid}))
+
+    # Not the logger (this test process), and a stale heartbeat: refused
+    beat(os.getpid())
+    r = client.post("/admin/profile?target=logger")
+    assert r.status_code == 503 and "not the aircraft logger" in r.get_json()["error"]
+
+    child = subprocess.Popen([sys.executable, str(script), str(marker)], stdout=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline().strip() == "ready"
+        beat(child.pid, age=admin.HEALTH_THRESHOLD + 60)
+        assert client.post("/admin/profile?target=logger").status_code == 503
+        assert child.poll() is None
+
+        beat(child.pid)
+        r = client.post("/admin/profile?target=logger")
+        assert r.status_code == 202 and r.get_json()["pid"] == child.pid
+        assert child.wait(timeout=5) == 0 and marker.exists()
+    finally:
+        child.kill()
+        child.wait()
+        child.stdout.close()
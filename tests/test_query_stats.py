@@ -0,0 +1,81 @@
+import json
+import logging
+
+import pytest
+
+import airlogger.db as db
+from airlogger import querystats
+
+
+@pytest.fixture
+def timed_db(monkeypatch, tmp_path):
+    monkeypatch.setattr(db, "DB_PATH", str(tmp_path / "aircraft.db"))
+    monkeypatch.setattr(querystats, "_last_write", 0.0)
+    querystats.reset()
+    db.init_db()
+    db.insert_flights([("2025-05-04 01:00:00", "7C6B2D", "QFA1", "30000", "450", "90",
+                        "-37.0", "145.0", "VH-ABC", "B738", "Qantas")])
+    yield tmp_path
+    querystats.reset()
+
+
+def test_normalize_collapses_literals_and_in_lists():
+    shape = querystats.normalize("SELECT *  FROM flights\n WHERE hex IN (?, ?, ?) AND ts > 1700000000 AND callsign = 'QF1'")
+    assert shape == "SELECT * FROM flights WHERE hex IN (?...) AND ts > ? AND callsign = ?"
+    assert querystats.normalize("SELECT * FROM t WHERE a = :hex LIMIT 5") == "SELECT * FROM t WHERE a = ? LIMIT ?"
+
+
+def test_statements_are_timed_and_slow_ones_explained(timed_db, monkeypatch, caplog):
+    monkeypatch.setattr(querystats, "SQL_SLOW_MS", 0)
+    with caplog.at_level(logging.WARNING, logger="airlogger.querystats"):
+        with db.get_read_connection() as conn:
+            for callsign in ("QFA1", "QFA2"):
+                conn.execute("SELECT * FROM flights WHERE callsign = ?", (callsign,)).fetchall()
+            conn.execute("SELECT * FROM flights WHERE id = 1").fetchone()
+
+    stats = querystats.snapshot()["shapes"]
+    scan = stats["SELECT * FROM flights WHERE callsign = ?"]
+    assert scan["count"] == 2 and scan["full_scan"] is True
+    assert any(detail.startswith("SCAN") for detail in scan["plan"])
+    lookup = stats["SELECT * FROM flights WHERE id = ?"]
+    assert lookup["full_scan"] is False and lookup["plan"]
+    assert "INSERT INTO flights" in " ".join(stats)
+    # One report per shape per minute
+    assert len([r for r in caplog.records if "FROM flights WHERE" in r.getMessage()]) == 2
+
+    written = json.loads((timed_db / "query_stats" / f"{querystats.os.getpid()}.json").read_text())
+    assert written["shapes"]
+
+
+def test_admin_query_stats(timed_db, client):
+    client.get("/api/live_flights")
+    data = client.get("/admin/query-stats").get_json()
+    assert any("FROM flights" in s["statement"] and s["count"] >= 1 for s in data["shapes"])
+    assert data["processes"]
+
+
+def test_stale_stats_files_of_exited_processes_are_pruned(tmp_path):
+    import subprocess
+    import sys
+    import time
+
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    other = subprocess.Popen(["sleep", "30"])
+    old = time.time() - (querystats.STALE_INTERVALS + 1) * querystats.SQL_STATS_INTERVAL
+    try:
+        def stats_file(name, pid, updated):
+            (tmp_path / name).write_text(json.dumps({"pid": pid, "process": "aircraft_logger.py",
+                                                     "updated": updated, "shapes": {}}))
+
+        stats_file("recent.json", exited.pid, time.time())
+        stats_file("exited.json", exited.pid, old)
+        # A pid now running some other program does not keep the old file alive
+        stats_file("reused.json", other.pid, old)
+
+        loaded = querystats.load_all(str(tmp_path))
+        assert exited.pid in loaded and other.pid not in loaded
+        assert sorted(p.name for p in tmp_path.glob("*.json")) == ["recent.json"]
+    finally:
+        other.kill()
+        other.wait()
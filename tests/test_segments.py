@@ -0,0 +1,60 @@
+import sqlite3
+
+import airlogger.db as db
+from airlogger import segments
+
+
+def add(ts, hex_code, callsign, alt="30000", lat="-37.8", lon="145.0"):
+    db.insert_flight(ts, hex_code, callsign, alt, "450", "90", lat, lon, "", "", "")
+
+
+def all_segments(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("""
+            SELECT hex, callsign, start_utc, end_utc, point_count, max_altitude, min_lat, max_lat
+            FROM flight_segments ORDER BY hex, start_utc
+        """).fetchall()
+
+
+def test_segments_split_on_gap_and_callsign_change(temp_db):
+    add("2025-05-04 10:00:00", "7C6B2D", "QFA1", alt="10000", lat="-37.9")
+    add("2025-05-04 10:10:00", "7C6B2D", "", alt="35000")
+    add("2025-05-04 10:25:00", "7C6B2D", "QFA1")
+    add("2025-05-04 11:00:00", "7C6B2D", "QFA1")   # 35 min gap
+    add("2025-05-04 11:05:00", "7C6B2D", "QFA2")   # new callsign
+    add("2025-05-04 10:05:00", "ABC123", "VOZ2")
+
+    assert segments.build_segments() == 6
+    assert all_segments(temp_db) == [
+        ("7C6B2D", "QFA1", "2025-05-04 10:00:00", "2025-05-04 10:25:00", 3, 35000.0, -37.9, -37.8),
+        ("7C6B2D", "QFA1", "2025-05-04 11:00:00", "2025-05-04 11:00:00", 1, 30000.0, -37.8, -37.8),
+        ("7C6B2D", "QFA2", "2025-05-04 11:05:00", "2025-05-04 11:05:00", 1, 30000.0, -37.8, -37.8),
+        ("ABC123", "VOZ2", "2025-05-04 10:05:00", "2025-05-04 10:05:00", 1, 30000.0, -37.8, -37.8),
+    ]
+    with sqlite3.connect(temp_db) as conn:
+        assert conn.execute("SELECT count(*) FROM flights WHERE segment_id IS NULL").fetchone()[0] == 0
+
+
+def test_incremental_build_extends_open_segment(temp_db):
+    add("2025-05-04 10:00:00", "7C6B2D", "QFA1")
+    segments.build_segments()
+    add("2025-05-04 10:15:00", "7C6B2D", "QFA1")
+    # Late-arriving older row (e.g. a CSV import) joins the same segment
+    add("2025-05-04 09:50:00", "7C6B2D", "QFA1")
+    assert segments.build_segments(batch_size=1) == 2
+    assert segments.build_segments() == 0
+
+    rows = all_segments(temp_db)
+    assert len(rows) == 1
+    assert rows[0][2:5] == ("2025-05-04 09:50:00", "2025-05-04 10:15:00", 3)
+
+
+def test_rebuild_from_scratch(temp_db):
+    add("2025-05-04 10:00:00", "7C6B2D", "QFA1")
+    add("2025-05-04 12:00:00", "7C6B2D", "QFA1")
+    segments.build_segments()
+    first = all_segments(temp_db)
+    segments.reset_segments()
+    assert all_segments(temp_db) == []
+    assert segments.build_segments() == 2
+    assert all_segments(temp_db) == first
@@ -0,0 +1,82 @@
+import json
+import math
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import airlogger.db as db
+from airlogger import tracks
+from airlogger.segments import build_segments
+
+
+def test_straight_level_line_collapses_to_endpoints():
+    points = [(-37.0 + i * 0.001, 145.0, 30000.0) for i in range(500)]
+    assert tracks.simplify(points, 50.0) == [points[0], points[-1]]
+
+
+def test_turn_and_climb_are_kept():
+    line = [(-37.0 + i * 0.001, 145.0, 30000.0) for i in range(100)]
+    turn = [(line[-1][0], 145.0 + i * 0.001, 30000.0) for i in range(1, 100)]
+    kept = tracks.simplify(line + turn, 50.0)
+    assert line[-1] in kept and len(kept) == 3
+
+    # Same ground track, but a 1000 ft step climb halfway is preserved
+    climb = [(lat, lon, 30000.0 if i < 50 else 31000.0) for i, (lat, lon, _) in enumerate(line)]
+    assert len(tracks.simplify(climb, 50.0)) > 2
+
+
+def test_level_for_zoom():
+    assert tracks.level_for_zoom(3) == 6
+    assert tracks.level_for_zoom(9) == 8
+    assert tracks.level_for_zoom(14) == 14
+    assert tracks.level_for_zoom(16) is None
+
+
+@pytest.fixture
+def client(client):
+    start = datetime(2025, 5, 4, 10, 0, 0)
+    # A long, gently curving track sampled every 5 seconds
+    for i in range(1000):
+        ts = (start + timedelta(seconds=5 * i)).strftime("%Y-%m-%d %H:%M:%S")
+        lat = -37.8 + i * 0.002
+        lon = 145.0 + 0.2 * math.sin(i / 150.0)
+        db.insert_flight(ts, "7C6B2D", "QFA1", str(30000 + (i % 3)), "450", "0", f"{lat:.5f}", f"{lon:.5f}", "", "", "")
+    build_segments()
+    return client
+
+
+def test_track_endpoint_shrinks_payload(client):
+    raw = client.get("/api/track/7c6b2d?date=2025-05-04&zoom=16").get_json()
+    coarse = client.get("/api/track/7c6b2d?date=2025-05-04&zoom=8").get_json()
+    assert len(raw["segments"]) == len(coarse["segments"]) == 1
+    assert len(raw["segments"][0]["coords"]) == 1000
+    assert len(json.dumps(coarse)) * 10 < len(json.dumps(raw))
+    assert coarse["segments"][0]["coords"][0] == raw["segments"][0]["coords"][0]
+
+
+def test_closed_segments_are_stored_and_served(client):
+    assert tracks.store_closed_tracks() == 1
+    assert tracks.store_closed_tracks() == 0
+    with sqlite3.connect(db.DB_PATH) as conn:
+        levels = [r[0] for r in conn.execute("SELECT level FROM segment_tracks ORDER BY level")]
+        conn.execute("UPDATE segment_tracks SET coords = '[[1,2,3]]' WHERE level = 8")
+    assert levels == list(tracks.LEVELS)
+    seg_id = client.get("/api/track/7C6B2D?date=2025-05-04").get_json()["segments"][0]["id"]
+    cached = client.get(f"/api/track/7C6B2D?segment={seg_id}&zoom=9").get_json()
+    assert cached["segments"][0]["coords"] == [[1, 2, 3]]
+
+
+def test_only_newly_closed_or_changed_segments_are_rescanned(client):
+    assert tracks.store_closed_tracks() == 1
+    with sqlite3.connect(db.DB_PATH) as conn:
+        # Nothing before the watermark is looked at again
+        conn.execute("UPDATE segment_tracks SET source_points = 0")
+    assert tracks.store_closed_tracks() == 0
+
+    # A late row inside the stored segment moves the watermark back
+    db.insert_flight("2025-05-04 10:00:02", "7C6B2D", "QFA1", "30000", "450", "0", "-37.8", "145.0", "", "", "")
+    build_segments()
+    assert tracks.store_closed_tracks() == 1
+    with sqlite3.connect(db.DB_PATH) as conn:
+        assert {r[0] for r in conn.execute("SELECT source_points FROM segment_tracks")} == {1001}
@@ -0,0 +1,44 @@
+import pytest
+
+import airlogger.db as db
+from airlogger import utils
+
+
+@pytest.fixture
+def client(client):
+    start, _ = utils.local_day_epoch_bounds("2025-05-04")
+    db.insert_flights([
+        (utils.time.strftime("%Y-%m-%d %H:%M:%S", utils.time.gmtime(start + 3600 + i)),
+         "7C6B2D", "QFA1", "30000", "450", "90", "-37.0", "145.0", "VH-ABC", "B738", "Qantas <&>")
+        for i in range(3)
+    ])
+    return client
+
+
+def test_index_ships_columnar_rows_not_table_html(client):
+    from airlogger.web import table_columns, load_historical_data
+
+    data = load_historical_data("2025-05-04")[0]
+    columns = table_columns(data)
+    assert columns["hex"] == ["7C6B2D"] * 3
+    assert columns["time"] == sorted(columns["time"], reverse=True)
+    assert columns["flight"] == ["QF1"] * 3
+
+    html = client.get("/?date=2025-05-04").get_data(as_text=True)
+    assert '<tbody id="historyTableBody"></tbody>' in html
+    assert '"flight": ["QF1", "QF1", "QF1"]' in html
+    # tojson escapes markup inside the inline script
+    assert "Qantas <&>" not in html
+
+
+def test_rows_not_yet_backfilled_borrow_from_same_hex(client):
+    from airlogger.web import load_historical_data
+
+    start, _ = utils.local_day_epoch_bounds("2025-05-04")
+    stamp = utils.time.strftime("%Y-%m-%d %H:%M:%S", utils.time.gmtime(start + 7200))
+    db.insert_flights([(stamp, "7C6B2D", "", "31000", "450", "90", "-37.1", "145.1", "", "", "")])
+
+    data, total, unique, operators, models = load_historical_data("2025-05-04")
+    assert total == 4 and unique == 1
+    assert data[0]["Operator"] == "Qantas <&>" and data[0]["Registration"] == "VH-ABC"
+    assert operators == [("Qantas <&>", 1)] and models == [("B738", 1)]